@@ -1,53 +1,197 @@
 """ PandasAI is a wrapper around a LLM to make dataframes convesational """
-import ast
-import io
-import re
-from contextlib import redirect_stdout
+import asyncio
+import hashlib
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
+from dataclasses import replace
 
-import astor
-import matplotlib.pyplot as plt
 import pandas as pd
 
-from .constants import WHITELISTED_BUILTINS, WHITELISTED_LIBRARIES
-from .exceptions import LLMNotFoundError, MaxRetriesExceededError
+from .events import (
+    CodeGenerated,
+    CodeSanitized,
+    ExecutionStarted,
+    FinalResult,
+    PreliminaryResult,
+    PromptBuilt,
+    RetryTriggered,
+    RunEvent,
+)
+from .exceptions import LLMNotFoundError, MaxRetriesExceededError, NonDecomposableCodeError
+from .executors.base import Executor, uses_plots
+from .executors.limits import ExecutionLimits
+from .executors.local import LocalExecutor
 from .helpers.anonymizer import anonymize_dataframe_head
+from .helpers.approximate import Approximation, estimate_aggregates, sample_rows, split_blocks
+from .helpers.chunked import ChunkedPlan, PartialAggregates, count_rows, iter_chunks, plan_chunked
+from .helpers.code_optimizer import CodeOptimizer
+from .helpers.code_repair import CodeRepair, CodeRepairer
+from .helpers.column_projection import project_columns, referenced_columns
+from .helpers.code_sanitizer import CodeSanitizer, SanitizedCode
+from .helpers.fingerprint import MODE_SAMPLE
+from .helpers.intent_matcher import match_intent
+from .helpers.lru_cache import LRUCache
 from .helpers.notebook import Notebook
+from .helpers.result_cache import ResultCache
+from .helpers.result_coercion import coerce_to_data_frame
+from .helpers.run_context import RunContext
+from .helpers.run_steps import Execution, LLMCall, SQLQuery
+from .helpers.sampling import is_sample_independent_error, stratified_sample
+from .helpers.sql_database import SQLDatabase, schema
+from .helpers.run_stats import (
+    STAGE_DRY_RUN,
+    STAGE_EXEC,
+    STAGE_HEAD,
+    STAGE_LLM,
+    STAGE_PROMPT,
+    STAGE_BOOTSTRAP,
+    STAGE_REPAIR,
+    STAGE_RESULT_CACHE,
+    STAGE_SAMPLE,
+    STAGE_SANITIZE,
+    STAGE_SQL_REGISTER,
+    LLMCallStats,
+    RetryStats,
+    RunStats,
+)
 from .llm.base import LLM
+from .prompts.base import Prompt
 from .prompts.correct_error_prompt import CorrectErrorPrompt
+from .prompts.correct_sql_error_prompt import CorrectSQLErrorPrompt
 from .prompts.correct_wrong_type_prompt import CorrectWrongTypePrompt
 from .prompts.generate_python_code import GeneratePythonCodePrompt
+from .prompts.generate_sql_query import GenerateSQLQueryPrompt
+from .saved_question import SavedQuestion
 
 
 # pylint: disable=too-many-instance-attributes disable=too-many-arguments
 class PandasAI:
-    """PandasAI is a wrapper around a LLM to make dataframes conversational"""
+    """
+    PandasAI is a wrapper around a LLM to make dataframes conversational.
+
+    The state of each run is kept in its own RunContext, so a single instance can
+    serve concurrent runs from multiple threads. The `last_*` attributes are views
+    of the context of the last run started.
+    """
 
     _llm: LLM
     _verbose: bool = False
     _enforce_privacy: bool = False
     _max_retries: int = 3
     _is_notebook: bool = False
-    _original_instructions: dict = {
-        "question": None,
-        "df_head": None,
-        "num_rows": None,
-        "num_columns": None,
-        "rows_to_display": None,
-    }
-    last_code_generated: str | None = None
-    last_run_code: str | None = None
-    code_output: pd.DataFrame | None = None
-
-    def __init__(self, llm: LLM | None = None, verbose: bool = False, enforce_privacy: bool = False):
+    _zero_copy: bool = True
+    _optimize_code: bool = False
+    _repair_code: bool = True
+    # Shares of the rows the code runs on before all the rows, in the progressive runs
+    _progressive_fractions: tuple = (0.01, 0.1)
+    _last_context: RunContext | None = None
+
+    def __init__(
+        self,
+        llm: LLM | None = None,
+        verbose: bool = False,
+        enforce_privacy: bool = False,
+        zero_copy: bool = True,
+        code_cache_size: int = 128,
+        executor: Executor | None = None,
+        execution_limits: ExecutionLimits | None = None,
+        optimize_code: bool = False,
+        result_cache: ResultCache | None = None,
+        dry_run: bool = False,
+        dry_run_rows: int = 100,
+        column_projection: bool = False,
+        coerce_result: bool = True,
+        repair_code: bool = True,
+        code_repairs: list[CodeRepair] | None = None,
+        match_intents: bool = False,
+        sql_mode: bool = False,
+        sql_database: SQLDatabase | None = None,
+        approximation: Approximation | None = None,
+    ):
         if llm is None:
             raise LLMNotFoundError("An LLM should be provided to instantiate a PandasAI instance")
         self._llm = llm
         self._verbose = verbose
         self._enforce_privacy = enforce_privacy
+        self._zero_copy = zero_copy
+        # Rewrite the row-wise patterns of the generated code into vectorized code
+        self._optimize_code = optimize_code
+        # Maps the hash of the generated code to the sanitized and compiled code
+        self.code_cache = LRUCache(maxsize=code_cache_size)
+        # Maps the fingerprint of the dataframe and the sanitized code to the result
+        self.result_cache = result_cache
+        # Run the code on a sample first, so that most errors are corrected without
+        # running the code on the whole dataframe
+        self._dry_run = dry_run
+        self._dry_run_rows = dry_run_rows
+        # Run the code on the columns it uses only, when they can be determined
+        self._column_projection = column_projection
+        # Convert series, scalars, dicts and lists returned by the code to dataframes,
+        # instead of asking the LLM to correct the code
+        self._coerce_result = coerce_result
+        # Repair the mechanical errors of the code locally (e.g. the case of a column),
+        # instead of asking the LLM to correct the code
+        self._repair_code = repair_code
+        self._code_repairs = code_repairs
+        # Answer the trivial questions (e.g. "How many rows are there?") without the LLM
+        self._match_intents = match_intents
+        # Ask the LLM for a SQL query instead of python code, and run it against the
+        # dataframes registered in an in-memory sqlite database kept across questions
+        self._sql_mode = sql_mode
+        self.sql_database = sql_database if sql_database is not None or not sql_mode else SQLDatabase()
+        # How the approximate runs sample the dataframe and estimate the confidence intervals
+        self.approximation = approximation if approximation is not None else Approximation()
+        if executor is None:
+            executor = LocalExecutor(zero_copy=zero_copy, limits=execution_limits)
+        self._executor = executor
 
         self.notebook = Notebook()
         self._in_notebook = self.notebook.in_notebook()
 
+    @property
+    def last_code_generated(self) -> str | None:
+        """The code generated by the LLM in the last run"""
+        return self._last_context.code_generated if self._last_context else None
+
+    @property
+    def last_run_code(self) -> str | None:
+        """The last code run in the last run"""
+        return self._last_context.code_run if self._last_context else None
+
+    @property
+    def code_output(self) -> pd.DataFrame | None:
+        """The answer of the last run"""
+        return self._last_context.answer if self._last_context else None
+
+    @property
+    def last_run_output(self) -> str | None:
+        """What the last code run in the last run printed"""
+        return self._last_context.output if self._last_context else None
+
+    @property
+    def last_run_bytes_copied(self) -> int | None:
+        """The bytes of the dataframe copied to run the code in the last run"""
+        return self._last_context.stats.bytes_copied if self._last_context else None
+
+    @property
+    def last_run_stats(self) -> RunStats | None:
+        """The statistics of the last run"""
+        return self._last_context.stats if self._last_context else None
+
+    @property
+    def last_run_approximate(self) -> bool:
+        """Whether the answer of the last run has been estimated on a sample of the rows"""
+        return self._last_context.approximate if self._last_context else False
+
+    @property
+    def last_confidence_interval(self) -> tuple | None:
+        """The lower and upper bounds of the confidence interval of the last approximate answer"""
+        return self._last_context.confidence_interval if self._last_context else None
+
     def run(
         self,
         data_frame: pd.DataFrame,
@@ -55,37 +199,362 @@ class PandasAI:
         show_code: bool = False,
         anonymize_df: bool = True,
         use_error_correction_framework: bool = True,
+        return_context: bool = False,
+        approximate: bool = False,
+    ) -> pd.DataFrame | RunContext:
+        """
+        Run the LLM with the given prompt.
+
+        If `return_context` is True, the RunContext of the run is returned instead of
+        its answer.
+
+        If `approximate` is True, the code runs on a sample of the rows, see
+        `pandasai.helpers.approximate`: the sums and counts are scaled to the number
+        of rows of the dataframe, and the answer is flagged as approximate in its
+        `attrs` and in the context of the run, along with its confidence interval.
+        """
+        context = self._start_run(data_frame, prompt)
+        try:
+            answer = self._drive(
+                self._run_steps(
+                    context, show_code, anonymize_df, use_error_correction_framework, approximate=approximate
+                ),
+                context,
+            )
+        finally:
+            self._end_run(context)
+        self.log(f"Answer: {answer}")
+        return context if return_context else answer
+
+    async def arun(
+        self,
+        data_frame: pd.DataFrame,
+        prompt: str,
+        show_code: bool = False,
+        anonymize_df: bool = True,
+        use_error_correction_framework: bool = True,
+        return_context: bool = False,
+        approximate: bool = False,
+    ) -> pd.DataFrame | RunContext:
+        """
+        Run the LLM with the given prompt, without blocking the event loop.
+
+        The LLM calls are awaited and the code runs with the `aexecute` method of the
+        executor, so many questions can be answered concurrently.
+        """
+        context = self._start_run(data_frame, prompt)
+        try:
+            answer = await self._adrive(
+                self._run_steps(
+                    context, show_code, anonymize_df, use_error_correction_framework, approximate=approximate
+                ),
+                context,
+            )
+        finally:
+            self._end_run(context)
+        self.log(f"Answer: {answer}")
+        return context if return_context else answer
+
+    def run_iter(
+        self,
+        data_frame: pd.DataFrame,
+        prompt: str,
+        show_code: bool = False,
+        anonymize_df: bool = True,
+        use_error_correction_framework: bool = True,
+        approximate: bool = False,
+        progressive: bool = False,
+    ) -> Iterator[RunEvent]:
+        """
+        Run the LLM with the given prompt, yielding the events of the run as its
+        stages complete. The last event is the FinalResult of the run.
+
+        If `progressive` is True, the code runs on 1% then 10% of the rows before
+        running on all the rows, see `run_code_iter`.
+        """
+        if approximate and progressive:
+            raise ValueError("A run can't be both approximate and progressive")
+        context = self._start_run(data_frame, prompt)
+        try:
+            answer = yield from self._execute_steps(
+                self._run_steps(
+                    context,
+                    show_code,
+                    anonymize_df,
+                    use_error_correction_framework,
+                    approximate=approximate,
+                    progressive=progressive,
+                ),
+                context,
+            )
+        finally:
+            self._end_run(context)
+        self.log(f"Answer: {answer}")
+        yield FinalResult(answer, context)
+
+    def __call__(
+        self,
+        data_frame: pd.DataFrame,
+        prompt: str,
+        show_code: bool = False,
+        anonymize_df: bool = True,
+        use_error_correction_framework: bool = True,
     ) -> pd.DataFrame:
         """Run the LLM with the given prompt"""
-        self.log(f"Running PandasAI with {self._llm.type} LLM...")
-        self._df = data_frame.copy()
+        return self.run(data_frame, prompt, show_code, anonymize_df, use_error_correction_framework)
 
-        rows_to_display = 0 if self._enforce_privacy else 5
+    async def __acall__(
+        self,
+        data_frame: pd.DataFrame,
+        prompt: str,
+        show_code: bool = False,
+        anonymize_df: bool = True,
+        use_error_correction_framework: bool = True,
+    ) -> pd.DataFrame:
+        """Run the LLM with the given prompt, without blocking the event loop"""
+        return await self.arun(data_frame, prompt, show_code, anonymize_df, use_error_correction_framework)
 
-        df_head = data_frame.head(rows_to_display)
+    def run_chunked(
+        self,
+        source: str | os.PathLike | Iterable[pd.DataFrame],
+        prompt: str,
+        chunksize: int = 100_000,
+        show_code: bool = False,
+        anonymize_df: bool = True,
+        use_error_correction_framework: bool = True,
+        allow_full_load: bool = False,
+        return_context: bool = False,
+    ) -> pd.DataFrame | RunContext:
+        """
+        Run the LLM with the given prompt on data too big to fit in memory, chunk by chunk.
+
+        The code is generated (and corrected if needed) on the first chunk, then the
+        partial results of its aggregations are computed on each chunk and combined.
+        Only sums, counts, mins, maxs and means, possibly grouped, can be combined:
+        other code raises a NonDecomposableCodeError, unless `allow_full_load` is True,
+        in which case all the chunks are loaded in memory to run it.
+
+        Args:
+            source (str | os.PathLike | Iterable[pd.DataFrame]): The path of a csv or
+                parquet file, or an iterable of dataframes.
+            chunksize (int): The number of rows of the chunks read from a file.
+        """
+        if self._sql_mode:
+            raise ValueError("The SQL mode doesn't support running on chunks")
+
+        chunks = iter_chunks(source, chunksize)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            raise ValueError("The source doesn't have any chunk")
+
+        context = self._start_run(first_chunk, prompt)
+        context.total_rows = count_rows(source, chunksize)
+        try:
+            self._drive(self._run_steps(context, show_code, anonymize_df, use_error_correction_framework), context)
+            answer = self._run_chunks(context, itertools.chain([first_chunk], chunks), allow_full_load)
+        finally:
+            self._end_run(context)
+        self.log(f"Answer: {answer}")
+        return context if return_context else answer
+
+    def _run_chunks(self, context: RunContext, chunks: Iterator[pd.DataFrame], allow_full_load: bool):
+        """Run the code of the context on each chunk and combine the partial results"""
+
+        stats = context.stats
+        code = self._sanitize(context.code_run)
+        try:
+            plan = plan_chunked(code.tree)
+        except NonDecomposableCodeError as e:
+            if not allow_full_load:
+                raise
+            self.log(f"{e}. Loading all the chunks in memory to run it.")
+            context.data_frame = pd.concat(chunks, ignore_index=True)
+            with stats.time(STAGE_EXEC):
+                result = self._executor.execute(code, context.data_frame)
+            if result.error is not None:
+                raise result.error from e
+            context.answer = self._coerce(result.value)
+            return context.answer
+
+        partials = PartialAggregates(plan)
+        for chunk in chunks:
+            with stats.time(STAGE_EXEC):
+                result = self._executor.execute(plan.chunk_code, chunk)
+            stats.bytes_copied += result.bytes_copied
+            if result.error is not None:
+                raise result.error
+            partials.add(result.value, len(chunk))
+
+        self.log(f"Combined the partial results of {partials.rows} rows")
+        context.answer = self._coerce(plan.finalize(partials))
+        return context.answer
+
+    def _coerce(self, value):
+        """Convert the value to a dataframe, as the answers of the runs are, if the
+        results are coerced and it can be converted"""
+
+        if not self._coerce_result or isinstance(value, pd.DataFrame):
+            return value
+        data_frame = coerce_to_data_frame(value)
+        return value if data_frame is None else data_frame
+
+    def save_question(
+        self, question: str, anonymize_df: bool = True, fingerprint_mode: str = MODE_SAMPLE
+    ) -> SavedQuestion:
+        """
+        Save the question, to ask it again on new versions of a dataframe: the code is
+        generated once, and when rows are only appended to the dataframe, only the new
+        rows are computed if the code is decomposable. See `pandasai.saved_question`.
+        """
+        if self._sql_mode:
+            raise ValueError("The SQL mode doesn't support saved questions")
+        return SavedQuestion(self, question, anonymize_df, fingerprint_mode)
+
+    def run_many(
+        self,
+        data_frame: pd.DataFrame,
+        prompts: list[str],
+        anonymize_df: bool = True,
+        use_error_correction_framework: bool = True,
+        max_concurrency: int = 8,
+    ) -> list[RunContext]:
+        """
+        Run the LLM with each of the prompts on the same dataframe.
+
+        The head of the dataframe sent to the LLM is computed once for all the prompts,
+        and up to `max_concurrency` prompts are answered concurrently.
+
+        Returns:
+            list[RunContext]: The contexts of the runs, in the order of the prompts.
+                The `error` of a context is set if its run failed.
+        """
+        data_frame, head = self._prepare_batch(data_frame, anonymize_df)
+
+        def run(prompt: str) -> RunContext:
+            context = self._start_run(data_frame, prompt, copy=False)
+            try:
+                steps = self._run_steps(context, False, anonymize_df, use_error_correction_framework, head)
+                self._drive(steps, context)
+            except Exception as e:  # pylint: disable=W0718  # noqa: BLE001
+                context.error = e
+            finally:
+                self._end_run(context)
+            return context
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            return list(pool.map(run, prompts))
+
+    async def arun_many(
+        self,
+        data_frame: pd.DataFrame,
+        prompts: list[str],
+        anonymize_df: bool = True,
+        use_error_correction_framework: bool = True,
+        max_concurrency: int = 8,
+    ) -> list[RunContext]:
+        """
+        Run the LLM with each of the prompts on the same dataframe, without blocking
+        the event loop. See `run_many`.
+        """
+        data_frame, head = self._prepare_batch(data_frame, anonymize_df)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(prompt: str) -> RunContext:
+            async with semaphore:
+                context = self._start_run(data_frame, prompt, copy=False)
+                try:
+                    steps = self._run_steps(context, False, anonymize_df, use_error_correction_framework, head)
+                    await self._adrive(steps, context)
+                except Exception as e:  # pylint: disable=W0718  # noqa: BLE001
+                    context.error = e
+                finally:
+                    self._end_run(context)
+                return context
+
+        return list(await asyncio.gather(*(run(prompt) for prompt in prompts)))
+
+    def _prepare_batch(self, data_frame: pd.DataFrame, anonymize_df: bool) -> tuple[pd.DataFrame, tuple]:
+        """Copy the dataframe if needed and compute its head once for a batch of runs"""
+
+        if not self._zero_copy:
+            data_frame = data_frame.copy()
+        return data_frame, self._head(data_frame, anonymize_df)
+
+    def _head(self, data_frame: pd.DataFrame, anonymize_df: bool) -> tuple[pd.DataFrame, str]:
+        """Return the head of the dataframe sent to the LLM, and its csv"""
+
+        df_head = data_frame.head(0 if self._enforce_privacy else 5)
         if anonymize_df:
             df_head = anonymize_dataframe_head(df_head)
 
-        df_csv_head = df_head.to_csv(index=False)
-
-        code = self._llm.generate_code(
-            GeneratePythonCodePrompt(
-                prompt=prompt,
-                df_csv_head=df_csv_head,
-                num_rows=data_frame.shape[0],
-                num_columns=data_frame.shape[1],
-                rows_to_display=rows_to_display,
-            ),
-            prompt,
+        return df_head, df_head.to_csv(index=False)
+
+    def _start_run(self, data_frame: pd.DataFrame, prompt: str, copy: bool = True) -> RunContext:
+        """Create the context of a new run"""
+
+        self.log(f"Running PandasAI with {self._llm.type} LLM...")
+
+        # In zero-copy mode the generated code runs on copy-on-write views of the
+        # dataframe, so it never needs to be copied up front
+        context = RunContext(
+            data_frame=data_frame if self._zero_copy or not copy else data_frame.copy(),
+            question=prompt,
+            rows_to_display=0 if self._enforce_privacy else 5,
+        )
+        self._last_context = context
+        return context
+
+    def _end_run(self, context: RunContext) -> None:
+        context.stats.duration = time.perf_counter() - context.started_at
+        self.log(f"Run stats: {context.stats.to_dict()}")
+
+    def _run_steps(
+        self,
+        context: RunContext,
+        show_code: bool,
+        anonymize_df: bool,
+        use_error_correction_framework: bool,
+        head: tuple | None = None,
+        approximate: bool = False,
+        progressive: bool = False,
+    ):
+        """Steps of a run: generate the code, then run it, on a sample of the rows if
+        the run is approximate, or on growing samples of the rows if it's progressive.
+        The head of the dataframe is computed, unless it's given."""
+
+        run_code_steps = self._run_code_steps
+        if approximate:
+            run_code_steps = self._run_approximate_steps
+        elif progressive:
+            run_code_steps = self._run_progressive_steps
+
+        if self._match_intents:
+            code = match_intent(context.question, context.data_frame)
+            if code is not None:
+                self.log(f"Question answered without the LLM by: {code}")
+                context.code_generated = code
+                yield CodeGenerated(code, "match_intent")
+                return (yield from run_code_steps(code, use_error_correction_framework, context))
+
+        if head is None:
+            with context.stats.time(STAGE_HEAD):
+                head = self._head(context.data_frame, anonymize_df)
+        context.df_head, df_csv_head = head
+        if self._sql_mode:
+            return (yield from self._run_sql_steps(context, df_csv_head, use_error_correction_framework))
+
+        instruction = GeneratePythonCodePrompt(
+            prompt=context.question,
+            df_csv_head=df_csv_head,
+            num_rows=context.total_rows or context.data_frame.shape[0],
+            num_columns=context.data_frame.shape[1],
+            rows_to_display=context.rows_to_display,
         )
-        self._original_instructions = {
-            "question": prompt,
-            "df_head": df_head,
-            "num_rows": data_frame.shape[0],
-            "num_columns": data_frame.shape[1],
-            "rows_to_display": rows_to_display,
-        }
-        self.last_code_generated = code
+        yield PromptBuilt(instruction)
+
+        code = yield LLMCall(instruction, context.question, "generate_code")
+        context.code_generated = code
+        yield CodeGenerated(code, "generate_code")
         self.log(
             f"""
 Code generated:
@@ -96,83 +565,418 @@ Code generated:
         if show_code and self._in_notebook:
             self.notebook.create_new_cell(code)
 
-        answer = self.run_code(code, use_error_correction_framework=use_error_correction_framework)
-        self.code_output = answer
-        self.log(f"Answer: {answer}")
-        return answer
+        return (yield from run_code_steps(code, use_error_correction_framework, context))
 
-    def __call__(
-        self,
-        data_frame: pd.DataFrame,
-        prompt: str,
-        show_code: bool = False,
-        anonymize_df: bool = True,
-        use_error_correction_framework: bool = True,
-    ) -> pd.DataFrame:
-        """Run the LLM with the given prompt"""
-        return self.run(data_frame, prompt, show_code, anonymize_df, use_error_correction_framework)
+    def _drive(self, steps, context: RunContext):
+        """Run the steps synchronously and return the value returned by the steps"""
+
+        events = self._execute_steps(steps, context)
+        while True:
+            try:
+                next(events)
+            except StopIteration as stop:
+                return stop.value
+
+    def _execute_steps(self, steps, context: RunContext):
+        """Run the steps synchronously, yielding their events, and return the value
+        returned by the steps"""
+
+        value, error = None, None
+        while True:
+            try:
+                step = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+
+            value, error = None, None
+            if isinstance(step, RunEvent):
+                yield step
+                continue
+            try:
+                if isinstance(step, LLMCall):
+                    value = self._generate_code(step.instruction, step.value, context, step.purpose, step.language)
+                elif isinstance(step, SQLQuery):
+                    value = self._run_sql(step.query, context)
+                else:
+                    data_frame = context.data_frame if step.data_frame is None else step.data_frame
+                    with context.stats.time(step.stage):
+                        value = self._executor.execute(step.code, data_frame)
+            except Exception as e:  # pylint: disable=W0718  # noqa: BLE001
+                error = e
+
+    async def _adrive(self, steps, context: RunContext):
+        """Run the steps, awaiting them, and return the value returned by the steps"""
+
+        value, error = None, None
+        while True:
+            try:
+                step = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+
+            value, error = None, None
+            if isinstance(step, RunEvent):
+                continue
+            try:
+                if isinstance(step, LLMCall):
+                    value = await self._agenerate_code(
+                        step.instruction, step.value, context, step.purpose, step.language
+                    )
+                elif isinstance(step, SQLQuery):
+                    value = await asyncio.to_thread(self._run_sql, step.query, context)
+                else:
+                    data_frame = context.data_frame if step.data_frame is None else step.data_frame
+                    with context.stats.time(step.stage):
+                        value = await self._executor.aexecute(step.code, data_frame)
+            except Exception as e:  # pylint: disable=W0718  # noqa: BLE001
+                error = e
+
+    def _run_sql_steps(self, context: RunContext, df_csv_head: str, use_error_correction_framework: bool):
+        """Steps of a run in SQL mode: generate a SQL query, then run it, correcting it
+        with the LLM when it fails"""
+
+        stats = context.stats
+        table_schema = schema(context.data_frame)
+        instruction = GenerateSQLQueryPrompt(
+            prompt=context.question,
+            df_csv_head=df_csv_head,
+            schema=table_schema,
+            num_rows=context.data_frame.shape[0],
+            num_columns=context.data_frame.shape[1],
+            rows_to_display=context.rows_to_display,
+        )
+        yield PromptBuilt(instruction)
+
+        query = yield LLMCall(instruction, context.question, "generate_sql", "sql")
+        context.code_generated = query
+        yield CodeGenerated(query, "generate_sql")
+
+        count = 0
+        while count < self._max_retries:
+            self.log(
+                f"""
+Query running:
+```
+{query}
+```"""
+            )
+            context.code_run = query
+            try:
+                yield ExecutionStarted(query, count + 1)
+                answer = yield SQLQuery(query)
+            except Exception as e:  # pylint: disable=W0718  # noqa: BLE001
+                if not use_error_correction_framework:
+                    raise e  # noqa: TRY201
+
+                count += 1
+                yield RetryTriggered("error", e, count)
+                retry_started_at = time.perf_counter()
+                error_correcting_instruction = CorrectSQLErrorPrompt(
+                    code=query,
+                    error_returned=e,
+                    schema=table_schema,
+                    **context.instructions,
+                )
+                query = yield LLMCall(error_correcting_instruction, "", "correct_sql_error", "sql")
+                yield CodeGenerated(query, "correct_sql_error")
+                stats.retries.append(RetryStats("error", repr(e), time.perf_counter() - retry_started_at))
+                continue
+
+            context.answer = answer
+            return answer
+        raise MaxRetriesExceededError(f"Maximum number of retries exceeded ({self._max_retries}).")
 
     def remove_unsafe_imports(self, code: str) -> str:
         """Remove non-whitelisted imports from the code to prevent malicious code execution"""
 
-        tree = ast.parse(code)
-        new_body = [
-            node
-            for node in tree.body
-            if not (
-                isinstance(node, ast.Import | ast.ImportFrom)
-                and any(alias.name not in WHITELISTED_LIBRARIES for alias in node.names)
-            )
-        ]
-        new_tree = ast.Module(body=new_body)
-        return astor.to_source(new_tree).strip()
+        return CodeSanitizer(remove_plots=False).sanitize(code).source
 
     def remove_df_overwrites(self, code: str) -> str:
         """Remove df declarations from the code to prevent malicious code execution"""
 
-        tree = ast.parse(code)
-        new_body = [
-            node
-            for node in tree.body
-            if not (
-                isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name) and node.targets[0].id == "df"
-            )
-        ]
-        new_tree = ast.Module(body=new_body)
-        return astor.to_source(new_tree).strip()
+        sanitizer = CodeSanitizer(remove_unsafe_imports=False, remove_df_overwrites=True, remove_plots=False)
+        return sanitizer.sanitize(code).source
 
     def remove_plots(self, code: str) -> str:
         """Remove plots from the code"""
 
-        tree = ast.parse(code)
-        new_body = [
-            node
-            for node in tree.body
-            if not (
-                isinstance(node, ast.Expr)
-                and isinstance(node.value, ast.Call)
-                and isinstance(node.value.func, ast.Attribute)
-                and node.value.func.attr == "show"
-            )
-        ]
-        new_tree = ast.Module(body=new_body)
-        return astor.to_source(new_tree).strip()
+        return CodeSanitizer(remove_unsafe_imports=False).sanitize(code).source
+
+    def _generate_code(
+        self, instruction: Prompt, value: str, context: RunContext, purpose: str, language: str = "python"
+    ) -> str:
+        """Generate the code with the LLM, recording the latency and sizes of the call"""
+
+        with context.stats.time(STAGE_PROMPT):
+            prompt_size = len(str(instruction)) + len(value)
+
+        started_at = time.perf_counter()
+        if language == "sql":
+            code = self._llm.generate_sql(instruction, value)
+        else:
+            code = self._llm.generate_code(instruction, value)
+        self._record_llm_call(context, purpose, started_at, prompt_size, code)
+        return code
+
+    async def _agenerate_code(
+        self, instruction: Prompt, value: str, context: RunContext, purpose: str, language: str = "python"
+    ) -> str:
+        """Generate the code with the LLM asynchronously, recording the latency and sizes of the call"""
+
+        with context.stats.time(STAGE_PROMPT):
+            prompt_size = len(str(instruction)) + len(value)
+
+        started_at = time.perf_counter()
+        if language == "sql":
+            code = await self._llm.agenerate_sql(instruction, value)
+        else:
+            code = await self._llm.agenerate_code(instruction, value)
+        self._record_llm_call(context, purpose, started_at, prompt_size, code)
+        return code
+
+    def _record_llm_call(
+        self, context: RunContext, purpose: str, started_at: float, prompt_size: int, code: str
+    ) -> None:
+        """Record the latency and sizes of a call to the LLM"""
+
+        duration = time.perf_counter() - started_at
+        context.stats.add(STAGE_LLM, duration)
+        context.stats.llm_calls.append(LLMCallStats(purpose, duration, prompt_size, len(code)))
+
+    def _run_sql(self, query: str, context: RunContext) -> pd.DataFrame:
+        """Register the dataframe of the run in the SQL database, unless it already is, and run the query"""
+
+        with context.stats.time(STAGE_SQL_REGISTER):
+            table = self.sql_database.register(context.data_frame)
+        with context.stats.time(STAGE_EXEC):
+            return self.sql_database.query(query, table)
+
+    def _sanitize(self, code: str) -> SanitizedCode:
+        """
+        Sanitize the code in a single pass and compile it, unless it's already cached.
+        The sanitized code is then optimized, if enabled.
+        """
+
+        key = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        sanitized = self.code_cache.get(key)
+        if sanitized is None:
+            sanitized = CodeSanitizer(capture_result=True).sanitize(code)
+            if self._optimize_code:
+                sanitized = CodeOptimizer().optimize(sanitized)
+                if sanitized.optimizations:
+                    self.log(f"Code optimizations applied: {', '.join(sanitized.optimizations)}")
+            self.code_cache.set(key, sanitized)
+        return sanitized
 
     def clean_code(self, code: str) -> str:
         """Clean the code to prevent malicious code execution"""
 
-        # TODO: avoid iterating over the code twice # pylint: disable=W0511
-        code = self.remove_unsafe_imports(code)
-        code = self.remove_plots(code)
-        return code
+        return self._sanitize(code).source
+
+    def run_code(
+        self, code: str, use_error_correction_framework: bool = True, context: RunContext | None = None
+    ) -> pd.DataFrame:
+        """
+        Run the code in the context of a run and return the result.
 
-    def run_code(self, code: str, use_error_correction_framework: bool = True) -> pd.DataFrame:
-        # pylint: disable=W0122 disable=W0123 disable=W0702:bare-except
-        """Run the code in the current context and return the result"""
+        Without a context, the code runs against the dataframe of the last run.
+        """
 
-        # Get the code to run removing unsafe imports and df overwrites
-        code_to_run = self.clean_code(code)
-        self.last_run_code = code_to_run
+        context = context or self._continue_last_run(code)
+        return self._drive(self._run_code_steps(code, use_error_correction_framework, context), context)
+
+    async def arun_code(
+        self, code: str, use_error_correction_framework: bool = True, context: RunContext | None = None
+    ) -> pd.DataFrame:
+        """
+        Run the code in the context of a run and return the result, without blocking
+        the event loop.
+
+        Without a context, the code runs against the dataframe of the last run.
+        """
+
+        context = context or self._continue_last_run(code)
+        return await self._adrive(self._run_code_steps(code, use_error_correction_framework, context), context)
+
+    def run_code_iter(
+        self,
+        code: str,
+        use_error_correction_framework: bool = True,
+        context: RunContext | None = None,
+        fractions: tuple | None = None,
+    ) -> Iterator[RunEvent]:
+        """
+        Run the code progressively: on 1% of the rows, then on 10% of the rows, then
+        on all the rows, yielding a PreliminaryResult after each sample and the
+        FinalResult last. The answers on the samples are estimated as in the
+        approximate runs.
+
+        The run is cancelled by closing the iterator (e.g. breaking out of the loop)
+        between two results: the code doesn't run on more rows.
+
+        Without a context, the code runs against the dataframe of the last run.
+
+        Args:
+            fractions (tuple, optional): The shares of the rows of the samples, in
+                increasing order. Defaults to (0.01, 0.1).
+        """
+
+        context = context or self._continue_last_run(code)
+        answer = yield from self._execute_steps(
+            self._run_progressive_steps(code, use_error_correction_framework, context, fractions), context
+        )
+        yield FinalResult(answer, context)
+
+    def _continue_last_run(self, code: str) -> RunContext:
+        """Create a context running the code against the dataframe of the last run"""
+
+        if self._last_context is None:
+            raise ValueError("No dataframe to run the code against, call run first")
+        context = replace(
+            self._last_context,
+            code_generated=code,
+            code_run=None,
+            answer=None,
+            output="",
+            output_truncated_bytes=0,
+            approximate=False,
+            confidence_interval=None,
+            stats=RunStats(),
+            started_at=time.perf_counter(),
+        )
+        self._last_context = context
+        return context
+
+    def _projected_columns(self, code: SanitizedCode, context: RunContext) -> set | None:
+        """Return the columns used by the code, if enabled and they can be determined"""
+
+        if not self._column_projection:
+            return None
+        columns = referenced_columns(code.tree, context.data_frame.columns)
+        if columns is not None:
+            self.log(f"Columns used by the code: {sorted(map(str, columns))}")
+        return columns
+
+    def _should_dry_run(self, code: SanitizedCode, context: RunContext) -> bool:
+        """Return True if the code should run on a sample of the dataframe first"""
+
+        # plots drawn on the sample would be drawn on the same figure as the final ones
+        return self._dry_run and len(context.data_frame) > self._dry_run_rows and not uses_plots(code.code)
+
+    def _run_progressive_steps(
+        self, code: str, use_error_correction_framework: bool, context: RunContext, fractions: tuple | None = None
+    ):
+        """Steps running the code on growing samples of the rows, then on all the rows"""
+
+        rows_count, previous_rows = len(context.data_frame), 0
+        for fraction in fractions if fractions is not None else self._progressive_fractions:
+            rows = math.ceil(rows_count * fraction)
+            if rows >= rows_count:
+                break
+            if rows <= previous_rows:
+                continue
+            previous_rows = rows
+            answer = yield from self._run_approximate_steps(code, use_error_correction_framework, context, rows)
+            if not context.approximate:
+                # the code can't be estimated from a sample and ran on all the rows
+                return answer
+            # the code corrected on the sample isn't corrected again
+            code = context.code_run
+            self.log(f"Preliminary answer on {rows} rows")
+            yield PreliminaryResult(answer, rows, context.confidence_interval)
+
+        context.approximate, context.confidence_interval = False, None
+        return (yield from self._run_code_steps(code, use_error_correction_framework, context))
+
+    def _run_approximate_steps(
+        self, code: str, use_error_correction_framework: bool, context: RunContext, rows: int | None = None
+    ):
+        """Steps running the code on a sample of the rows (by default as many as set by
+        the approximation), then estimating its value on all the rows, with a confidence
+        interval. Code whose aggregations aren't decomposable runs on all the rows, since
+        what to scale in its answer isn't known."""
+
+        stats = context.stats
+        approximation = self.approximation
+        data_frame = context.data_frame
+        if self._approximation_plan(code) is None:
+            return (yield from self._run_code_steps(code, use_error_correction_framework, context))
+
+        with stats.time(STAGE_SAMPLE):
+            sample = sample_rows(
+                data_frame,
+                approximation.rows if rows is None else rows,
+                approximation.stratify_by,
+                approximation.random_state,
+            )
+        if len(sample) == len(data_frame):
+            return (yield from self._run_code_steps(code, use_error_correction_framework, context))
+
+        # the code is corrected, if needed, against the sample, but the prompts are
+        # about all the rows
+        total_rows = context.total_rows
+        context.data_frame, context.total_rows = sample, total_rows or len(data_frame)
+        try:
+            yield from self._run_code_steps(code, use_error_correction_framework, context)
+        finally:
+            context.data_frame, context.total_rows = data_frame, total_rows
+
+        plan = self._approximation_plan(context.code_run)
+        if plan is None:
+            # the code corrected on the sample isn't decomposable anymore
+            return (yield from self._run_code_steps(context.code_run, use_error_correction_framework, context))
+
+        blocks = split_blocks(sample, approximation.blocks)
+        values = []
+        for block in blocks:
+            result = yield Execution(plan.chunk_code, block)
+            stats.bytes_copied += result.bytes_copied
+            if result.error is not None:
+                raise result.error
+            values.append(result.value)
+
+        with stats.time(STAGE_BOOTSTRAP):
+            estimate = estimate_aggregates(
+                plan, values, [len(block) for block in blocks], len(data_frame), approximation
+            )
+        bounds = (estimate.lower, estimate.upper)
+        if self._coerce_result:
+            estimate.value = coerce_to_data_frame(estimate.value)
+            bounds = tuple(coerce_to_data_frame(bound) for bound in bounds)
+        if not isinstance(estimate.value, pd.DataFrame):
+            # the answer on the sample isn't scaled, it can't be returned instead
+            self.log(f"The estimate is a {type(estimate.value)}, not a dataframe, running the code on all the rows")
+            return (yield from self._run_code_steps(context.code_run, use_error_correction_framework, context))
+        self.log(f"Estimated the answer on {len(data_frame)} rows from a sample of {len(sample)} rows")
+
+        answer = estimate.value
+        answer.attrs["approximate"] = True
+        context.answer = answer
+        context.approximate = True
+        context.confidence_interval = None if estimate.lower is None else bounds
+        return answer
+
+    def _approximation_plan(self, code: str) -> ChunkedPlan | None:
+        """Return the plan estimating the answer of the code from a sample, or None if
+        the code isn't decomposable"""
+
+        try:
+            return plan_chunked(self._sanitize(code).tree)
+        except NonDecomposableCodeError as e:
+            self.log(f"{e}. Its answer can't be estimated from a sample, running it on all the rows.")
+            return None
+
+    def _run_code_steps(self, code: str, use_error_correction_framework: bool, context: RunContext):
+        # pylint: disable=W0702:bare-except
+        """Steps running the code, correcting it with the LLM when it fails"""
+
+        stats = context.stats
+
+        # Get the code to run removing unsafe imports and plots
+        with stats.time(STAGE_SANITIZE):
+            code_to_run = self._sanitize(code)
+        context.code_run = code_to_run.source
+        yield CodeSanitized(context.code_run)
         self.log(
             f"""
 Code running:
@@ -181,79 +985,124 @@ Code running:
 ```"""
         )
 
-        # Redirect standard output to a StringIO buffer
-        with redirect_stdout(io.StringIO()):
-            count = 0
-            while count < self._max_retries:
-                try:
-                    loc = {}
-                    data_frame = self._df.copy()
-                    exec(  # noqa: S102
-                        code_to_run,
-                        {
-                            "pd": pd,
-                            "df": data_frame,
-                            "plt": plt,
-                            "__builtins__": {**{builtin: __builtins__[builtin] for builtin in WHITELISTED_BUILTINS}},
-                        },
-                        loc,
-                    )
-                    code = code_to_run
-
-                    # Evaluate the last line and return its value or the captured output
-                    lines = code.strip().split("\n")
-                    last_line = lines[-1].strip()
-
-                    pattern = r"^print\((.*)\)$"
-                    if match := re.match(pattern, last_line):
-                        last_line = match[1]
-
-                    last_line_value = eval(  # noqa: S307, PGH001
-                        last_line,
-                        {
-                            "pd": pd,
-                            "df": self._df,
-                            "__builtins__": {**{builtin: __builtins__[builtin] for builtin in WHITELISTED_BUILTINS}},
-                        },
-                        loc,
-                    )
-                    if isinstance(last_line_value, pd.DataFrame):
-                        return last_line_value
-                    count += 1
-                    error_correcting_instruction = CorrectWrongTypePrompt(
-                        code=code,
-                        return_type=type(last_line_value),
-                        question=self._original_instructions["question"],
-                        df_head=self._original_instructions["df_head"],
-                        num_rows=self._original_instructions["num_rows"],
-                        num_columns=self._original_instructions["num_columns"],
-                        rows_to_display=self._original_instructions["rows_to_display"],
-                    )
-                    code_to_run = self.clean_code(self._llm.generate_code(error_correcting_instruction, ""))
-                    code_to_run = self.clean_code(code)
-                    self.last_run_code = code_to_run
-                    self.log(
-                        f"""
+        count = 0
+        fingerprints = {}
+        sample = None
+        repaired_sources = set()
+        while count < self._max_retries:
+            try:
+                columns = self._projected_columns(code_to_run, context)
+                cache_key = None
+                if self.result_cache is not None and not uses_plots(code_to_run.code):
+                    with stats.time(STAGE_RESULT_CACHE):
+                        key = None if columns is None else frozenset(columns)
+                        if key not in fingerprints:
+                            fingerprints[key] = self.result_cache.fingerprint(context.data_frame, columns)
+                        cache_key = self.result_cache.key(fingerprints[key], code_to_run.source)
+                        cached_result = self.result_cache.get(cache_key)
+                    if cached_result is not None:
+                        self.log("Result found in the cache")
+                        context.answer = cached_result
+                        return cached_result
+
+                error = None
+                if self._should_dry_run(code_to_run, context):
+                    sample = sample if sample is not None else stratified_sample(context.data_frame, self._dry_run_rows)
+                    sample_to_run = sample if columns is None else project_columns(sample, columns)
+                    result = yield Execution(code_to_run, sample_to_run, STAGE_DRY_RUN)
+                    stats.bytes_copied += result.bytes_copied
+                    if result.error is not None and is_sample_independent_error(result.error, context.data_frame):
+                        self.log(f"Dry run failed: {result.error}")
+                        error = result.error
+
+                if error is None:
+                    yield ExecutionStarted(code_to_run.source, count + 1)
+                    data_frame = None if columns is None else project_columns(context.data_frame, columns)
+                    result = yield Execution(code_to_run, data_frame)
+                    context.output, context.output_truncated_bytes = result.output, result.output_truncated_bytes
+                    stats.bytes_copied += result.bytes_copied
+                    self.log(f"Bytes copied: {stats.bytes_copied}")
+                    error = result.error
+
+                if error is not None and code_to_run.original is not None:
+                    # the optimized code isn't always equivalent, fall back to the original code
+                    self.log(f"Optimized code failed ({error}), running the original code")
+                    code_to_run = code_to_run.original
+                    context.code_run = code_to_run.source
+                    continue
+                if error is not None:
+                    raise error
+
+                code = code_to_run.source
+
+                # The value of the last expression has been captured while running the code
+                last_line_value = result.value
+                answer = last_line_value
+                if self._coerce_result and not isinstance(last_line_value, pd.DataFrame):
+                    answer = coerce_to_data_frame(last_line_value)
+                    if answer is not None:
+                        self.log(f"Result of type {type(last_line_value)} converted to a dataframe")
+                if isinstance(answer, pd.DataFrame):
+                    if cache_key is not None:
+                        self.result_cache.set(cache_key, answer)
+                    context.answer = answer
+                    return answer
+                count += 1
+                yield RetryTriggered("wrong_type", type(last_line_value), count)
+                retry_started_at = time.perf_counter()
+                error_correcting_instruction = CorrectWrongTypePrompt(
+                    code=code,
+                    return_type=type(last_line_value),
+                    **context.instructions,
+                )
+                new_code = yield LLMCall(error_correcting_instruction, "", "correct_wrong_type")
+                yield CodeGenerated(new_code, "correct_wrong_type")
+                with stats.time(STAGE_SANITIZE):
+                    code_to_run = self._sanitize(new_code)
+                context.code_run = code_to_run.source
+                yield CodeSanitized(context.code_run)
+                stats.retries.append(
+                    RetryStats("wrong_type", str(type(last_line_value)), time.perf_counter() - retry_started_at)
+                )
+                self.log(
+                    f"""
                              Code running:
                              ```
                              {code_to_run}
                              ```"""
-                    )
-                except Exception as e:  # pylint: disable=W0718 disable=C0103  # noqa: BLE001
-                    if not use_error_correction_framework:
-                        raise e  # noqa: TRY201
-
-                    count += 1
-                    error_correcting_instruction = CorrectErrorPrompt(
-                        code=code,
-                        error_returned=e,
-                        question=self._original_instructions["question"],
-                        df_head=self._original_instructions["df_head"],
-                        num_rows=self._original_instructions["num_rows"],
-                        num_columns=self._original_instructions["num_columns"],
-                        rows_to_display=self._original_instructions["rows_to_display"],
-                    )
-                    code_to_run = self._llm.generate_code(error_correcting_instruction, "")
+                )
+            except Exception as e:  # pylint: disable=W0718 disable=C0103  # noqa: BLE001
+                if not use_error_correction_framework:
+                    raise e  # noqa: TRY201
+
+                repairer, repaired_code = CodeRepairer(self._code_repairs), None
+                if self._repair_code and len(stats.repairs) < self._max_retries:
+                    with stats.time(STAGE_REPAIR):
+                        repaired_code = repairer.repair(code_to_run, e, context.data_frame)
+                if repaired_code is not None and repaired_code.source not in repaired_sources:
+                    self.log(f"Code repaired locally ({', '.join(repairer.repairs)}) after {e!r}")
+                    repaired_sources.add(repaired_code.source)
+                    stats.repairs.extend(repairer.repairs)
+                    code_to_run = repaired_code
+                    code = context.code_run = code_to_run.source
+                    yield CodeSanitized(context.code_run)
+                    continue
+
+                count += 1
+                yield RetryTriggered("error", e, count)
+                retry_started_at = time.perf_counter()
+                error_correcting_instruction = CorrectErrorPrompt(
+                    code=code,
+                    error_returned=e,
+                    **context.instructions,
+                )
+                new_code = yield LLMCall(error_correcting_instruction, "", "correct_error")
+                yield CodeGenerated(new_code, "correct_error")
+                with stats.time(STAGE_SANITIZE):
+                    code_to_run = self._sanitize(new_code)
+                context.code_run = code_to_run.source
+                yield CodeSanitized(context.code_run)
+                stats.retries.append(RetryStats("error", repr(e), time.perf_counter() - retry_started_at))
         raise MaxRetriesExceededError(f"Maximum number of retries exceeded ({self._max_retries}).")
 
     def log(self, message: str):
@@ -0,0 +1,129 @@
+"""
+Events of a PandasAI run
+
+`PandasAI.run_iter` yields these events as the stages of the run complete, so that
+interactive front-ends can show the generated code as soon as it exists, then the
+progress of its execution and its retries, and finally the result.
+
+Example:
+
+    ```
+    for event in pandas_ai.run_iter(df, "Which are the 5 happiest countries?"):
+        if isinstance(event, CodeGenerated):
+            print(event.code)
+        elif isinstance(event, FinalResult):
+            print(event.answer)
+    ```
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from .helpers.run_context import RunContext
+from .prompts.base import Prompt
+
+
+class RunEvent:
+    """Base class of the events of a run"""
+
+
+@dataclass
+class PromptBuilt(RunEvent):
+    """
+    The prompt asking the LLM to generate the code has been built.
+
+    Args:
+        prompt (Prompt): The prompt.
+    """
+
+    prompt: Prompt
+
+
+@dataclass
+class CodeGenerated(RunEvent):
+    """
+    The LLM has generated code.
+
+    Args:
+        code (str): The generated code.
+        purpose (str): Why the code has been generated, e.g. "generate_code" or "correct_error",
+            or "match_intent" if it has been generated without the LLM.
+    """
+
+    code: str
+    purpose: str
+
+
+@dataclass
+class CodeSanitized(RunEvent):
+    """
+    The code to run has been sanitized.
+
+    Args:
+        code (str): The sanitized code.
+    """
+
+    code: str
+
+
+@dataclass
+class ExecutionStarted(RunEvent):
+    """
+    The sanitized code has started running.
+
+    Args:
+        code (str): The sanitized code.
+        attempt (int): The number of the attempt, starting from 1.
+    """
+
+    code: str
+    attempt: int
+
+
+@dataclass
+class RetryTriggered(RunEvent):
+    """
+    The code has failed, and the LLM is asked to correct it.
+
+    Args:
+        reason (str): Why the code is retried, "error" or "wrong_type".
+        error (Any): The error raised by the code, or the wrong type it returned.
+        attempt (int): The number of the attempt that failed, starting from 1.
+    """
+
+    reason: str
+    error: Any
+    attempt: int
+
+
+@dataclass
+class PreliminaryResult(RunEvent):
+    """
+    The code has run on a sample of the rows, in a progressive run. The run can be
+    cancelled by closing the iterator before the code runs on more rows.
+
+    Args:
+        answer (Any): The answer estimated on the sample, see `pandasai.helpers.approximate`.
+        rows (int): The number of rows of the sample.
+        confidence_interval (tuple, optional): The lower and upper bounds of the
+            confidence interval of the answer, when they could be estimated.
+    """
+
+    answer: Any
+    rows: int
+    confidence_interval: tuple | None = None
+
+
+@dataclass
+class FinalResult(RunEvent):
+    """
+    The run has completed.
+
+    Args:
+        answer (Any): The answer of the run.
+        context (RunContext): The context of the run.
+    """
+
+    answer: Any
+    context: RunContext
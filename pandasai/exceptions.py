@@ -3,6 +3,7 @@
 This module contains the implementation of Custom Exceptions.
 
 """
+from typing import Optional
 
 
 class APIKeyNotFoundError(Exception):
@@ -74,3 +75,42 @@ class MaxRetriesExceededError(Exception):
     """
     Raised when exceeding maximum number of retries.
     """
+
+
+class ExecutionLimitExceededError(Exception):
+    """
+    Raised when the execution of the generated code exceeds one of its limits.
+
+    Args:
+        Exception (Exception): ExecutionLimitExceededError
+    """
+
+    def __init__(self, limit: str, max_value: float, value: Optional[float] = None):
+        """
+        __init__ method of ExecutionLimitExceededError Class
+
+        Args:
+            limit (str): Name of the exceeded limit.
+            max_value (float): Value of the exceeded limit.
+            value (float, optional): Value reached by the execution, if known.
+        """
+        self.limit = limit
+        self.max_value = max_value
+        self.value = value
+        message = f"The execution of the code exceeded the limit {limit}={max_value}"
+        if value is not None:
+            message += f" (reached {value})"
+        super().__init__(f"{message}. Write a more efficient code.")
+
+    def __reduce__(self):
+        return self.__class__, (self.limit, self.max_value, self.value)
+
+
+class NonDecomposableCodeError(Exception):
+    """
+    Raised when the generated code can't be run chunk by chunk, because the
+    aggregations it computes can't be combined from partial results.
+
+    Args:
+        Exception (Exception): NonDecomposableCodeError
+    """
@@ -0,0 +1,177 @@
+"""
+Base Executor class
+
+Executors run the sanitized code generated by the LLM against a dataframe and
+return the value of its last expression.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from dataclasses import dataclass
+from types import CodeType
+from typing import Any
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from pandasai.constants import WHITELISTED_BUILTINS
+from pandasai.exceptions import MethodNotImplementedError
+from pandasai.helpers.code_sanitizer import RESULT_VARIABLE
+from pandasai.helpers.copy_on_write import bytes_copied, copy_on_write, detach_result, zero_copy_view
+from pandasai.helpers.stdout_capture import capture_stdout
+
+from .limits import ExecutionLimits, Watchdog, check_result_size
+
+# pyplot keeps the current figure in a global state, so the codes plotting charts
+# run one at a time, while the other ones run concurrently
+_PLOT_LOCK = threading.Lock()
+_PLOT_NAMES = frozenset({"plt", "plot", "hist", "boxplot"})
+
+
+@dataclass
+class ExecutionResult:
+    """
+    Result of the execution of the generated code.
+
+    Args:
+        value (Any): The value of the last expression of the code.
+        bytes_copied (int): The bytes of the dataframe copied to run the code.
+        error (Exception, optional): The error raised by the code, if any.
+        output (str): What the code printed, truncated to the limits of the execution.
+        output_truncated_bytes (int): The bytes of the output that were truncated.
+    """
+
+    value: Any = None
+    bytes_copied: int = 0
+    error: Exception | None = None
+    output: str = ""
+    output_truncated_bytes: int = 0
+
+
+def get_environment(data_frame: pd.DataFrame) -> dict:
+    """
+    Return the globals the generated code runs with.
+
+    Args:
+        data_frame (pd.DataFrame): The dataframe available to the code as `df`.
+
+    Returns (dict): The globals of the generated code.
+    """
+
+    return {
+        "pd": pd,
+        "df": data_frame,
+        "plt": plt,
+        "__builtins__": {builtin: __builtins__[builtin] for builtin in WHITELISTED_BUILTINS},
+    }
+
+
+def uses_plots(code: CodeType) -> bool:
+    """
+    Return True if the compiled code may plot a chart.
+
+    Args:
+        code (CodeType): The compiled code.
+
+    Returns (bool): True if the code, or a function it defines, uses a plotting name.
+    """
+
+    return not _PLOT_NAMES.isdisjoint(code.co_names) or any(
+        isinstance(const, CodeType) and uses_plots(const) for const in code.co_consts
+    )
+
+
+def run_in_process(
+    code,
+    data_frame: pd.DataFrame,
+    zero_copy: bool = True,
+    limits: ExecutionLimits | None = None,
+    variables: dict | None = None,
+) -> ExecutionResult:
+    """
+    Run the compiled code against the dataframe in the current process.
+
+    In zero-copy mode, the code runs on a copy-on-write view of the dataframe,
+    otherwise on a deep copy of it. The dataframe itself is never modified.
+
+    Args:
+        code (CodeType): The compiled code, capturing the value of its last expression.
+        data_frame (pd.DataFrame): The dataframe to run the code against.
+        zero_copy (bool): Run the code on a copy-on-write view of the dataframe.
+        limits (ExecutionLimits, optional): The limits of the execution.
+        variables (dict, optional): Additional globals available to the code.
+
+    Returns (ExecutionResult): The result of the execution.
+    """
+
+    limits = limits or ExecutionLimits()
+
+    # pylint: disable=W0122 disable=W0718
+    with capture_stdout(limits.max_output_size) as output, copy_on_write():
+        working_df = zero_copy_view(data_frame) if zero_copy else data_frame.copy()
+        result = ExecutionResult()
+        try:
+            loc = {}
+            with _PLOT_LOCK if uses_plots(code) else nullcontext(), Watchdog(limits):
+                exec(code, {**get_environment(working_df), **(variables or {})}, loc)  # noqa: S102
+            result.value = detach_result(loc.get(RESULT_VARIABLE), data_frame)
+            check_result_size(result.value, limits)
+        except Exception as e:  # noqa: BLE001
+            result.value = None
+            result.error = e
+
+        if zero_copy:
+            result.bytes_copied = bytes_copied(data_frame, working_df)
+        else:
+            result.bytes_copied = int(data_frame.memory_usage().sum())
+    result.output = output.getvalue()
+    result.output_truncated_bytes = output.truncated_bytes
+    return result
+
+
+class Executor(ABC):
+    """Base Executor class"""
+
+    limits: ExecutionLimits = ExecutionLimits()
+
+    @abstractmethod
+    def execute(self, code, data_frame: pd.DataFrame) -> ExecutionResult:
+        """
+        Run the sanitized code against the dataframe.
+
+        Errors raised by the code are returned in the result, not raised.
+
+        Args:
+            code (SanitizedCode): The sanitized code to run.
+            data_frame (pd.DataFrame): The dataframe to run the code against.
+
+        Returns (ExecutionResult): The result of the execution.
+        """
+        raise MethodNotImplementedError("Execute method has not been implemented")
+
+    async def aexecute(self, code, data_frame: pd.DataFrame) -> ExecutionResult:
+        """
+        Run the sanitized code against the dataframe without blocking the event loop.
+
+        By default, `execute` runs in a thread of the default executor of the loop.
+
+        Args:
+            code (SanitizedCode): The sanitized code to run.
+            data_frame (pd.DataFrame): The dataframe to run the code against.
+
+        Returns (ExecutionResult): The result of the execution.
+        """
+        return await asyncio.to_thread(self.execute, code, data_frame)
+
+    def close(self) -> None:  # noqa: B027
+        """Release the resources held by the executor"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,190 @@
+"""
+Limits of the execution of the generated code.
+
+A single bad generated program (e.g. a cartesian merge or a Python loop over
+millions of rows) can block its worker for minutes. Executors enforce the wall
+time, the memory growth and the result size of each execution, cancelling it with
+an `ExecutionLimitExceededError` when a limit is exceeded.
+
+Code running in the current process can only be cancelled between two Python
+instructions: a single long call to a C extension (e.g. a huge merge) is only
+interrupted once it returns. Use the `ProcessExecutor` to kill such executions.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+
+from pandasai.exceptions import ExecutionLimitExceededError
+
+# Interval, in seconds, between two checks of the limits of a running execution
+CHECK_INTERVAL = 0.02
+
+
+@dataclass(frozen=True)
+class ExecutionLimits:
+    """
+    Limits of each execution of the generated code. A limit set to None is not enforced.
+    The limits are immutable, as they are shared by the executors.
+
+    Args:
+        max_wall_time (float, optional): Maximum duration of the execution, in seconds.
+        max_memory (int, optional): Maximum growth of the resident memory (RSS) of
+            the process running the code during the execution, in bytes.
+        max_result_size (int, optional): Maximum size of the value returned by the
+            code, in bytes.
+        max_output_size (int, optional): Maximum number of characters of the output
+            printed by the code that are kept, from its head and its tail. 0 discards
+            the output without capturing it. Defaults to 64 KiB.
+    """
+
+    max_wall_time: float | None = None
+    max_memory: int | None = None
+    max_result_size: int | None = None
+    max_output_size: int | None = 64 * 1024
+
+    @property
+    def watched(self) -> bool:
+        """Return True if the limits must be checked while the code is running"""
+        return self.max_wall_time is not None or self.max_memory is not None
+
+
+def rss(pid: int | None = None) -> int | None:
+    """
+    Return the resident memory of a process.
+
+    Args:
+        pid (int, optional): Id of the process. Defaults to the current process.
+
+    Returns (int): The resident memory in bytes, or None if it can't be read.
+    """
+
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", encoding="utf-8") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def result_size(value: Any) -> int:
+    """
+    Return the size of the value returned by the generated code.
+
+    Args:
+        value (Any): The value returned by the code.
+
+    Returns (int): The size of the value in bytes.
+    """
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    return sys.getsizeof(value)
+
+
+def check_result_size(value: Any, limits: ExecutionLimits) -> None:
+    """
+    Raise an ExecutionLimitExceededError if the value exceeds the maximum result size.
+
+    Args:
+        value (Any): The value returned by the code.
+        limits (ExecutionLimits): The limits of the execution.
+    """
+
+    if limits.max_result_size is not None:
+        size = result_size(value)
+        if size > limits.max_result_size:
+            raise ExecutionLimitExceededError("max_result_size", limits.max_result_size, size)
+
+
+class _Interrupt(BaseException):
+    """Raised asynchronously in the thread running the code to cancel it"""
+
+
+class Watchdog:
+    """
+    Check the wall time and memory limits of the code running in the current thread,
+    from a background thread, and cancel it when one of them is exceeded.
+
+    Example:
+
+        ```
+        with Watchdog(limits):
+            exec(code)
+        ```
+
+    Args:
+        limits (ExecutionLimits): The limits of the execution.
+    """
+
+    def __init__(self, limits: ExecutionLimits):
+        self._limits = limits
+        self._thread_id = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._running = False
+        self.error: ExecutionLimitExceededError | None = None
+
+    def _check(self, started_at: float, initial_rss: int | None) -> ExecutionLimitExceededError | None:
+        elapsed = time.monotonic() - started_at
+        if self._limits.max_wall_time is not None and elapsed > self._limits.max_wall_time:
+            return ExecutionLimitExceededError("max_wall_time", self._limits.max_wall_time, round(elapsed, 3))
+
+        if self._limits.max_memory is not None and initial_rss is not None:
+            growth = (rss() or initial_rss) - initial_rss
+            if growth > self._limits.max_memory:
+                return ExecutionLimitExceededError("max_memory", self._limits.max_memory, growth)
+        return None
+
+    def _watch(self) -> None:
+        started_at = time.monotonic()
+        initial_rss = rss() if self._limits.max_memory is not None else None
+        while not self._stopped.wait(CHECK_INTERVAL):
+            error = self._check(started_at, initial_rss)
+            if error is None:
+                continue
+            with self._lock:
+                if self._running:
+                    self.error = error
+                    ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                        ctypes.c_ulong(self._thread_id), ctypes.py_object(_Interrupt)
+                    )
+            return
+
+    def _stop(self) -> None:
+        with self._lock:
+            self._running = False
+        self._stopped.set()
+        self._watcher.join()
+        if self.error is not None:
+            # clear the interruption if it has not been raised yet
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(self._thread_id), None)
+
+    def __enter__(self):
+        if not self._limits.watched:
+            return self
+        self._thread_id = threading.get_ident()
+        self._running = True
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._thread_id is None:
+            return False
+        try:
+            self._stop()
+        except _Interrupt:
+            self._stop()
+        if self.error is not None:
+            raise self.error from None
+        return False
@@ -0,0 +1,32 @@
+"""
+Local Executor class
+
+Executor running the generated code in the current process and thread.
+"""
+
+from __future__ import annotations
+
+import pandas as pd
+
+from pandasai.executors.base import ExecutionResult, Executor, run_in_process
+from pandasai.executors.limits import ExecutionLimits
+
+
+class LocalExecutor(Executor):
+    """
+    Local Executor class
+
+    Args:
+        zero_copy (bool): Run the code on copy-on-write views of the dataframe instead
+            of deep copies of it. Defaults to True.
+        limits (ExecutionLimits, optional): Limits of each execution. Wall time and
+            memory limits can't interrupt a single long call to a C extension.
+    """
+
+    def __init__(self, zero_copy: bool = True, limits: ExecutionLimits | None = None):
+        self._zero_copy = zero_copy
+        if limits is not None:
+            self.limits = limits
+
+    def execute(self, code, data_frame: pd.DataFrame) -> ExecutionResult:
+        return run_in_process(code.code, data_frame, zero_copy=self._zero_copy, limits=self.limits)
@@ -0,0 +1,414 @@
+"""
+Process Executor class
+
+Executor running the generated code in a pool of long-lived worker processes, so
+that heavy queries run in parallel on multiple cores and don't hold the GIL of
+the calling process.
+
+Dataframes are shared with the workers through shared memory: a dataframe is
+pickled once with out-of-band buffers (pickle protocol 5), its buffers are written
+to a shared memory segment, and each worker maps them without copying them. Only
+the name of the segment and the compiled code are sent to the workers for each
+execution. The shared dataframes are found again by their fingerprint, so a
+dataframe modified since it was shared is shared again. Dataframes smaller than
+`frame_shm_threshold` (e.g. the samples of the dry runs) are sent through the pipe
+instead. Results larger than `result_shm_threshold` come back through shared memory.
+
+The wall time and memory limits of the executions are enforced by killing the
+worker running the code, and replacing it with a new one, so that even long calls
+to C extensions (e.g. a cartesian merge) are cancelled.
+
+Example:
+
+    ```
+    from pandasai import PandasAI
+    from pandasai.executors.process import ProcessExecutor
+
+    with ProcessExecutor(max_workers=4) as executor:
+        pandas_ai = PandasAI(llm, executor=executor)
+        pandas_ai(df, "Which are the 5 happiest countries?")
+    ```
+"""
+
+from __future__ import annotations
+
+import marshal
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import pandas as pd
+
+from pandasai.exceptions import ExecutionLimitExceededError
+from pandasai.executors.base import ExecutionResult, Executor, run_in_process
+from pandasai.executors.limits import CHECK_INTERVAL, ExecutionLimits, rss
+from pandasai.helpers.fingerprint import MODE_FULL, Fingerprinter
+
+# Delay, in seconds, given to a worker to cancel an execution exceeding its wall time
+# limit by itself, before it's killed
+HARD_KILL_GRACE = 1.0
+
+
+@dataclass
+class _SharedPayload:
+    """Description of an object pickled into a shared memory segment"""
+
+    shm_name: str
+    data: bytes
+    buffer_sizes: list
+
+
+class _FrameUnavailableError(RuntimeError):
+    """The shared memory segment of a dataframe was released before a worker attached it"""
+
+
+def _pickle(obj) -> tuple[bytes, list]:
+    """Pickle the object, returning its out-of-band buffers separately"""
+
+    buffers = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    return data, [buffer.raw() for buffer in buffers]
+
+
+def _share(obj) -> tuple[SharedMemory, _SharedPayload]:
+    """Pickle the object, writing its out-of-band buffers to a shared memory segment"""
+
+    return _share_pickled(*_pickle(obj))
+
+
+def _share_pickled(data: bytes, raw_buffers: list) -> tuple[SharedMemory, _SharedPayload]:
+    """Write the out-of-band buffers of a pickled object to a shared memory segment"""
+
+    sizes = [raw.nbytes for raw in raw_buffers]
+
+    shm = SharedMemory(create=True, size=max(sum(sizes), 1))
+    offset = 0
+    for raw, size in zip(raw_buffers, sizes):
+        shm.buf[offset : offset + size] = raw
+        offset += size
+    return shm, _SharedPayload(shm.name, data, sizes)
+
+
+def _load(payload: _SharedPayload, shm: SharedMemory, copy: bool = False):
+    """Unpickle an object whose out-of-band buffers are in the shared memory segment"""
+
+    buffers = []
+    offset = 0
+    for size in payload.buffer_sizes:
+        buffer = shm.buf[offset : offset + size]
+        buffers.append(bytearray(buffer) if copy else buffer)
+        offset += size
+    return pickle.loads(payload.data, buffers=buffers)  # noqa: S301
+
+
+def _release(shm: SharedMemory, unlink: bool = False) -> None:
+    """Close the shared memory segment, if no object uses its memory anymore"""
+
+    try:
+        shm.close()
+    except BufferError:
+        # some objects still use the memory, it's released when the process exits
+        return
+    if unlink:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _worker_main(connection, max_attached_frames: int, result_shm_threshold: int) -> None:
+    """Main loop of the worker processes"""
+
+    # shared memory segments attached by the worker, with the dataframes they hold
+    attached = OrderedDict()
+
+    def detach(entry: list) -> None:
+        # the dataframe must be deleted before closing the memory it uses
+        entry[1] = None
+        _release(entry[0])
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+
+        payload, code, zero_copy, limits = message
+        if isinstance(payload, _SharedPayload):
+            if payload.shm_name not in attached:
+                try:
+                    shm = SharedMemory(name=payload.shm_name)
+                except FileNotFoundError:
+                    # released by the calling process while the message was sent
+                    error = _FrameUnavailableError(f"The shared dataframe {payload.shm_name} is no longer available")
+                    connection.send((ExecutionResult(error=error), None))
+                    continue
+                attached[payload.shm_name] = [shm, _load(payload, shm)]
+                while len(attached) > max_attached_frames:
+                    detach(attached.popitem(last=False)[1])
+            attached.move_to_end(payload.shm_name)
+            data_frame = attached[payload.shm_name][1]
+        else:
+            # small dataframes are sent through the pipe
+            data_frame = payload
+        result = run_in_process(marshal.loads(code), data_frame, zero_copy=zero_copy, limits=limits)  # noqa: S302
+        del data_frame
+        connection.send(_pack_result(result, result_shm_threshold))
+        del result
+
+    for entry in attached.values():
+        detach(entry)
+
+
+def _pack_result(result: ExecutionResult, result_shm_threshold: int):
+    """Prepare the result to be sent back to the calling process"""
+
+    if result.error is not None:
+        try:
+            pickle.loads(pickle.dumps(result.error))  # noqa: S301
+        except Exception:  # noqa: BLE001 pylint: disable=W0718
+            result.error = RuntimeError(repr(result.error))
+
+    data, raw_buffers = _pickle(result.value)
+    result.value = None
+    if sum(raw.nbytes for raw in raw_buffers) < result_shm_threshold:
+        return result, (data, [bytearray(raw) for raw in raw_buffers])
+
+    shm, payload = _share_pickled(data, raw_buffers)
+    shm.close()
+    return result, payload
+
+
+class _Worker:
+    """A worker process and the connection to it"""
+
+    def __init__(self, context, max_attached_frames: int, result_shm_threshold: int):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_connection, max_attached_frames, result_shm_threshold),
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+
+    def run(self, message, limits: ExecutionLimits):
+        """
+        Send the message to the worker and wait for its reply, killing the worker if the
+        execution exceeds its wall time or memory limits.
+        """
+
+        initial_rss = rss(self.process.pid) if limits.max_memory is not None else None
+        started_at = time.monotonic()
+        try:
+            self.connection.send(message)
+        except OSError as e:
+            raise RuntimeError("The worker process running the code exited unexpectedly") from e
+
+        while not self.connection.poll(CHECK_INTERVAL if limits.watched else None):
+            if not self.process.is_alive():
+                raise RuntimeError("The worker process running the code exited unexpectedly")
+
+            elapsed = time.monotonic() - started_at
+            if limits.max_wall_time is not None and elapsed > limits.max_wall_time + HARD_KILL_GRACE:
+                raise ExecutionLimitExceededError("max_wall_time", limits.max_wall_time, round(elapsed, 3))
+
+            if initial_rss is not None:
+                growth = (rss(self.process.pid) or initial_rss) - initial_rss
+                if growth > limits.max_memory:
+                    raise ExecutionLimitExceededError("max_memory", limits.max_memory, growth)
+
+        try:
+            return self.connection.recv()
+        except (EOFError, OSError) as e:
+            raise RuntimeError("The worker process running the code exited unexpectedly") from e
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.connection.close()
+
+
+class ProcessExecutor(Executor):
+    """
+    Process Executor class
+
+    Args:
+        max_workers (int, optional): Number of worker processes. Defaults to the
+            number of CPUs.
+        zero_copy (bool): Run the code on copy-on-write views of the dataframe instead
+            of deep copies of it. Defaults to True.
+        max_shared_frames (int): Maximum number of dataframes kept in shared memory.
+            Defaults to 4.
+        frame_shm_threshold (int): Size in bytes of the columns of the dataframes
+            above which they are sent to the workers through shared memory, and kept
+            there, instead of the pipe. Defaults to 1 MB.
+        result_shm_threshold (int): Size in bytes above which the results are sent
+            back through shared memory instead of the pipe to the worker. Defaults
+            to 1 MB.
+        mp_context (str, optional): The multiprocessing start method of the workers.
+            Defaults to the platform default.
+        limits (ExecutionLimits, optional): Limits of each execution. A worker exceeding
+            them is killed and replaced.
+        fingerprint_mode (str): How the dataframes are fingerprinted to find them in
+            shared memory, see `pandasai.helpers.fingerprint`. Defaults to "full", so
+            that any change of a dataframe is detected. "incremental" only hashes the
+            columns replaced since the last execution, but doesn't detect the writes
+            in place outside of the sampled rows of a column.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        zero_copy: bool = True,
+        max_shared_frames: int = 4,
+        result_shm_threshold: int = 1024 * 1024,
+        mp_context: str | None = None,
+        limits: ExecutionLimits | None = None,
+        frame_shm_threshold: int = 1024 * 1024,
+        fingerprint_mode: str = MODE_FULL,
+    ):
+        self._zero_copy = zero_copy
+        self._frame_shm_threshold = frame_shm_threshold
+        self._fingerprinter = Fingerprinter(fingerprint_mode)
+        self._result_shm_threshold = result_shm_threshold
+        if limits is not None:
+            self.limits = limits
+        self._max_shared_frames = max_shared_frames
+        self._context = multiprocessing.get_context(mp_context)
+        # the workers must share the resource tracker of this process, otherwise they
+        # would unlink the shared memory segments they've attached when exiting
+        resource_tracker.ensure_running()
+        self._workers = [
+            _Worker(self._context, max_shared_frames, result_shm_threshold)
+            for _ in range(max_workers or multiprocessing.cpu_count())
+        ]
+        self._idle_workers = queue.SimpleQueue()
+        for worker in self._workers:
+            self._idle_workers.put(worker)
+
+        # dataframes shared with the workers, by fingerprint
+        self._shared_frames = OrderedDict()
+        self._lock = threading.RLock()
+        self._closed = False
+
+    def _share_frame(self, data_frame: pd.DataFrame) -> _SharedPayload | pd.DataFrame:
+        """Return the payload of the dataframe in shared memory, sharing it if needed,
+        or the dataframe itself if it's small enough to be sent through the pipe"""
+
+        if data_frame.memory_usage(index=True).sum() < self._frame_shm_threshold:
+            return data_frame
+
+        key = self._fingerprinter.fingerprint(data_frame)
+        with self._lock:
+            if key in self._shared_frames:
+                self._shared_frames.move_to_end(key)
+                return self._shared_frames[key][1]
+
+        # pickling the dataframe doesn't hold the lock, so other executions aren't blocked
+        shm, payload = _share(data_frame)
+        with self._lock:
+            if key in self._shared_frames:
+                # shared by another execution meanwhile
+                _release(shm, unlink=True)
+                self._shared_frames.move_to_end(key)
+                return self._shared_frames[key][1]
+
+            # release the shared memory as soon as the dataframe is garbage collected
+            finalizer = weakref.finalize(data_frame, self._unshare_frame, key, shm)
+            self._shared_frames[key] = (shm, payload, finalizer)
+            while len(self._shared_frames) > self._max_shared_frames:
+                _, (old_shm, _, old_finalizer) = self._shared_frames.popitem(last=False)
+                old_finalizer.detach()
+                _release(old_shm, unlink=True)
+            return payload
+
+    def _forget_payload(self, payload: _SharedPayload) -> None:
+        """Forget the shared dataframe of the payload, if it's still shared"""
+
+        with self._lock:
+            for key, (shm, shared_payload, finalizer) in self._shared_frames.items():
+                if shared_payload is payload:
+                    del self._shared_frames[key]
+                    finalizer.detach()
+                    _release(shm, unlink=True)
+                    return
+
+    def _unshare_frame(self, key: str, shm: SharedMemory) -> None:
+        with self._lock:
+            shared = self._shared_frames.get(key)
+            if shared is None or shared[0] is not shm:
+                return
+            del self._shared_frames[key]
+        _release(shm, unlink=True)
+
+    def execute(self, code, data_frame: pd.DataFrame) -> ExecutionResult:
+        if self._closed:
+            raise RuntimeError("The executor has been closed")
+
+        compiled = marshal.dumps(code.code)
+        payload = self._share_frame(data_frame)
+        result, result_payload = self._run(payload, compiled)
+        if isinstance(result.error, _FrameUnavailableError):
+            # the dataframe was released from the shared memory meanwhile, it's shared again
+            self._forget_payload(payload)
+            result, result_payload = self._run(self._share_frame(data_frame), compiled)
+
+        if isinstance(result_payload, _SharedPayload):
+            shm = SharedMemory(name=result_payload.shm_name)
+            result.value = _load(result_payload, shm, copy=True)
+            _release(shm, unlink=True)
+        elif result_payload is not None:
+            data, buffers = result_payload
+            result.value = pickle.loads(data, buffers=buffers)  # noqa: S301
+        return result
+
+    def _run(self, payload: _SharedPayload | pd.DataFrame, compiled: bytes) -> tuple[ExecutionResult, object]:
+        """Run the compiled code on an idle worker, and return its result and the payload of its value"""
+
+        message = (payload, compiled, self._zero_copy, self.limits)
+        worker = self._idle_workers.get()
+        try:
+            return worker.run(message, self.limits)
+        except (ExecutionLimitExceededError, RuntimeError) as e:
+            worker = self._replace_worker(worker)
+            return ExecutionResult(error=e), None
+        finally:
+            self._idle_workers.put(worker)
+
+    def _replace_worker(self, worker: _Worker) -> _Worker:
+        """Kill the worker and start a new one in its place"""
+
+        worker.kill()
+        new_worker = _Worker(self._context, self._max_shared_frames, self._result_shm_threshold)
+        with self._lock:
+            self._workers[self._workers.index(worker)] = new_worker
+        return new_worker
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            worker.stop()
+        with self._lock:
+            for shm, _, finalizer in self._shared_frames.values():
+                finalizer.detach()
+                _release(shm, unlink=True)
+            self._shared_frames.clear()
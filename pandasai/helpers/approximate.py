@@ -0,0 +1,270 @@
+"""
+Helper module to answer questions approximately, on a sample of the rows.
+
+On very large dataframes an approximate answer computed on a sample is often worth
+more than an exact one computed much later. The code runs on a uniform sample of
+the rows, or on a sample stratified by a column. When the code is decomposable
+into sums, counts, mins, maxs and means (see `pandasai.helpers.chunked`), the sums
+and counts are scaled to the number of rows of the dataframe, and a confidence
+interval of the answer is estimated by bootstrapping blocks of the sample.
+
+Example:
+
+    ```
+    approximation = Approximation(rows=100_000)
+    sample = sample_rows(df, approximation.rows, approximation.stratify_by)
+    plan = plan_chunked(sanitized_code.tree)
+    blocks = split_blocks(sample, approximation.blocks)
+    values = [executor.execute(plan.chunk_code, block).value for block in blocks]
+    estimate = estimate_aggregates(plan, values, [len(block) for block in blocks], len(df), approximation)
+    ```
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .chunked import SCALED_COMPONENTS, ChunkedPlan, PartialAggregates
+
+
+@dataclass
+class Approximation:
+    """
+    Settings of the approximate runs.
+
+    Args:
+        rows (int): Number of rows of the sample. Defaults to 100 000.
+        stratify_by (str, optional): Column the sample is stratified by, so that each
+            of its values is represented in proportion of its rows. Defaults to None,
+            for a uniform sample.
+        confidence (float): Confidence level of the intervals. Defaults to 0.95.
+        resamples (int): Number of bootstrap resamples. Defaults to 200.
+        blocks (int): Number of blocks the sample is split into, the code runs once
+            per block and the blocks are resampled. Defaults to 20.
+        random_state (int, optional): Seed of the sample and of the resamples.
+            Defaults to 0.
+    """
+
+    rows: int = 100_000
+    stratify_by: str | None = None
+    confidence: float = 0.95
+    resamples: int = 200
+    blocks: int = 20
+    random_state: int | None = 0
+
+
+@dataclass
+class Estimate:
+    """
+    Approximate value of the code, with its confidence interval.
+
+    Args:
+        value (Any): The estimated value of the code.
+        lower (Any): The lower bounds of the confidence interval, with the shape of
+            the value, or None if it couldn't be estimated.
+        upper (Any): The upper bounds of the confidence interval.
+    """
+
+    value: Any
+    lower: Any = None
+    upper: Any = None
+
+
+def sample_rows(
+    data_frame: pd.DataFrame, rows: int, stratify_by: str | None = None, random_state: int | None = 0
+) -> pd.DataFrame:
+    """
+    Return a random sample of the rows of the dataframe, in a random order.
+
+    A stratified sample takes the same share of the rows of each value of the
+    column, so that rare values are represented in proportion of their rows.
+
+    Args:
+        data_frame (pd.DataFrame): The dataframe.
+        rows (int): Number of rows of the sample.
+        stratify_by (str, optional): Column the sample is stratified by.
+        random_state (int, optional): Seed of the sample.
+
+    Returns:
+        pd.DataFrame: The sample, or the dataframe if it isn't larger than the sample.
+    """
+
+    if len(data_frame) <= rows:
+        return data_frame
+    if stratify_by is None:
+        return data_frame.sample(n=rows, random_state=random_state)
+
+    fraction = rows / len(data_frame)
+    sample = data_frame.groupby(stratify_by, dropna=False, observed=True, group_keys=False).sample(
+        frac=fraction, random_state=random_state
+    )
+    return sample.sample(frac=1, random_state=random_state)
+
+
+def split_blocks(sample: pd.DataFrame, blocks: int) -> list:
+    """
+    Split the sample into blocks of consecutive rows, the sample being in a random order.
+
+    Args:
+        sample (pd.DataFrame): The sample.
+        blocks (int): Number of blocks.
+
+    Returns:
+        list: The blocks, as views of the sample.
+    """
+
+    bounds = np.linspace(0, len(sample), min(blocks, max(len(sample), 1)) + 1).astype(int)
+    return [sample.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def _combine(plan: ChunkedPlan, values: list, rows: list, total_rows: int) -> Any:
+    partials = PartialAggregates(plan)
+    for value, block_rows in zip(values, rows):
+        partials.add(value, block_rows)
+    if partials.rows:
+        partials.scale(total_rows / partials.rows)
+    return plan.finalize(partials)
+
+
+class _Component:
+    """
+    Partial results of a component of the plan on each block, aligned as an array
+    (blocks x rows x columns), so that the blocks are resampled without combining
+    the partial results again for each resample.
+    """
+
+    def __init__(self, values: list, component: str):
+        self.component = component
+        self.kind = type(values[0])
+        if self.kind is pd.DataFrame:
+            self.index = pd.concat([value.index.to_series() for value in values]).index.unique()
+            self.columns = values[0].columns
+            frames = [value.reindex(index=self.index, columns=self.columns) for value in values]
+        elif self.kind is pd.Series:
+            self.index = pd.concat([value.index.to_series() for value in values]).index.unique()
+            self.name = values[0].name
+            frames = [value.reindex(self.index).to_frame() for value in values]
+        else:
+            frames = [pd.DataFrame([[value]]) for value in values]
+        self.array = np.stack([frame.to_numpy(dtype=float) for frame in frames])
+        self.present = ~np.isnan(self.array)
+        self.filled = np.nan_to_num(self.array)
+
+    def resample(self, weights: np.ndarray, factor: float) -> Any:
+        """Return the combined partial result of the blocks, each repeated by its weight"""
+
+        present = np.tensordot(weights, self.present, axes=1) > 0
+        if self.component in SCALED_COMPONENTS:
+            values = np.tensordot(weights, self.filled, axes=1) * factor
+        else:
+            chosen = self.array[weights > 0]
+            values = np.fmin.reduce(chosen) if self.component == "min" else np.fmax.reduce(chosen)
+        values[~present] = np.nan
+
+        if self.kind is pd.DataFrame:
+            rows = present.any(axis=1)
+            return pd.DataFrame(values[rows], index=self.index[rows], columns=self.columns)
+        if self.kind is pd.Series:
+            rows = present[:, 0]
+            return pd.Series(values[rows, 0], index=self.index[rows], name=self.name)
+        return values[0, 0]
+
+
+def _replicates(plan: ChunkedPlan, values: list, rows: list, total_rows: int, approximation: Approximation) -> list:
+    """Return the values of the code on bootstrap resamples of the blocks"""
+
+    try:
+        components = [
+            _Component([value[position] for value in values], component)
+            for position, (_, component) in enumerate(plan.components)
+        ]
+    except (TypeError, ValueError):
+        # e.g. sums of strings, or partial results that can't be aligned
+        return []
+
+    rng = np.random.default_rng(approximation.random_state)
+    rows = np.asarray(rows, dtype=float)
+    replicates = []
+    for _ in range(approximation.resamples):
+        weights = np.bincount(rng.integers(0, len(values), len(values)), minlength=len(values)).astype(float)
+        factor = total_rows / (weights @ rows)
+        partials = PartialAggregates(plan)
+        partials.add(tuple(component.resample(weights, factor) for component in components))
+        replicates.append(plan.finalize(partials))
+    return replicates
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))
+
+
+def _quantiles(value: Any, replicates: list, quantiles: tuple) -> tuple | None:
+    """Return the quantiles of the replicates, with the shape of the value"""
+
+    if _is_number(value):
+        replicates = [replicate for replicate in replicates if _is_number(replicate)]
+        if not replicates:
+            return None
+        return tuple(float(bound) for bound in np.nanquantile(np.asarray(replicates, dtype=float), quantiles))
+    if not isinstance(value, (pd.Series, pd.DataFrame)):
+        return None
+
+    # replicates are aligned with the value by labels, unless the labels are positions
+    # (e.g. `as_index=False`), in which case only the replicates with the same groups are kept
+    same_type = [replicate for replicate in replicates if isinstance(replicate, type(value))]
+    if isinstance(value.index, pd.RangeIndex):
+        same_type = [replicate for replicate in same_type if replicate.index.equals(value.index)]
+    numeric = value if isinstance(value, pd.Series) else value.select_dtypes("number")
+    if not same_type or (isinstance(value, pd.Series) and not pd.api.types.is_numeric_dtype(value.dtype)):
+        return None
+    if isinstance(numeric, pd.DataFrame) and numeric.columns.empty:
+        return None
+
+    stacked = pd.concat(
+        [replicate if isinstance(value, pd.Series) else replicate[numeric.columns] for replicate in same_type],
+        keys=range(len(same_type)),
+    )
+    grouped = stacked.groupby(level=list(range(1, stacked.index.nlevels)), dropna=False)
+    bounds = []
+    for quantile in quantiles:
+        bound = grouped.quantile(quantile)
+        if isinstance(value, pd.Series):
+            bounds.append(bound.reindex(value.index).rename(value.name))
+        else:
+            bound = bound.reindex(value.index)
+            bounds.append(value.copy().assign(**{str(column): bound[column] for column in numeric.columns}))
+    return tuple(bounds)
+
+
+def estimate_aggregates(
+    plan: ChunkedPlan, values: list, rows: list, total_rows: int, approximation: Approximation
+) -> Estimate:
+    """
+    Estimate the value of the code on all the rows from the partial results of its
+    aggregations on the blocks of a sample, and its confidence interval by
+    bootstrapping the blocks.
+
+    Args:
+        plan (ChunkedPlan): The plan of the code.
+        values (list): The value of the chunk code of the plan on each block.
+        rows (list): The number of rows of each block.
+        total_rows (int): The number of rows of the dataframe.
+        approximation (Approximation): The settings of the approximation.
+
+    Returns:
+        Estimate: The estimated value and its confidence interval.
+    """
+
+    value = _combine(plan, values, rows, total_rows)
+    if len(values) < 2:
+        return Estimate(value)
+
+    replicates = _replicates(plan, values, rows, total_rows, approximation)
+    alpha = (1 - approximation.confidence) / 2
+    bounds = _quantiles(value, replicates, (alpha, 1 - alpha)) if replicates else None
+    if bounds is None:
+        return Estimate(value)
+    return Estimate(value, *bounds)
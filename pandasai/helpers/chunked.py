@@ -0,0 +1,618 @@
+"""
+Helper module to run the generated code chunk by chunk, on data bigger than memory.
+
+The sanitized code is split in two phases:
+
+- the chunk phase, made of the row-wise statements (filters, new columns, ...) and
+  of the partial results of the decomposable aggregations (sum, count, min, max,
+  mean as sum and count, len, and the same aggregations of a groupby), which runs
+  on each chunk;
+- the final phase, which runs once on the partial results combined across chunks.
+
+Only the known row-wise methods and functions can be called on the rows in the
+chunk phase. Code that can't be split this way (e.g. a median, a skew, a sort
+before a head, or rows used after an aggregation) raises a NonDecomposableCodeError.
+
+Example:
+
+    ```
+    plan = plan_chunked(sanitized_code.tree)
+    partials = PartialAggregates(plan)
+    for chunk in iter_chunks("sales.csv", chunksize=100_000):
+        partials.add(executor.execute(plan.chunk_code, chunk).value)
+    answer = plan.finalize(partials)
+    ```
+"""
+from __future__ import annotations
+
+import ast
+import copy
+import os
+from typing import Any, Iterable, Iterator
+
+import astor
+import pandas as pd
+
+from ..exceptions import NonDecomposableCodeError
+from ..executors.base import run_in_process
+from ._optional import import_dependency
+from .code_sanitizer import CodeSanitizer
+
+# Components of the decomposable aggregations, and how their partials are combined
+AGGREGATIONS = {
+    "sum": ("sum",),
+    "count": ("count",),
+    "min": ("min",),
+    "max": ("max",),
+    "mean": ("sum", "count"),
+    "size": ("size",),
+}
+COMBINATIONS = {"sum": "sum", "count": "sum", "size": "sum", "min": "min", "max": "max"}
+# Components growing with the number of rows
+SCALED_COMPONENTS = frozenset({"sum", "count", "size"})
+
+# Methods, functions and attributes whose result for a row only depends on the same
+# row. Any other call on the rows (e.g. `skew()` or `np.percentile`) may depend on
+# other rows, so the code using it isn't split into chunks.
+ROW_WISE_METHODS = frozenset(
+    {
+        # arithmetic and comparisons
+        "abs",
+        "add",
+        "between",
+        "clip",
+        "div",
+        "divide",
+        "eq",
+        "floordiv",
+        "ge",
+        "gt",
+        "le",
+        "lt",
+        "mod",
+        "mul",
+        "multiply",
+        "ne",
+        "pow",
+        "radd",
+        "rdiv",
+        "rfloordiv",
+        "rmod",
+        "rmul",
+        "round",
+        "rpow",
+        "rsub",
+        "rtruediv",
+        "sub",
+        "subtract",
+        "truediv",
+        # values and missing values
+        "astype",
+        "combine_first",
+        "fillna",
+        "isin",
+        "isna",
+        "isnull",
+        "map",
+        "mask",
+        "notna",
+        "notnull",
+        "replace",
+        "where",
+        # rows and columns selection
+        "assign",
+        "copy",
+        "drop",
+        "dropna",
+        "filter",
+        "rename",
+        "set_index",
+        "to_frame",
+        # `str` accessor
+        "capitalize",
+        "casefold",
+        "contains",
+        "endswith",
+        "extract",
+        "find",
+        "fullmatch",
+        "get",
+        "lower",
+        "lstrip",
+        "match",
+        "pad",
+        "rstrip",
+        "slice",
+        "split",
+        "startswith",
+        "strip",
+        "title",
+        "upper",
+        "zfill",
+        # `dt` accessor
+        "ceil",
+        "day_name",
+        "floor",
+        "month_name",
+        "normalize",
+        "strftime",
+        "to_period",
+        "tz_convert",
+        "tz_localize",
+    }
+)
+# Keywords making a row-wise method depend on other rows, e.g. `fillna(method="ffill")`
+NON_ROW_WISE_KEYWORDS = {
+    "fillna": frozenset({"method", "limit"}),
+    "replace": frozenset({"method", "limit"}),
+    "dropna": frozenset({"axis"}),
+}
+ROW_WISE_FUNCTIONS = frozenset({"abs", "bool", "float", "int", "round", "str"})
+ROW_WISE_PANDAS_FUNCTIONS = frozenset(
+    {"to_datetime", "to_numeric", "to_timedelta", "isna", "isnull", "notna", "notnull", "Timestamp", "Timedelta"}
+)
+ROW_WISE_NUMPY_FUNCTIONS = frozenset(
+    {
+        "abs",
+        "absolute",
+        "ceil",
+        "clip",
+        "exp",
+        "floor",
+        "isfinite",
+        "isinf",
+        "isnan",
+        "log",
+        "log10",
+        "log1p",
+        "log2",
+        "maximum",
+        "minimum",
+        "power",
+        "round",
+        "select",
+        "sign",
+        "sqrt",
+        "where",
+    }
+)
+NON_ROW_WISE_ATTRIBUTES = frozenset({"iloc", "iat", "shape", "size", "T", "empty", "values"})
+GROUPBY_KEYWORDS = frozenset({"by", "as_index", "sort", "dropna", "observed"})
+
+_AGGREGATE_PREFIX = "__pandasai_aggregate_"
+
+
+def iter_chunks(source: str | os.PathLike | Iterable[pd.DataFrame], chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """
+    Iterate over the chunks of a csv or parquet file, or of an iterable of dataframes.
+
+    Args:
+        source (str | os.PathLike | Iterable[pd.DataFrame]): The path of a csv or
+            parquet file, or the chunks themselves.
+        chunksize (int): The number of rows of the chunks read from a file.
+
+    Returns (Iterator[pd.DataFrame]): The chunks.
+    """
+
+    if not isinstance(source, (str, os.PathLike)):
+        yield from source
+        return
+
+    extension = _extension(source)
+    if extension in (".parquet", ".pq"):
+        parquet = import_dependency("pyarrow.parquet", extra="pyarrow is required to read parquet files by chunks.")
+        for batch in parquet.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(source, chunksize=chunksize, sep="\t" if extension == ".tsv" else ",") as reader:
+            yield from reader
+
+
+def count_rows(source: str | os.PathLike | Iterable[pd.DataFrame], chunksize: int = 100_000) -> int | None:
+    """
+    Return the number of rows of a csv or parquet file, or of a list of dataframes.
+
+    The rows of a parquet file are counted from its metadata, while only the first
+    column of a csv file is read. The rows of an iterator can't be counted without
+    consuming it.
+
+    Args:
+        source (str | os.PathLike | Iterable[pd.DataFrame]): The path of a csv or
+            parquet file, or the chunks themselves.
+        chunksize (int): The number of rows of the chunks read from a csv file.
+
+    Returns (int): The number of rows, or None if they can't be counted.
+    """
+
+    if not isinstance(source, (str, os.PathLike)):
+        if isinstance(source, (list, tuple)):
+            return sum(len(chunk) for chunk in source)
+        return None
+
+    extension = _extension(source)
+    if extension in (".parquet", ".pq"):
+        parquet = import_dependency("pyarrow.parquet", extra="pyarrow is required to read parquet files by chunks.")
+        return parquet.ParquetFile(source).metadata.num_rows
+    sep = "\t" if extension == ".tsv" else ","
+    with pd.read_csv(source, chunksize=chunksize, sep=sep, usecols=[0]) as reader:
+        return sum(len(chunk) for chunk in reader)
+
+
+def _extension(path: str | os.PathLike) -> str:
+    extension = os.path.splitext(os.fspath(path))[1].lower()
+    if extension not in (".parquet", ".pq", ".csv", ".tsv", ".txt"):
+        raise ValueError(f"Unsupported file type {extension}, expected a csv or parquet file")
+    return extension
+
+
+def _names(node: ast.AST) -> set:
+    return {n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)}
+
+
+def _assigned_names(node: ast.AST) -> set:
+    targets = node.targets if isinstance(node, ast.Assign) else [getattr(node, "target", None)]
+    return {n.id for target in targets if target is not None for n in ast.walk(target) if isinstance(n, ast.Name)}
+
+
+def _is_row_wise(node: ast.AST, row_names: set) -> bool:
+    """Return True if each row of the value of the expression only depends on the same row.
+    Only the known row-wise methods and functions can be called on the rows."""
+
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if not _names(n) & row_names:
+            # doesn't use the rows, e.g. a constant
+            continue
+        if isinstance(n, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp, ast.Lambda)):
+            return False
+        if isinstance(n, ast.Attribute) and n.attr in NON_ROW_WISE_ATTRIBUTES:
+            return False
+        if isinstance(n, ast.Subscript) and any(
+            isinstance(s, ast.Slice) and (s.lower or s.upper or s.step) for s in ast.walk(n.slice)
+        ):
+            return False
+        if isinstance(n, ast.Call) and not _is_row_wise_call(n):
+            return False
+        stack.extend(ast.iter_child_nodes(n))
+    return True
+
+
+def _is_row_wise_call(node: ast.Call) -> bool:
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id in ROW_WISE_FUNCTIONS
+    if not isinstance(func, ast.Attribute):
+        return False
+    if isinstance(func.value, ast.Name) and func.value.id == "pd":
+        return func.attr in ROW_WISE_PANDAS_FUNCTIONS
+    if isinstance(func.value, ast.Name) and func.value.id in ("np", "numpy"):
+        return func.attr in ROW_WISE_NUMPY_FUNCTIONS
+    keywords = NON_ROW_WISE_KEYWORDS.get(func.attr, frozenset())
+    return func.attr in ROW_WISE_METHODS and not any(keyword.arg in keywords for keyword in node.keywords)
+
+
+class _Aggregate:
+    """A decomposable aggregation found in the code"""
+
+    def __init__(self, name: str, operation: str, components: list, grouped: bool, as_index: bool):
+        self.name = name
+        self.operation = operation
+        self.components = components
+        self.grouped = grouped
+        self.as_index = as_index
+
+
+class _AggregateExtractor(ast.NodeTransformer):
+    """Replace the decomposable aggregations of the rows with placeholder names"""
+
+    def __init__(self, plan: ChunkedPlan, row_names: set):
+        self._plan = plan
+        self._row_names = row_names
+
+    def _is_rows(self, node: ast.AST) -> bool:
+        return _is_row_wise(node, self._row_names) and bool(_names(node) & self._row_names)
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:  # noqa: N802
+        aggregate = self._extract(node)
+        return self.generic_visit(node) if aggregate is None else aggregate
+
+    def visit_Subscript(self, node: ast.Subscript) -> ast.AST:  # noqa: N802
+        # `df.shape[0]` is the number of rows
+        if (
+            isinstance(node.value, ast.Attribute)
+            and node.value.attr == "shape"
+            and isinstance(node.slice, ast.Constant)
+            and node.slice.value == 0
+            and self._is_rows(node.value.value)
+        ):
+            return self._add("size", node.value.value, None, [])
+        return self.generic_visit(node)
+
+    def _extract(self, node: ast.Call) -> ast.AST | None:
+        func = node.func
+        if isinstance(func, ast.Name) and func.id == "len" and len(node.args) == 1 and self._is_rows(node.args[0]):
+            return self._add("size", node.args[0], None, [])
+        if not isinstance(func, ast.Attribute):
+            return None
+
+        operation = func.attr
+        keywords = node.keywords
+        if operation in ("agg", "aggregate"):
+            if len(node.args) != 1 or not isinstance(node.args[0], ast.Constant) or keywords:
+                return None
+            operation = node.args[0].value
+        elif node.args:
+            return None
+        if operation not in AGGREGATIONS:
+            return None
+
+        owner, columns = func.value, None
+        if isinstance(owner, ast.Subscript) and self._is_groupby(owner.value):
+            owner, columns = owner.value, owner.slice
+        if self._is_groupby(owner):
+            if not self._is_rows_groupby(owner) or (columns is not None and not _is_row_wise(columns, self._row_names)):
+                return None
+            return self._add(operation, owner, columns, keywords)
+        if self._is_rows(owner):
+            return self._add(operation, owner, None, keywords)
+        return None
+
+    def _is_groupby(self, node: ast.AST) -> bool:
+        return isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "groupby"
+
+    def _is_rows_groupby(self, groupby: ast.Call) -> bool:
+        """Return True if the groupby groups the rows by row-wise keys"""
+
+        return (
+            self._is_rows(groupby.func.value)
+            and all(keyword.arg in GROUPBY_KEYWORDS for keyword in groupby.keywords)
+            and all(_is_row_wise(arg, self._row_names) for arg in [*groupby.args, *(k.value for k in groupby.keywords)])
+        )
+
+    def _add(self, operation: str, owner: ast.AST, columns: ast.AST | None, keywords: list) -> ast.Name:
+        """Register the aggregation of the owner and return its placeholder"""
+
+        grouped = self._is_groupby(owner)
+        as_index = True
+        if grouped:
+            as_index = not any(
+                keyword.arg == "as_index" and isinstance(keyword.value, ast.Constant) and not keyword.value.value
+                for keyword in owner.keywords
+            )
+            owner = copy.deepcopy(owner)
+            owner.keywords = [keyword for keyword in owner.keywords if keyword.arg != "as_index"]
+            if columns is not None:
+                owner = ast.Subscript(value=owner, slice=columns, ctx=ast.Load())
+        elif operation == "size" and not keywords:
+            # the number of rows, e.g. `len(df)`
+            owner = ast.Call(func=ast.Name(id="len", ctx=ast.Load()), args=[owner], keywords=[])
+
+        components = []
+        for component in AGGREGATIONS[operation]:
+            if component == "size" and not grouped:
+                components.append(owner)
+                continue
+            component_keywords = [] if component == "count" and operation == "mean" else keywords
+            components.append(
+                ast.Call(
+                    func=ast.Attribute(value=owner, attr=component, ctx=ast.Load()),
+                    args=[],
+                    keywords=copy.deepcopy(component_keywords),
+                )
+            )
+
+        name = f"{_AGGREGATE_PREFIX}{len(self._plan.aggregates)}__"
+        self._plan.aggregates.append(_Aggregate(name, operation, components, grouped, as_index))
+        return ast.Name(id=name, ctx=ast.Load())
+
+
+class ChunkedPlan:
+    """
+    Plan to run the code chunk by chunk.
+
+    Attributes:
+        chunk_code (SanitizedCode): The code run on each chunk, returning the partial
+            results of the aggregations as a tuple.
+        final_code (SanitizedCode): The code run once on the combined results.
+    """
+
+    def __init__(self):
+        self.aggregates = []
+        self.chunk_code = None
+        self.final_code = None
+
+    @property
+    def components(self) -> list:
+        """The partial results computed for each chunk, as (aggregate, component) pairs"""
+        return [
+            (aggregate, component) for aggregate in self.aggregates for component in AGGREGATIONS[aggregate.operation]
+        ]
+
+    def finalize(self, partials: PartialAggregates) -> Any:
+        """
+        Run the final phase on the combined partial results.
+
+        Args:
+            partials (PartialAggregates): The partial results of all the chunks.
+
+        Returns (Any): The value of the last expression of the code.
+        """
+
+        result = run_in_process(self.final_code.code, pd.DataFrame(), variables=partials.results())
+        if result.error is not None:
+            raise result.error
+        return result.value
+
+
+def plan_chunked(tree: ast.Module) -> ChunkedPlan:
+    """
+    Split the sanitized code into the code run on each chunk and the code run
+    on the combined results.
+
+    Args:
+        tree (ast.Module): The AST of the sanitized code.
+
+    Raises:
+        NonDecomposableCodeError: The code can't be run chunk by chunk.
+
+    Returns (ChunkedPlan): The plan.
+    """
+
+    plan = ChunkedPlan()
+    row_names = {"df"}
+    chunk_statements, final_statements = [], []
+    final_phase = False
+
+    body = copy.deepcopy(tree).body
+    for index, statement in enumerate(body):
+        if isinstance(statement, (ast.Import, ast.ImportFrom)):
+            chunk_statements.append(statement)
+            final_statements.append(statement)
+            continue
+
+        uses_rows = bool(_names(statement) & row_names)
+        if not final_phase and not uses_rows and not isinstance(statement, ast.Expr):
+            # constants are available to both phases
+            chunk_statements.append(statement)
+            final_statements.append(statement)
+            continue
+
+        if not final_phase and _is_row_wise(statement, row_names):
+            if isinstance(statement, (ast.Assign, ast.AugAssign, ast.AnnAssign)):
+                row_names |= _assigned_names(statement)
+                chunk_statements.append(statement)
+                continue
+            if index < len(body) - 1 and isinstance(statement, ast.Expr):
+                chunk_statements.append(statement)
+                continue
+
+        final_phase = True
+        statement = _AggregateExtractor(plan, row_names).visit(statement)
+        if _names(statement) & row_names:
+            raise NonDecomposableCodeError(
+                f"The code can't be run chunk by chunk: `{astor.to_source(statement).strip()}` uses the rows of "
+                "the dataframe in a way that can't be combined across chunks"
+            )
+        if isinstance(statement, (ast.Assign, ast.AugAssign, ast.AnnAssign)):
+            row_names -= _assigned_names(statement)
+        final_statements.append(statement)
+
+    if not plan.aggregates:
+        raise NonDecomposableCodeError(
+            "The code can't be run chunk by chunk: it doesn't compute a sum, count, min, max or mean of the rows"
+        )
+
+    components = ast.Tuple(elts=[c for aggregate in plan.aggregates for c in aggregate.components], ctx=ast.Load())
+    chunk_module = ast.Module(body=[*chunk_statements, ast.Expr(value=components)], type_ignores=[])
+    final_module = ast.Module(body=final_statements, type_ignores=[])
+
+    sanitizer = CodeSanitizer(remove_unsafe_imports=False, remove_plots=False, capture_result=True)
+    plan.chunk_code = sanitizer.sanitize(astor.to_source(ast.fix_missing_locations(chunk_module)))
+    plan.final_code = sanitizer.sanitize(astor.to_source(ast.fix_missing_locations(final_module)))
+    return plan
+
+
+def _combine(values: list, how: str, grouped: bool) -> Any:
+    """Combine the partial results of a component across chunks"""
+
+    frames = [value for value in values if isinstance(value, (pd.Series, pd.DataFrame))]
+    if not frames:
+        return pd.Series(values).agg(how)
+
+    non_empty = [frame for frame in frames if len(frame)] or frames[:1]
+    if len(non_empty) == 1 and non_empty[0].index.is_unique:
+        # nothing to combine, e.g. the partial results were already combined
+        return non_empty[0].sort_index() if grouped else non_empty[0]
+    concatenated = pd.concat(non_empty)
+    levels = list(range(concatenated.index.nlevels))
+    return concatenated.groupby(level=levels, sort=grouped, dropna=False).agg(how)
+
+
+class PartialAggregates:
+    """
+    Partial results of the aggregations of a plan, combined across chunks.
+
+    Args:
+        plan (ChunkedPlan): The plan.
+    """
+
+    # number of partial results kept per component before combining them
+    max_pending = 32
+
+    def __init__(self, plan: ChunkedPlan):
+        self.plan = plan
+        self.rows = 0
+        self._partials = [[] for _ in plan.components]
+
+    def add(self, values: tuple, rows: int = 0) -> None:
+        """
+        Add the partial results of a chunk.
+
+        Args:
+            values (tuple): The value of the chunk code.
+            rows (int): The number of rows of the chunk.
+        """
+
+        self.rows += rows
+        for partials, value, (aggregate, component) in zip(self._partials, values, self.plan.components):
+            partials.append(value)
+            if len(partials) > self.max_pending:
+                partials[:] = [_combine(partials, COMBINATIONS[component], aggregate.grouped)]
+
+    def merge(self, other: PartialAggregates) -> None:
+        """
+        Add the partial results of another set of chunks, of the same plan.
+
+        Args:
+            other (PartialAggregates): The partial results to add.
+        """
+
+        self.rows += other.rows
+        for partials, other_partials in zip(self._partials, other._partials):
+            partials.extend(other_partials)
+
+    def scale(self, factor: float) -> None:
+        """
+        Scale the sums and counts, e.g. to estimate them on all the rows from the
+        partial results of a sample of the rows. Mins and maxs are not scaled.
+
+        Args:
+            factor (float): The scale factor, e.g. the number of rows divided by
+                the number of rows of the sample.
+        """
+
+        for partials, (aggregate, component) in zip(self._partials, self.plan.components):
+            if component in SCALED_COMPONENTS and partials:
+                partials[:] = [_combine(partials, COMBINATIONS[component], aggregate.grouped) * factor]
+
+    def results(self) -> dict:
+        """
+        Return the values of the aggregations of all the chunks.
+
+        Returns (dict): The value of each aggregation, by placeholder name.
+        """
+
+        combined = {}
+        for partials, (aggregate, component) in zip(self._partials, self.plan.components):
+            combined.setdefault(aggregate, {})[component] = _combine(
+                partials, COMBINATIONS[component], aggregate.grouped
+            )
+
+        results = {}
+        for aggregate, components in combined.items():
+            if aggregate.operation == "mean":
+                sums, counts = components["sum"], components["count"]
+                if isinstance(sums, pd.DataFrame):
+                    counts = counts.reindex(columns=sums.columns)
+                elif isinstance(sums, pd.Series) and not aggregate.grouped:
+                    counts = counts.reindex(sums.index)
+                value = sums / counts
+            else:
+                value = components[aggregate.operation]
+            if not aggregate.as_index:
+                if isinstance(value, pd.Series) and aggregate.operation == "size":
+                    value = value.rename("size")
+                value = value.reset_index()
+            results[aggregate.name] = value
+        return results
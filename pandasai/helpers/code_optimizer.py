@@ -0,0 +1,601 @@
+"""
+Helper module to optimize the sanitized code before running it.
+
+LLMs often generate row-wise code (`df.iterrows()` loops, `apply(..., axis=1)`,
+Python accumulation loops), which is orders of magnitude slower than vectorized
+pandas code on large dataframes. The optimizer recognizes the common row-wise
+patterns and rewrites them into vectorized equivalents:
+
+- `df.apply(lambda row: <expression>, axis=1)`, and `series.apply/map(lambda x: ...)`,
+  when the expression is made of arithmetic, comparisons, conditional expressions
+  and string predicates on the columns;
+- `for index, row in df.iterrows()` loops assigning columns (possibly under an
+  `if`), accumulating values (`total += ...`) or appending them to a list;
+- `for value in df['column']` loops accumulating or appending values.
+
+Anything else is left untouched, so the optimized code always falls back to the
+original code when a rule doesn't apply.
+
+Example:
+
+    ```
+    optimized = CodeOptimizer().optimize(sanitized_code)
+    print(optimized.optimizations)
+    ```
+"""
+from __future__ import annotations
+
+import ast
+import copy
+import logging
+
+from .code_sanitizer import SanitizedCode, capture_last_expression
+
+RULE_APPLY_ROWS = "apply_rows"
+RULE_APPLY_ELEMENTS = "apply_elements"
+RULE_ROWS_LOOP = "rows_loop"
+RULE_ELEMENTS_LOOP = "elements_loop"
+
+# methods of the strings, and their vectorized equivalents in the `.str` accessor
+STRING_METHODS = frozenset(
+    {"lower", "upper", "strip", "lstrip", "rstrip", "title", "capitalize", "startswith", "endswith", "replace"}
+)
+STRING_PREDICATES = frozenset({"startswith", "endswith"})
+COMPARISONS = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+ARITHMETIC = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+CASTS = {"float": "float", "int": "int", "str": "str"}
+
+
+def _name(name: str) -> ast.Name:
+    return ast.Name(id=name, ctx=ast.Load())
+
+
+def _attribute(value: ast.AST, attr: str) -> ast.Attribute:
+    return ast.Attribute(value=value, attr=attr, ctx=ast.Load())
+
+
+def _call(func: ast.AST, *args: ast.AST, **keywords: ast.AST) -> ast.Call:
+    return ast.Call(
+        func=func, args=list(args), keywords=[ast.keyword(arg=key, value=value) for key, value in keywords.items()]
+    )
+
+
+def _method(value: ast.AST, method: str, *args: ast.AST, **keywords: ast.AST) -> ast.Call:
+    return _call(_attribute(value, method), *args, **keywords)
+
+
+def _string_method(value: ast.AST, method: str, *args: ast.AST, **keywords: ast.AST) -> ast.Call:
+    return _method(_attribute(value, "str"), method, *args, **keywords)
+
+
+def _column_name(node: ast.AST) -> str | None:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _is_constant_collection(node: ast.AST) -> bool:
+    return isinstance(node, (ast.List, ast.Tuple, ast.Set)) and all(isinstance(e, ast.Constant) for e in node.elts)
+
+
+class _Vectorizer:
+    """
+    Convert an expression computed for one row (or one element) into the same
+    expression computed for all the rows at once.
+
+    Args:
+        frame (ast.AST): The dataframe (or series) iterated over.
+        row (str, optional): The name of the row variable, whose columns are read with
+            `row['column']` or `row.column`.
+        element (str, optional): The name of the element variable, when iterating over
+            a series.
+    """
+
+    def __init__(self, frame: ast.AST, row: str | None = None, element: str | None = None):
+        self.frame = frame
+        self.row = row
+        self.element = element
+        self.columns_read = set()
+
+    def index(self) -> ast.AST:
+        return _attribute(copy.deepcopy(self.frame), "index")
+
+    def vectorize(self, node: ast.AST) -> tuple[ast.AST, bool] | None:
+        """
+        Return the vectorized expression, and whether it depends on the rows, or None
+        if the expression can't be vectorized.
+        """
+
+        method = getattr(self, f"_vectorize_{type(node).__name__}", None)
+        return method(node) if method is not None else None
+
+    def vectorize_rows(self, node: ast.AST) -> ast.AST | None:
+        """Return the vectorized expression, if it depends on the rows"""
+
+        result = self.vectorize(node)
+        return result[0] if result is not None and result[1] else None
+
+    def is_boolean(self, node: ast.AST) -> bool:
+        """Return True if the expression always returns a boolean"""
+
+        if isinstance(node, ast.Compare) or (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not)):
+            return True
+        if isinstance(node, ast.BoolOp):
+            return all(self.is_boolean(value) for value in node.values)
+        if isinstance(node, ast.Constant):
+            return isinstance(node.value, bool)
+        return (
+            isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in STRING_PREDICATES
+        )
+
+    def _vectorize_Constant(self, node: ast.Constant):  # noqa: N802
+        return node, False
+
+    def _vectorize_Name(self, node: ast.Name):  # noqa: N802
+        if node.id == self.element:
+            return copy.deepcopy(self.frame), True
+        if node.id == self.row:
+            return None
+        return node, False
+
+    def _vectorize_Subscript(self, node: ast.Subscript):  # noqa: N802
+        column = _column_name(node.slice)
+        if isinstance(node.value, ast.Name) and node.value.id == self.row and column is not None:
+            self.columns_read.add(column)
+            return ast.Subscript(value=copy.deepcopy(self.frame), slice=node.slice, ctx=ast.Load()), True
+        return None
+
+    def _vectorize_Attribute(self, node: ast.Attribute):  # noqa: N802
+        # `row.name` and `row.index` are attributes of the row, not columns
+        if isinstance(node.value, ast.Name) and node.value.id == self.row and node.attr not in ("name", "index"):
+            self.columns_read.add(node.attr)
+            return ast.Subscript(value=copy.deepcopy(self.frame), slice=ast.Constant(node.attr), ctx=ast.Load()), True
+        return None
+
+    def _vectorize_BinOp(self, node: ast.BinOp):  # noqa: N802
+        if not isinstance(node.op, ARITHMETIC):
+            return None
+        left, right = self.vectorize(node.left), self.vectorize(node.right)
+        if left is None or right is None:
+            return None
+        return ast.BinOp(left=left[0], op=node.op, right=right[0]), left[1] or right[1]
+
+    def _vectorize_UnaryOp(self, node: ast.UnaryOp):  # noqa: N802
+        operand = self.vectorize(node.operand)
+        if operand is None:
+            return None
+        if isinstance(node.op, ast.Not):
+            if not self.is_boolean(node.operand):
+                return None
+            if not operand[1]:
+                return ast.UnaryOp(op=node.op, operand=operand[0]), False
+            return ast.UnaryOp(op=ast.Invert(), operand=operand[0]), True
+        if isinstance(node.op, (ast.USub, ast.UAdd)):
+            return ast.UnaryOp(op=node.op, operand=operand[0]), operand[1]
+        return None
+
+    def _vectorize_BoolOp(self, node: ast.BoolOp):  # noqa: N802
+        # `and`/`or` return one of their operands, so they're only equivalent to `&`/`|` on booleans
+        if not all(self.is_boolean(value) for value in node.values):
+            return None
+        values = [self.vectorize(value) for value in node.values]
+        if any(value is None for value in values):
+            return None
+        if not any(value[1] for value in values):
+            return node, False
+
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        result = values[0][0]
+        for value in values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value[0])
+        return result, True
+
+    def _vectorize_Compare(self, node: ast.Compare):  # noqa: N802
+        comparisons = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            comparison = self._vectorize_comparison(left, op, right)
+            if comparison is None:
+                return None
+            comparisons.append(comparison)
+            left = right
+
+        result, depends_on_rows = comparisons[0]
+        for comparison, comparison_depends_on_rows in comparisons[1:]:
+            result = ast.BinOp(left=result, op=ast.BitAnd(), right=comparison)
+            depends_on_rows = depends_on_rows or comparison_depends_on_rows
+        return result, depends_on_rows
+
+    def _vectorize_comparison(self, left: ast.AST, op: ast.cmpop, right: ast.AST):
+        if isinstance(op, (ast.In, ast.NotIn)):
+            vectorized = None
+            if isinstance(left, ast.Constant) and isinstance(left.value, str):
+                # substring predicate, e.g. `'foo' in row['name']`
+                series = self.vectorize_rows(right)
+                if series is not None:
+                    vectorized = _string_method(series, "contains", left, regex=ast.Constant(False))
+            elif _is_constant_collection(right):
+                series = self.vectorize_rows(left)
+                if series is not None:
+                    vectorized = _method(series, "isin", ast.List(elts=list(right.elts), ctx=ast.Load()))
+            if vectorized is None:
+                return None
+            if isinstance(op, ast.NotIn):
+                vectorized = ast.UnaryOp(op=ast.Invert(), operand=vectorized)
+            return vectorized, True
+
+        if not isinstance(op, COMPARISONS):
+            return None
+        left, right = self.vectorize(left), self.vectorize(right)
+        if left is None or right is None:
+            return None
+        return ast.Compare(left=left[0], ops=[op], comparators=[right[0]]), left[1] or right[1]
+
+    def _vectorize_IfExp(self, node: ast.IfExp):  # noqa: N802
+        test, body, orelse = self.vectorize(node.test), self.vectorize(node.body), self.vectorize(node.orelse)
+        if test is None or body is None or orelse is None or not self.is_boolean(node.test):
+            return None
+        if not test[1]:
+            return None
+        # `pd.Series(orelse).mask(test, body)` is `body` where `test` is true, `orelse` elsewhere
+        series = _call(_attribute(_name("pd"), "Series"), orelse[0], index=self.index())
+        return _method(series, "mask", test[0], body[0]), True
+
+    def _vectorize_Call(self, node: ast.Call):  # noqa: N802
+        if node.keywords:
+            return None
+        func = node.func
+        if isinstance(func, ast.Name):
+            return self._vectorize_function(func.id, node.args)
+        if isinstance(func, ast.Attribute) and func.attr in STRING_METHODS:
+            series = self.vectorize_rows(func.value)
+            arguments = [self.vectorize(arg) for arg in node.args]
+            if series is None or any(arg is None or arg[1] for arg in arguments):
+                return None
+            return _string_method(series, func.attr, *(arg[0] for arg in arguments)), True
+        return None
+
+    def _vectorize_function(self, function: str, args: list):
+        if not args:
+            return None
+        series = self.vectorize_rows(args[0])
+        if series is None:
+            return None
+        if function == "abs" and len(args) == 1:
+            return _method(series, "abs"), True
+        if function == "round" and len(args) <= 2:
+            decimals = self.vectorize(args[1]) if len(args) == 2 else (ast.Constant(0), False)
+            if decimals is None or decimals[1]:
+                return None
+            return _method(series, "round", decimals[0]), True
+        if function == "len" and len(args) == 1:
+            return _string_method(series, "len"), True
+        if function in CASTS and len(args) == 1:
+            return _method(series, "astype", _name(CASTS[function])), True
+        return None
+
+
+class _RowsLoop:
+    """Vectorize the body of a loop over the rows (or the elements) of a dataframe"""
+
+    def __init__(self, vectorizer: _Vectorizer, frame: ast.AST, index: str | None, mask_names):
+        self.vectorizer = vectorizer
+        self.frame = frame
+        self.index = index
+        self.mask_names = mask_names
+        self.statements = []
+        self.columns_written = set()
+        self.accumulators = set()
+        # how many times the accumulators are read to accumulate, e.g. `total = total + value`
+        self.accumulator_loads = 0
+
+    def convert(self, body: list, mask: ast.AST | None = None) -> bool:
+        for statement in body:
+            if isinstance(statement, ast.If):
+                if not self._convert_if(statement, mask):
+                    return False
+            elif isinstance(statement, (ast.Assign, ast.AugAssign)):
+                if not self._convert_assignment(statement, mask):
+                    return False
+            elif isinstance(statement, ast.Expr):
+                if not self._convert_append(statement, mask):
+                    return False
+            else:
+                return False
+        return True
+
+    def _convert_if(self, statement: ast.If, mask: ast.AST | None) -> bool:
+        test = self.vectorizer.vectorize_rows(statement.test)
+        if test is None or not self.vectorizer.is_boolean(statement.test):
+            return False
+
+        # compute the condition once, before the statements modifying the dataframe
+        name = next(self.mask_names)
+        condition = test if mask is None else ast.BinOp(left=copy.deepcopy(mask), op=ast.BitAnd(), right=test)
+        self.statements.append(ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=condition))
+        if not self.convert(statement.body, _name(name)):
+            return False
+
+        if statement.orelse:
+            otherwise = ast.UnaryOp(op=ast.Invert(), operand=test)
+            if mask is not None:
+                otherwise = ast.BinOp(left=copy.deepcopy(mask), op=ast.BitAnd(), right=otherwise)
+            name = next(self.mask_names)
+            self.statements.append(ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=otherwise))
+            return self.convert(statement.orelse, _name(name))
+        return True
+
+    def _column_target(self, target: ast.AST) -> str | None:
+        """Return the column assigned by `df.at[index, 'column']` or `df.loc[index, 'column']`"""
+
+        if (
+            self.index is not None
+            and isinstance(target, ast.Subscript)
+            and isinstance(target.value, ast.Attribute)
+            and target.value.attr in ("at", "loc")
+            and ast.dump(target.value.value) == ast.dump(self.frame)
+            and isinstance(target.slice, ast.Tuple)
+            and len(target.slice.elts) == 2
+            and isinstance(target.slice.elts[0], ast.Name)
+            and target.slice.elts[0].id == self.index
+        ):
+            return _column_name(target.slice.elts[1])
+        return None
+
+    def _convert_assignment(self, statement: ast.Assign | ast.AugAssign, mask: ast.AST | None) -> bool:
+        if isinstance(statement, ast.Assign):
+            if len(statement.targets) != 1:
+                return False
+            target = statement.targets[0]
+            column = self._column_target(target)
+            if column is not None:
+                return self._convert_column_assignment(column, statement.value, mask)
+            # `total = total + value`
+            if (
+                isinstance(target, ast.Name)
+                and isinstance(statement.value, ast.BinOp)
+                and isinstance(statement.value.left, ast.Name)
+                and statement.value.left.id == target.id
+            ):
+                self.accumulator_loads += 1
+                return self._convert_accumulation(target.id, statement.value.op, statement.value.right, mask)
+            return False
+
+        if isinstance(statement.target, ast.Name):
+            return self._convert_accumulation(statement.target.id, statement.op, statement.value, mask)
+        return False
+
+    def _convert_column_assignment(self, column: str, value: ast.AST, mask: ast.AST | None) -> bool:
+        vectorized = self.vectorizer.vectorize(value)
+        if vectorized is None:
+            return False
+        self.columns_written.add(column)
+        if mask is None:
+            target = ast.Subscript(value=copy.deepcopy(self.frame), slice=ast.Constant(column), ctx=ast.Store())
+        else:
+            target = ast.Subscript(
+                value=_attribute(copy.deepcopy(self.frame), "loc"),
+                slice=ast.Tuple(elts=[copy.deepcopy(mask), ast.Constant(column)], ctx=ast.Load()),
+                ctx=ast.Store(),
+            )
+        self.statements.append(ast.Assign(targets=[target], value=vectorized[0]))
+        return True
+
+    def _rows(self, mask: ast.AST | None) -> ast.AST:
+        """Number of rows matching the mask"""
+        if mask is None:
+            return _call(_name("len"), _attribute(copy.deepcopy(self.frame), "index"))
+        return _call(_name("int"), _method(copy.deepcopy(mask), "sum"))
+
+    def _selected(self, series: ast.AST, mask: ast.AST | None) -> ast.AST:
+        if mask is None:
+            return series
+        return ast.Subscript(value=series, slice=copy.deepcopy(mask), ctx=ast.Load())
+
+    def _convert_accumulation(self, name: str, op: ast.operator, value: ast.AST, mask: ast.AST | None) -> bool:
+        if not isinstance(op, (ast.Add, ast.Sub)) or name in self.accumulators:
+            return False
+        vectorized = self.vectorizer.vectorize(value)
+        if vectorized is None:
+            return False
+        self.accumulators.add(name)
+
+        if vectorized[1]:
+            # a NaN makes the Python sum NaN, while `sum()` skips it by default
+            total = _method(self._selected(vectorized[0], mask), "sum", skipna=ast.Constant(False))
+        else:
+            total = ast.BinOp(left=vectorized[0], op=ast.Mult(), right=self._rows(mask))
+        self.statements.append(ast.AugAssign(target=ast.Name(id=name, ctx=ast.Store()), op=op, value=total))
+        return True
+
+    def _convert_append(self, statement: ast.Expr, mask: ast.AST | None) -> bool:
+        call = statement.value
+        if not (
+            isinstance(call, ast.Call)
+            and isinstance(call.func, ast.Attribute)
+            and call.func.attr == "append"
+            and isinstance(call.func.value, ast.Name)
+            and len(call.args) == 1
+            and not call.keywords
+        ):
+            return False
+        name = call.func.value.id
+        vectorized = self.vectorizer.vectorize(call.args[0])
+        if name in self.accumulators or vectorized is None:
+            return False
+        self.accumulators.add(name)
+        self.accumulator_loads += 1
+
+        if vectorized[1]:
+            values = _method(self._selected(vectorized[0], mask), "tolist")
+        else:
+            repeated = ast.List(elts=[vectorized[0]], ctx=ast.Load())
+            values = ast.BinOp(left=repeated, op=ast.Mult(), right=self._rows(mask))
+        self.statements.append(ast.Expr(value=_method(_name(name), "extend", values)))
+        return True
+
+
+class CodeOptimizer(ast.NodeTransformer):
+    """
+    Rewrite the row-wise patterns of the sanitized code into vectorized code.
+
+    Args:
+        capture_result (bool): Assign the value of the last expression of the code to
+            `RESULT_VARIABLE` in the compiled code. Defaults to True.
+    """
+
+    def __init__(self, capture_result: bool = True):
+        self._capture_result = capture_result
+        self.optimizations = []
+        self._masks = 0
+        self._tree = None
+
+    def optimize(self, code: SanitizedCode) -> SanitizedCode:
+        """
+        Optimize the sanitized code.
+
+        Args:
+            code (SanitizedCode): The sanitized code.
+
+        Returns:
+            SanitizedCode: The optimized code, referencing the original code, or the
+                original code if no rule applies.
+        """
+
+        self.optimizations = []
+        self._tree = copy.deepcopy(code.tree)
+        tree = ast.fix_missing_locations(self.visit(self._tree))
+        if not self.optimizations:
+            return code
+
+        logging.info(f"Code optimizations applied: {', '.join(self.optimizations)}")
+        compiled_tree = capture_last_expression(tree) if self._capture_result else tree
+        optimized = SanitizedCode(tree, compile(compiled_tree, "<string>", "exec"))
+        optimized.original = code
+        optimized.optimizations = list(self.optimizations)
+        return optimized
+
+    def _mask_names(self):
+        while True:
+            self._masks += 1
+            yield f"__pandasai_mask_{self._masks}__"
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:  # noqa: N802
+        node = self.generic_visit(node)
+        func = node.func
+        if not isinstance(func, ast.Attribute):
+            return node
+        if func.attr == "apply":
+            return self._optimize_apply(node) or node
+        if func.attr == "map" and not node.keywords:
+            return self._optimize_apply(node) or node
+        return node
+
+    def _optimize_apply(self, node: ast.Call) -> ast.AST | None:
+        """`df.apply(lambda row: ..., axis=1)` and `series.apply(lambda x: ...)`"""
+
+        if len(node.args) != 1 or not isinstance(node.args[0], ast.Lambda):
+            return None
+        function = node.args[0]
+        if len(function.args.args) != 1 or function.args.vararg or function.args.kwarg or function.args.kwonlyargs:
+            return None
+        argument = function.args.args[0].arg
+        frame = node.func.value
+
+        keywords = {keyword.arg: keyword.value for keyword in node.keywords}
+        axis = keywords.pop("axis", None)
+        if keywords:
+            return None
+        if axis is not None:
+            if not (isinstance(axis, ast.Constant) and axis.value in (1, "columns")):
+                return None
+            vectorized = _Vectorizer(frame, row=argument).vectorize_rows(function.body)
+            rule = RULE_APPLY_ROWS
+        else:
+            vectorized = _Vectorizer(frame, element=argument).vectorize_rows(function.body)
+            rule = RULE_APPLY_ELEMENTS
+        if vectorized is None:
+            return None
+
+        self.optimizations.append(rule)
+        # the result of apply isn't named after the columns it's computed from
+        return _method(vectorized, "rename", ast.Constant(None)) if rule == RULE_APPLY_ROWS else vectorized
+
+    def visit_For(self, node: ast.For) -> ast.AST | list:  # noqa: N802
+        node = self.generic_visit(node)
+        if node.orelse:
+            return node
+        loop = self._rows_loop(node) or self._elements_loop(node)
+        if loop is None:
+            return node
+        vectorizer, frame, index, rule = loop
+
+        converter = _RowsLoop(vectorizer, frame, index, self._mask_names())
+        if not converter.convert(node.body):
+            return node
+
+        # the columns are read before the loop modifies them, the accumulators can't
+        # be read while accumulating, and the loop variables only exist in the loop
+        loop_variables = {n.id for n in ast.walk(node.target) if isinstance(n, ast.Name)}
+        if (
+            converter.columns_written & vectorizer.columns_read
+            or self._loads(node.body, converter.accumulators) != converter.accumulator_loads
+            or self._loads(converter.statements, loop_variables)
+            or self._loads([node], loop_variables) != self._loads([self._tree], loop_variables)
+        ):
+            return node
+
+        self.optimizations.append(rule)
+        return converter.statements
+
+    @staticmethod
+    def _loads(nodes: list, names: set) -> int:
+        """Return how many times the names are read in the nodes"""
+
+        return sum(
+            isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load) and n.id in names
+            for node in nodes
+            for n in ast.walk(node)
+        )
+
+    def _rows_loop(self, node: ast.For):
+        """`for index, row in df.iterrows():`"""
+
+        iterator = node.iter
+        if not (
+            isinstance(iterator, ast.Call)
+            and isinstance(iterator.func, ast.Attribute)
+            and iterator.func.attr == "iterrows"
+            and not iterator.args
+            and not iterator.keywords
+            and isinstance(iterator.func.value, ast.Name)
+            and isinstance(node.target, ast.Tuple)
+            and len(node.target.elts) == 2
+            and all(isinstance(element, ast.Name) for element in node.target.elts)
+        ):
+            return None
+        index, row = (element.id for element in node.target.elts)
+        frame = iterator.func.value
+        return _Vectorizer(frame, row=row), frame, index, RULE_ROWS_LOOP
+
+    def _elements_loop(self, node: ast.For):
+        """`for value in df['column']:`"""
+
+        iterator = node.iter
+        if (
+            isinstance(iterator, ast.Call)
+            and isinstance(iterator.func, ast.Attribute)
+            and iterator.func.attr == "tolist"
+            and not iterator.args
+        ):
+            iterator = iterator.func.value
+        if isinstance(iterator, ast.Attribute) and iterator.attr == "values":
+            iterator = iterator.value
+        if not (
+            isinstance(node.target, ast.Name)
+            and isinstance(iterator, ast.Subscript)
+            and isinstance(iterator.value, ast.Name)
+            and _column_name(iterator.slice) is not None
+        ):
+            return None
+        return _Vectorizer(iterator, element=node.target.id), iterator, None, RULE_ELEMENTS_LOOP
@@ -0,0 +1,376 @@
+"""
+Helper module to repair the generated code locally when it raises an error.
+
+Many errors of the generated code are mechanical: a column written with a different
+case or spacing, an aggregation of a dataframe with non-numeric columns, or a
+column of dates or numbers stored as strings. Such errors are fixed by rewriting the
+AST of the code, which is much faster than asking the LLM to correct it.
+
+Each repair handles some types of errors and either returns the repaired AST or
+None. Repairs are pluggable: custom ones subclass `CodeRepair`.
+
+Example:
+
+    ```
+    repairer = CodeRepairer()
+    repaired_code = repairer.repair(sanitized_code, error, df)
+    if repaired_code is not None:
+        print(repairer.repairs)
+    ```
+"""
+from __future__ import annotations
+
+import ast
+import copy
+import difflib
+import logging
+import re
+import warnings
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+import pandas as pd
+
+from pandasai.exceptions import MethodNotImplementedError
+
+from .code_sanitizer import SanitizedCode, capture_last_expression
+
+DATAFRAME_NAME = "df"
+
+# Minimum similarity of a missing column to an existing one to be remapped
+COLUMN_MATCH_CUTOFF = 0.8
+
+# Reductions failing on non-numeric columns unless `numeric_only=True` is passed
+NUMERIC_ONLY_METHODS = frozenset(
+    {"mean", "median", "std", "var", "sem", "skew", "kurt", "prod", "quantile", "corr", "cov"}
+)
+
+# Number of values of a column checked before converting it
+DTYPE_CHECK_ROWS = 1_000
+
+_DIGITS = re.compile(r"\d+")
+_QUOTED_NAME = re.compile(r"'([^']*)'")
+_MISSING_ATTRIBUTE = re.compile(r"has no attribute '([^']*)'")
+_FAILED_OPERATION = re.compile(r"(?:reduction|operation|how->)\s*'?(\w+)")
+_DATETIME_ERROR = re.compile(r"Timestamp|datetime|\.dt accessor")
+_DTYPE_ERROR = re.compile(r"not supported between|unsupported operand|string|'str'|dtype|Timestamp|datetime|accessor")
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[\s_\-]+", "", name.casefold())
+
+
+def match_column(name: str, columns: Iterable) -> str | None:
+    """
+    Return the column the name most likely refers to, if a single one does.
+
+    Names are first compared ignoring case, spaces, underscores and dashes, then
+    by similarity. Similar names with different digits (e.g. `revenue_2021` and
+    `revenue_2022`) are different columns, not typos, so they never match.
+
+    Args:
+        name (str): The name of the missing column.
+        columns (Iterable): The columns of the dataframe.
+
+    Returns:
+        str: The matching column, or None if there's none or several.
+    """
+
+    columns_by_name = {}
+    for column in columns:
+        if isinstance(column, str):
+            columns_by_name.setdefault(_normalize(column), []).append(column)
+
+    normalized = _normalize(name)
+    if normalized not in columns_by_name:
+        digits = _DIGITS.findall(normalized)
+        candidates = [candidate for candidate in columns_by_name if _DIGITS.findall(candidate) == digits]
+        matches = difflib.get_close_matches(normalized, candidates, n=2, cutoff=COLUMN_MATCH_CUTOFF)
+        if len(matches) != 1:
+            return None
+        normalized = matches[0]
+    matches = columns_by_name[normalized]
+    return matches[0] if len(matches) == 1 else None
+
+
+def _is_dataframe(node: ast.AST) -> bool:
+    return isinstance(node, ast.Name) and node.id == DATAFRAME_NAME
+
+
+def _column_read(node: ast.AST) -> str | None:
+    """Return the column read by `df['x']` or `df.x`, if the node is one"""
+
+    if not isinstance(getattr(node, "ctx", None), ast.Load):
+        return None
+    if isinstance(node, ast.Subscript) and _is_dataframe(node.value):
+        if isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str):
+            return node.slice.value
+    if isinstance(node, ast.Attribute) and _is_dataframe(node.value):
+        return node.attr
+    return None
+
+
+def _is_single_column(node: ast.AST) -> bool:
+    """Return True if the node selects a single column, e.g. `df['x']` or `groupby['x']`"""
+
+    if isinstance(node, ast.Subscript):
+        return isinstance(node.slice, ast.Constant)
+    return _column_read(node) is not None
+
+
+class CodeRepair(ABC):
+    """
+    Base class of the repairs of the generated code.
+
+    Attributes:
+        name (str): The name of the repair, as logged and recorded in the stats.
+        errors (tuple): The types of errors the repair handles.
+    """
+
+    name: str = ""
+    errors: tuple = ()
+
+    def handles(self, error: Exception) -> bool:
+        """Return True if the repair handles the error"""
+        return isinstance(error, self.errors)
+
+    @abstractmethod
+    def apply(self, tree: ast.Module, error: Exception, data_frame: pd.DataFrame) -> ast.Module | None:
+        """
+        Repair the AST of the code.
+
+        Args:
+            tree (ast.Module): A copy of the AST of the code, that can be modified.
+            error (Exception): The error raised by the code.
+            data_frame (pd.DataFrame): The dataframe the code runs against.
+
+        Returns:
+            ast.Module: The repaired AST, or None if the error can't be repaired.
+        """
+        raise MethodNotImplementedError("Apply method has not been implemented")
+
+
+class _ColumnRemapper(ast.NodeTransformer):
+    """Replace the names of missing columns with the matching columns"""
+
+    def __init__(self, mapping: dict):
+        self.mapping = mapping
+        self.changed = False
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:  # noqa: N802
+        if isinstance(node.value, str) and node.value in self.mapping:
+            self.changed = True
+            return ast.copy_location(ast.Constant(self.mapping[node.value]), node)
+        return node
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:  # noqa: N802
+        # constants compared to columns are values, not columns
+        if not isinstance(node.left, ast.Constant):
+            node.left = self.visit(node.left)
+        node.comparators = [
+            operand if isinstance(operand, ast.Constant) else self.visit(operand) for operand in node.comparators
+        ]
+        return node
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:  # noqa: N802
+        node = self.generic_visit(node)
+        if isinstance(node.ctx, ast.Load) and node.attr in self.mapping:
+            self.changed = True
+            column = ast.Constant(self.mapping[node.attr])
+            return ast.copy_location(ast.Subscript(value=node.value, slice=column, ctx=ast.Load()), node)
+        return node
+
+
+class ColumnNameRepair(CodeRepair):
+    """
+    Remap the columns that don't exist to the columns with the closest name, e.g.
+    `df['country ']` to `df['Country']`.
+    """
+
+    name = "column_name"
+    errors = (KeyError, AttributeError)
+
+    def apply(self, tree: ast.Module, error: Exception, data_frame: pd.DataFrame) -> ast.Module | None:
+        if isinstance(error, KeyError):
+            if not error.args or not isinstance(error.args[0], str):
+                return None
+            names = _QUOTED_NAME.findall(error.args[0]) or [error.args[0]]
+        else:
+            names = _MISSING_ATTRIBUTE.findall(str(error))
+
+        mapping = {}
+        for name in names:
+            if name not in data_frame.columns:
+                column = match_column(name, data_frame.columns)
+                if column is not None:
+                    mapping[name] = column
+        if not mapping:
+            return None
+
+        remapper = _ColumnRemapper(mapping)
+        tree = remapper.visit(tree)
+        return tree if remapper.changed else None
+
+
+class NumericOnlyRepair(CodeRepair):
+    """
+    Pass `numeric_only=True` to the reductions of dataframes and groupbys failing
+    on their non-numeric columns, e.g. `df.groupby('country').mean()`.
+    """
+
+    name = "numeric_only"
+    errors = (TypeError,)
+
+    def apply(self, tree: ast.Module, error: Exception, data_frame: pd.DataFrame) -> ast.Module | None:
+        methods = NUMERIC_ONLY_METHODS
+        operation = _FAILED_OPERATION.search(str(error))
+        if operation is not None:
+            if operation.group(1) not in NUMERIC_ONLY_METHODS:
+                return None
+            methods = {operation.group(1)}
+        elif "could not convert" not in str(error).lower():
+            return None
+
+        changed = False
+        for node in ast.walk(tree):
+            if (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and node.func.attr in methods
+                and all(keyword.arg != "numeric_only" for keyword in node.keywords)
+                and not _is_single_column(node.func.value)
+            ):
+                node.keywords.append(ast.keyword(arg="numeric_only", value=ast.Constant(True)))
+                changed = True
+        return tree if changed else None
+
+
+class _ColumnConverter(ast.NodeTransformer):
+    """Wrap the reads of the columns with their conversion, e.g. `pd.to_datetime(df['x'])`"""
+
+    def __init__(self, conversions: dict):
+        self.conversions = conversions
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:  # noqa: N802
+        function = node.func
+        if (
+            isinstance(function, ast.Attribute)
+            and isinstance(function.value, ast.Name)
+            and function.value.id == "pd"
+            and function.attr in ("to_numeric", "to_datetime")
+            and len(node.args) == 1
+            and _column_read(node.args[0]) is not None
+        ):
+            # already converted
+            return node
+        return self.generic_visit(node)
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        node = super().generic_visit(node)
+        column = _column_read(node)
+        if column not in self.conversions:
+            return node
+        function = ast.Attribute(value=ast.Name(id="pd", ctx=ast.Load()), attr=self.conversions[column], ctx=ast.Load())
+        return ast.copy_location(ast.Call(func=function, args=[node], keywords=[]), node)
+
+
+def _converts(values: pd.Series, converter) -> bool:
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            converter(values)
+    except (ValueError, TypeError, OverflowError):
+        return False
+    return True
+
+
+class DtypeRepair(CodeRepair):
+    """
+    Convert the columns of numbers or dates stored as strings before using them,
+    e.g. `df['date'].dt.year` to `pd.to_datetime(df['date']).dt.year`.
+    """
+
+    name = "dtype"
+    errors = (TypeError, AttributeError)
+
+    def handles(self, error: Exception) -> bool:
+        return super().handles(error) and _DTYPE_ERROR.search(str(error)) is not None
+
+    def apply(self, tree: ast.Module, error: Exception, data_frame: pd.DataFrame) -> ast.Module | None:
+        converters = ["to_numeric", "to_datetime"]
+        if _DATETIME_ERROR.search(str(error)):
+            converters.reverse()
+
+        conversions = {}
+        for node in ast.walk(tree):
+            column = _column_read(node)
+            if column is None or column in conversions or column not in data_frame.columns:
+                continue
+            values = data_frame[column]
+            if isinstance(values, pd.DataFrame) or not pd.api.types.is_string_dtype(values.dtype):
+                continue
+            values = values.dropna().head(DTYPE_CHECK_ROWS)
+            for converter in converters:
+                if _converts(values, getattr(pd, converter)):
+                    conversions[column] = converter
+                    break
+        if not conversions:
+            return None
+        return _ColumnConverter(conversions).visit(tree)
+
+
+DEFAULT_REPAIRS = (ColumnNameRepair(), NumericOnlyRepair(), DtypeRepair())
+
+
+class CodeRepairer:
+    """
+    Repair the sanitized code with the first repair fixing the error it raised.
+
+    Args:
+        repairs (Iterable[CodeRepair], optional): The repairs to try, in order.
+            Defaults to `DEFAULT_REPAIRS`.
+        capture_result (bool): Assign the value of the last expression of the
+            repaired code to `RESULT_VARIABLE`, like the sanitizer does. Defaults
+            to True.
+
+    Attributes:
+        repairs (list[str]): The names of the repairs applied by the last call to
+            `repair`.
+    """
+
+    def __init__(self, repairs: Iterable[CodeRepair] | None = None, capture_result: bool = True):
+        self._repairs = list(DEFAULT_REPAIRS if repairs is None else repairs)
+        self._capture_result = capture_result
+        self.repairs = []
+
+    def repair(self, code: SanitizedCode, error: Exception, data_frame: pd.DataFrame) -> SanitizedCode | None:
+        """
+        Repair the sanitized code.
+
+        Args:
+            code (SanitizedCode): The sanitized code that raised the error.
+            error (Exception): The error raised by the code.
+            data_frame (pd.DataFrame): The dataframe the code runs against.
+
+        Returns:
+            SanitizedCode: The repaired code, or None if no repair fixes the error.
+        """
+
+        self.repairs = []
+        for code_repair in self._repairs:
+            if not code_repair.handles(error):
+                continue
+            tree = code_repair.apply(copy.deepcopy(code.tree), error, data_frame)
+            if tree is None:
+                continue
+
+            tree = ast.fix_missing_locations(tree)
+            compiled_tree = capture_last_expression(tree) if self._capture_result else tree
+            try:
+                compiled = compile(compiled_tree, "<string>", "exec")
+            except (SyntaxError, ValueError, TypeError):
+                continue
+            self.repairs.append(code_repair.name)
+            logging.info(f"Code repaired ({code_repair.name}) after {error!r}")
+            return SanitizedCode(tree, compiled)
+        return None
@@ -0,0 +1,203 @@
+"""
+Helper module to sanitize the code generated by the LLM before running it.
+
+The code is parsed once and every sanitizing rule (unsafe imports, df overwrites,
+plots and charts saving) is applied in a single pass over the AST, which is then
+compiled directly, without being converted back to source code and parsed again.
+
+Example:
+
+    ```
+    from pandasai.helpers.code_sanitizer import CodeSanitizer
+
+    sanitized = CodeSanitizer().sanitize("import os\\ndf.head()")
+    exec(sanitized.code, environment)
+    ```
+"""
+from __future__ import annotations
+
+import ast
+import logging
+import os
+from types import CodeType
+
+import astor
+
+from ..constants import WHITELISTED_LIBRARIES
+from .save_chart import compare_ast
+
+# Name of the variable the value of the last expression of the code is assigned to
+RESULT_VARIABLE = "__pandasai_result__"
+
+_PLT_SHOW = ast.parse("plt.show()").body[0]
+
+
+def capture_last_expression(tree: ast.Module) -> ast.Module:
+    """
+    Return a new module assigning the value of the last expression to
+    `RESULT_VARIABLE`, so that it doesn't need to be evaluated again. A
+    trailing `print(value)` captures the printed value, and `print(a, b)` the
+    tuple of the printed values, which are still printed separately.
+    """
+
+    if not tree.body or not isinstance(tree.body[-1], ast.Expr):
+        return tree
+
+    last_expression = tree.body[-1]
+    value = last_expression.value
+    statements = []
+    if isinstance(value, ast.Call) and isinstance(value.func, ast.Name) and value.func.id == "print" and value.args:
+        # keep printing the arguments as they were, so the captured output doesn't change
+        result = ast.Name(id=RESULT_VARIABLE, ctx=ast.Load())
+        if len(value.args) == 1 and not isinstance(value.args[0], ast.Starred):
+            args = [result]
+            value = value.args[0]
+        else:
+            args = [ast.Starred(value=result, ctx=ast.Load())]
+            value = ast.Tuple(elts=value.args, ctx=ast.Load())
+        call = ast.Call(func=last_expression.value.func, args=args, keywords=last_expression.value.keywords)
+        statements.append(ast.Expr(value=call))
+
+    assignment = ast.Assign(targets=[ast.Name(id=RESULT_VARIABLE, ctx=ast.Store())], value=value)
+    statements.insert(0, assignment)
+    for statement in statements:
+        ast.copy_location(statement, last_expression)
+
+    return ast.fix_missing_locations(ast.Module(body=[*tree.body[:-1], *statements], type_ignores=[]))
+
+
+class SanitizedCode:
+    """
+    Sanitized code, ready to be run.
+
+    Args:
+        tree (ast.Module): The sanitized AST.
+        code (CodeType): The compiled sanitized AST.
+
+    Attributes:
+        original (SanitizedCode, optional): The code before it was optimized, if it was.
+        optimizations (list[str]): The names of the optimizations applied to the code.
+    """
+
+    def __init__(self, tree: ast.Module, code: CodeType):
+        self.tree = tree
+        self.code = code
+        self.original = None
+        self.optimizations = []
+        self._source = None
+
+    @property
+    def source(self) -> str:
+        """
+        Return the source of the sanitized code. It is generated on first access,
+        as it's only needed for logging and prompts.
+
+        Returns:
+            str: Source code
+        """
+        if self._source is None:
+            self._source = astor.to_source(self.tree).strip()
+        return self._source
+
+    def __str__(self) -> str:
+        return self.source
+
+
+class CodeSanitizer(ast.NodeTransformer):
+    """
+    Sanitize the generated code in a single pass over its AST.
+
+    Args:
+        remove_unsafe_imports (bool): Remove the imports of non-whitelisted libraries.
+            Defaults to True.
+        remove_df_overwrites (bool): Remove the assignments to `df`. Defaults to False.
+        remove_plots (bool): Remove the `.show()` calls. Defaults to True.
+        save_charts_to (str, optional): If set, `plt.show()` calls are replaced with
+            calls saving the charts as png files in this folder. Defaults to None.
+        capture_result (bool): Assign the value of the last expression of the code to
+            `RESULT_VARIABLE` in the compiled code, so that it can be read after running
+            it. The source of the sanitized code is not affected. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        remove_unsafe_imports: bool = True,
+        remove_df_overwrites: bool = False,
+        remove_plots: bool = True,
+        save_charts_to: str | None = None,
+        capture_result: bool = False,
+    ):
+        self._remove_unsafe_imports = remove_unsafe_imports
+        self._remove_df_overwrites = remove_df_overwrites
+        self._remove_plots = remove_plots
+        self._save_charts_to = save_charts_to
+        self._capture_result = capture_result
+        self._charts_count = 0
+        self._charts_saved = 0
+
+    def sanitize(self, code: str) -> SanitizedCode:
+        """
+        Parse, sanitize and compile the code.
+
+        Args:
+            code (str): Code to sanitize.
+
+        Returns:
+            SanitizedCode: The sanitized and compiled code.
+        """
+
+        tree = ast.parse(code)
+        if self._save_charts_to is not None:
+            self._charts_count = sum(compare_ast(node, _PLT_SHOW, ignore_args=True) for node in ast.walk(tree))
+            self._charts_saved = 0
+
+        tree = ast.fix_missing_locations(self.visit(tree))
+        compiled_tree = capture_last_expression(tree) if self._capture_result else tree
+        return SanitizedCode(tree, compile(compiled_tree, "<string>", "exec"))
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        node = super().generic_visit(node)
+        # a statement body can't be left empty when all its statements are removed
+        if not isinstance(node, ast.Module) and getattr(node, "body", None) == []:
+            node.body = [ast.Pass()]
+        return node
+
+    def _is_unsafe_import(self, node: ast.Import | ast.ImportFrom) -> bool:
+        return self._remove_unsafe_imports and any(alias.name not in WHITELISTED_LIBRARIES for alias in node.names)
+
+    def visit_Import(self, node: ast.Import) -> ast.AST | None:  # noqa: N802
+        return None if self._is_unsafe_import(node) else node
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> ast.AST | None:  # noqa: N802
+        return None if self._is_unsafe_import(node) else node
+
+    def visit_Assign(self, node: ast.Assign) -> ast.AST | None:  # noqa: N802
+        if self._remove_df_overwrites and isinstance(node.targets[0], ast.Name) and node.targets[0].id == "df":
+            return None
+        return self.generic_visit(node)
+
+    def visit_Expr(self, node: ast.Expr) -> ast.AST | None:  # noqa: N802
+        if (
+            isinstance(node.value, ast.Call)
+            and isinstance(node.value.func, ast.Attribute)
+            and node.value.func.attr == "show"
+        ):
+            if self._save_charts_to is not None and compare_ast(node, _PLT_SHOW, ignore_args=True):
+                return self._save_chart()
+            if self._remove_plots:
+                return None
+        return self.generic_visit(node)
+
+    def _save_chart(self) -> ast.AST:
+        """Return the statement saving the current chart to a file"""
+
+        os.makedirs(self._save_charts_to, exist_ok=True)
+
+        filename = "chart"
+        if self._charts_count > 1:
+            filename += f"_{chr(ord('a') + self._charts_saved)}"
+        self._charts_saved += 1
+
+        chart_save_path = os.path.join(self._save_charts_to, f"{filename}.png")
+        logging.info(f"Saving chart to: {chart_save_path}")
+        return ast.parse(f"plt.savefig(r'{chart_save_path}')").body[0]
@@ -0,0 +1,240 @@
+"""
+Helper module to find the columns of the dataframe the generated code uses.
+
+Dataframes can have hundreds of columns while a question typically uses a few of
+them. The sanitized AST is analyzed to find the columns the code reads through
+`df`: `df['x']`, `df.x`, `df[['a', 'b']]`, `df.loc[rows, 'x']`,
+`df.groupby('k')['v']`, `df.sort_values('x')[['a']]`, and so on. The code can then
+run on a dataframe made of those columns only.
+
+The analysis is conservative: as soon as the code uses `df` in a way whose
+columns can't be determined (e.g. `df.describe()`, `df.columns`, `df` passed to a
+function or assigned to another variable, or a result made of all the columns),
+no projection is returned and the code runs on the whole dataframe.
+
+Example:
+
+    ```
+    columns = referenced_columns(sanitized_code.tree, df.columns)
+    if columns is not None:
+        df = project_columns(df, columns)
+    ```
+"""
+from __future__ import annotations
+
+import ast
+from typing import Iterable
+
+import pandas as pd
+from pandas.core.groupby import DataFrameGroupBy
+
+from .copy_on_write import copy_on_write
+
+DATAFRAME_NAME = "df"
+
+# Methods returning rows of the dataframe, with all its columns, and the argument
+# naming the columns they use (by position and keyword), if they use some. Without
+# this argument, drop_duplicates and dropna would use all the columns.
+ROWS_METHODS = {
+    "sort_values": (0, "by"),
+    "nlargest": (1, "columns"),
+    "nsmallest": (1, "columns"),
+    "drop_duplicates": (0, "subset"),
+    "dropna": (None, "subset"),
+    "head": None,
+    "tail": None,
+    "sample": None,
+    "copy": None,
+    "sort_index": None,
+    "reset_index": None,
+}
+
+# Methods of the groupbys that only use the keys of the groupby
+GROUPBY_KEYS_METHODS = frozenset({"size", "ngroup", "cumcount"})
+
+# Attributes of the dataframe that don't depend on its columns (unlike `empty`,
+# which is True for a projection without columns)
+ROWS_ATTRIBUTES = frozenset({"index"})
+
+# Methods of the series building boolean masks
+MASK_METHODS = frozenset({"isin", "between", "isna", "isnull", "notna", "notnull", "duplicated", "contains"})
+
+
+def _constant_columns(node: ast.AST) -> list | None:
+    """Return the column names of a constant, or a list or tuple of constants"""
+
+    if isinstance(node, ast.Constant) and node.value is not None:
+        return [node.value]
+    if isinstance(node, (ast.List, ast.Tuple)) and all(isinstance(element, ast.Constant) for element in node.elts):
+        return [element.value for element in node.elts]
+    return None
+
+
+def _is_mask(node: ast.AST) -> bool:
+    """Return True if the expression is a boolean mask selecting rows"""
+
+    if isinstance(node, ast.Compare):
+        return True
+    if isinstance(node, ast.BinOp):
+        return isinstance(node.op, (ast.BitAnd, ast.BitOr, ast.BitXor))
+    if isinstance(node, ast.UnaryOp):
+        return isinstance(node.op, ast.Invert)
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in MASK_METHODS
+
+
+def _is_rows_slice(node: ast.AST) -> bool:
+    """Return True if the expression selects rows, with a mask or a slice"""
+
+    return isinstance(node, ast.Slice) or _is_mask(node)
+
+
+class _ColumnsFinder:
+    """Follow each use of `df` up its expression, collecting the columns it reads"""
+
+    def __init__(self, tree: ast.Module, columns: Iterable):
+        self.columns = set(columns)
+        self.referenced = set()
+        self.parents = {}
+        for node in ast.walk(tree):
+            for child in ast.iter_child_nodes(node):
+                self.parents[child] = node
+        self.tree = tree
+
+    def find(self) -> set | None:
+        for node in ast.walk(self.tree):
+            if isinstance(node, ast.Name) and node.id == DATAFRAME_NAME:
+                if not isinstance(node.ctx, ast.Load) or not self._follow(node):
+                    return None
+        return self.referenced
+
+    def _add(self, columns: list | None) -> bool:
+        if columns is None:
+            return False
+        self.referenced.update(column for column in columns if self._is_column(column))
+        return True
+
+    def _is_column(self, column) -> bool:
+        try:
+            return column in self.columns
+        except TypeError:
+            return False
+
+    def _follow(self, node: ast.AST) -> bool:
+        """
+        Follow the dataframe (with all its columns, and possibly a subset of its
+        rows) up the expression. Return False if its columns can't be determined.
+        """
+
+        parent = self.parents.get(node)
+        if isinstance(parent, ast.Subscript) and parent.value is node:
+            return self._follow_subscript(parent)
+        if isinstance(parent, ast.Call) and node in parent.args:
+            # the number of rows doesn't depend on the columns
+            return isinstance(parent.func, ast.Name) and parent.func.id == "len" and len(parent.args) == 1
+        if not isinstance(parent, ast.Attribute) or not isinstance(parent.ctx, ast.Load):
+            return False
+
+        attribute = parent.attr
+        call = self.parents.get(parent)
+        is_called = isinstance(call, ast.Call) and call.func is parent
+        if attribute in ROWS_ATTRIBUTES:
+            return True
+        if attribute == "shape":
+            shape = self.parents.get(parent)
+            return isinstance(shape, ast.Subscript) and isinstance(shape.slice, ast.Constant) and shape.slice.value == 0
+        if attribute == "loc":
+            return self._follow_loc(parent)
+        if attribute == "iloc":
+            iloc = self.parents.get(parent)
+            # positions of columns can't be mapped to the columns of the projection
+            return isinstance(iloc, ast.Subscript) and _is_rows_slice(iloc.slice) and self._follow(iloc)
+        if is_called and attribute in ROWS_METHODS:
+            if any(argument.arg == "axis" for argument in call.keywords):
+                return False
+            arguments = ROWS_METHODS[attribute]
+            return (arguments is None or self._add_arguments(call, *arguments)) and self._follow(call)
+        if is_called and attribute == "groupby":
+            return self._add_arguments(call, 0, "by") and self._follow_groupby(call)
+        if not is_called and self._is_column(attribute) and not hasattr(pd.DataFrame, attribute):
+            return self._add([attribute])
+        return False
+
+    def _add_arguments(self, call: ast.Call, position: int | None, keyword: str) -> bool:
+        """Add the columns named by the argument of the call, which is required"""
+
+        arguments = [argument.value for argument in call.keywords if argument.arg == keyword]
+        if position is not None and len(call.args) > position:
+            arguments.append(call.args[position])
+        return len(arguments) == 1 and self._add(_constant_columns(arguments[0]))
+
+    def _follow_subscript(self, subscript: ast.Subscript) -> bool:
+        columns = _constant_columns(subscript.slice)
+        if not isinstance(subscript.ctx, ast.Load):
+            # writing a column doesn't read the others
+            return self._add(columns)
+        if columns is not None:
+            return self._add(columns)
+        return _is_rows_slice(subscript.slice) and self._follow(subscript)
+
+    def _follow_loc(self, loc: ast.Attribute) -> bool:
+        subscript = self.parents.get(loc)
+        if not isinstance(subscript, ast.Subscript):
+            return False
+        selection = subscript.slice
+        if isinstance(selection, ast.Tuple) and len(selection.elts) == 2:
+            rows, columns = selection.elts
+            if not (_is_rows_slice(rows) or _constant_columns(rows) is not None):
+                return False
+            if isinstance(columns, ast.Slice) and columns.lower is None and columns.upper is None:
+                return isinstance(subscript.ctx, ast.Load) and self._follow(subscript)
+            return self._add(_constant_columns(columns))
+        if not isinstance(subscript.ctx, ast.Load):
+            return False
+        return (_is_rows_slice(selection) or _constant_columns(selection) is not None) and self._follow(subscript)
+
+    def _follow_groupby(self, groupby: ast.Call) -> bool:
+        parent = self.parents.get(groupby)
+        if isinstance(parent, ast.Subscript) and parent.value is groupby:
+            return self._add(_constant_columns(parent.slice))
+        if not isinstance(parent, ast.Attribute):
+            return False
+        call = self.parents.get(parent)
+        if parent.attr in GROUPBY_KEYS_METHODS:
+            return isinstance(call, ast.Call) and call.func is parent
+        if parent.attr == "agg" and isinstance(call, ast.Call) and call.args and isinstance(call.args[0], ast.Dict):
+            return all(self._add(_constant_columns(key)) for key in call.args[0].keys)
+        is_called = isinstance(call, ast.Call) and call.func is parent
+        if not is_called and self._is_column(parent.attr) and not hasattr(DataFrameGroupBy, parent.attr):
+            return self._add([parent.attr])
+        return False
+
+
+def referenced_columns(tree: ast.Module, columns: Iterable) -> set | None:
+    """
+    Return the columns of the dataframe read by the code.
+
+    Args:
+        tree (ast.Module): The AST of the sanitized code.
+        columns (Iterable): The columns of the dataframe.
+
+    Returns:
+        set: The columns read by the code, or None if they can't be determined.
+    """
+
+    return _ColumnsFinder(tree, columns).find()
+
+
+def project_columns(data_frame: pd.DataFrame, columns: set) -> pd.DataFrame:
+    """
+    Return a view of the dataframe made of the columns only, in their order.
+
+    Args:
+        data_frame (pd.DataFrame): The dataframe.
+        columns (set): The columns to keep.
+
+    Returns:
+        pd.DataFrame: The projected dataframe.
+    """
+
+    with copy_on_write():
+        return data_frame.loc[:, data_frame.columns.isin(list(columns))]
@@ -0,0 +1,151 @@
+"""
+Helper functions to hand a DataFrame to the generated code without copying it.
+
+The generated code receives a shallow copy of the user's DataFrame created under
+pandas Copy-on-Write. The shallow copy shares its memory with the original one,
+and pandas only copies a column when the generated code writes to it, so the
+user's DataFrame can never be modified and untouched columns are never copied.
+Before pandas 3.0, Copy-on-Write is only enabled while the code runs, so a result
+sharing its memory with the user's DataFrame must be detached from it with
+`detach_result` before leaving the context.
+
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+import pandas as pd
+from pandas.util.version import Version
+
+# Copy-on-Write is always enabled (and the option deprecated) since pandas 3.0
+COPY_ON_WRITE_ALWAYS_ENABLED = Version(pd.__version__) >= Version("3.0.0")
+
+# pandas options are global, so Copy-on-Write stays enabled as long as one thread
+# needs it, and the previous value is only restored by the last one
+_lock = threading.Lock()
+_active_users = 0
+_previous_value = None
+
+
+def copy_on_write():
+    """
+    Return a context manager enabling pandas Copy-on-Write.
+
+    Returns:
+        A context manager enabling Copy-on-Write for the pandas versions
+        in which it is not enabled by default.
+    """
+
+    if COPY_ON_WRITE_ALWAYS_ENABLED:
+        return nullcontext()
+    return _shared_copy_on_write()
+
+
+@contextmanager
+def _shared_copy_on_write():
+    """Enable Copy-on-Write, safely when used from multiple threads at once"""
+
+    global _active_users, _previous_value  # pylint: disable=global-statement
+
+    with _lock:
+        if _active_users == 0:
+            _previous_value = pd.get_option("mode.copy_on_write")
+            pd.set_option("mode.copy_on_write", True)
+        _active_users += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _active_users -= 1
+            if _active_users == 0:
+                pd.set_option("mode.copy_on_write", _previous_value)
+
+
+def zero_copy_view(data_frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return a view of the DataFrame that shares its memory with the original one.
+
+    The view must be created and used within the `copy_on_write` context, so that
+    writes to the view copy the modified columns instead of modifying the original
+    DataFrame.
+
+    Args:
+        data_frame (pd.DataFrame): The DataFrame to create the view from.
+
+    Returns (pd.DataFrame): A shallow copy of the DataFrame.
+    """
+
+    return data_frame.copy(deep=False)
+
+
+def detach_result(value, data_frame: pd.DataFrame):
+    """
+    Return the result of the generated code, copied if it may share its memory
+    with the DataFrame and Copy-on-Write isn't always enabled, so that writing to
+    it once out of the `copy_on_write` context can't modify the DataFrame.
+
+    Args:
+        value: The result of the generated code, e.g. `df[["a"]]`.
+        data_frame (pd.DataFrame): The DataFrame the code ran against.
+
+    Returns: The result, or a copy of it.
+    """
+
+    if COPY_ON_WRITE_ALWAYS_ENABLED:
+        return value
+
+    if isinstance(value, pd.DataFrame):
+        buffers = [_column_buffer(value.iloc[:, i]) for i in range(value.shape[1])]
+    elif isinstance(value, (pd.Series, pd.Index)):
+        buffers = [_column_buffer(pd.Series(value, copy=False))]
+    elif isinstance(value, np.ndarray):
+        buffers = [value]
+    else:
+        return value
+
+    originals = [_column_buffer(data_frame.iloc[:, i]) for i in range(data_frame.shape[1])]
+    originals.append(np.asarray(data_frame.index))
+    if any(np.may_share_memory(buffer, original) for buffer in buffers for original in originals):
+        return value.copy()
+    return value
+
+
+def _column_buffer(series: pd.Series) -> np.ndarray:
+    """Return the numpy array holding the values of a column."""
+
+    values = series.array
+    if isinstance(values, pd.Categorical):
+        return values.codes
+    return np.asarray(values)
+
+
+def bytes_copied(original: pd.DataFrame, view: pd.DataFrame) -> int:
+    """
+    Estimate the number of bytes of the original DataFrame copied by the view.
+
+    A column of the view that no longer shares its memory with the same column of
+    the original DataFrame has been copied (e.g. because it has been written to).
+    Columns that only exist in the view are new data and are not counted.
+
+    Args:
+        original (pd.DataFrame): The DataFrame the view has been created from.
+        view (pd.DataFrame): The view, after the generated code has run on it.
+
+    Returns (int): The number of bytes copied.
+    """
+
+    if original is view:
+        return 0
+
+    # columns can't be matched reliably when their labels are duplicated
+    if not (original.columns.is_unique and view.columns.is_unique):
+        return 0
+
+    copied = 0
+    for column in view.columns.intersection(original.columns):
+        view_buffer = _column_buffer(view[column])
+        if not np.shares_memory(view_buffer, _column_buffer(original[column])):
+            copied += view_buffer.nbytes
+    return copied
@@ -0,0 +1,258 @@
+"""
+Helper module to fingerprint the content of dataframes, e.g. to key caches.
+
+Hashing a large dataframe with `pd.util.hash_pandas_object` on every request can
+cost more than the query itself. The fingerprints are computed column by column,
+hashing the raw bytes of the numeric columns block of rows by block of rows, and
+falling back to `pd.util.hash_pandas_object` for the other columns. Four modes
+trade exactness for speed:
+
+- `full`: every value of every column is hashed;
+- `incremental`: the fingerprints of the columns are remembered per dataframe,
+  and only the columns that changed since the last fingerprint are hashed again.
+  A column is considered unchanged if it's still backed by the same array and a
+  sample of its values is unchanged, so writes in place outside of the sample
+  are not detected;
+- `sample`: only a deterministic sample of the rows is hashed;
+- `metadata`: only the shape, columns, dtypes and the arrays backing the columns
+  are fingerprinted. It identifies a version of a dataframe object, not its
+  content, so copies of a dataframe have different fingerprints.
+
+Example:
+
+    ```
+    from pandasai.helpers.fingerprint import Fingerprinter
+
+    fingerprinter = Fingerprinter(mode="incremental")
+    key = fingerprinter.fingerprint(df)
+    df["total"] = df["price"] * df["quantity"]
+    key = fingerprinter.fingerprint(df)  # only hashes the "total" column
+    ```
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import weakref
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+MODE_FULL = "full"
+MODE_INCREMENTAL = "incremental"
+MODE_SAMPLE = "sample"
+MODE_METADATA = "metadata"
+MODES = (MODE_FULL, MODE_INCREMENTAL, MODE_SAMPLE, MODE_METADATA)
+
+# numpy dtypes whose raw bytes identify their values
+_RAW_DTYPE_KINDS = "biufcmM"
+
+
+def _digest() -> hashlib.blake2b:
+    return hashlib.blake2b(digest_size=16)
+
+
+def _sample_positions(rows: int, size: int) -> np.ndarray:
+    """Return evenly spaced positions of rows, including the first and the last ones"""
+
+    if rows <= size:
+        return np.arange(rows)
+    return np.unique(np.linspace(0, rows - 1, size).astype(np.int64))
+
+
+def _hash_values(values: pd.Series | pd.Index, block_rows: int) -> bytes:
+    """Hash the values of a column (or an index), block of rows by block of rows"""
+
+    digest = _digest()
+    digest.update(str(values.dtype).encode("utf-8"))
+    if isinstance(values, pd.RangeIndex):
+        digest.update(repr(values).encode("utf-8"))
+        return digest.digest()
+    raw = isinstance(values.dtype, np.dtype) and values.dtype.kind in _RAW_DTYPE_KINDS
+    array = values.to_numpy() if raw else None
+    for start in range(0, len(values), block_rows):
+        if raw:
+            digest.update(np.ascontiguousarray(array[start : start + block_rows]).view(np.uint8))
+        else:
+            block = values[start : start + block_rows]
+            digest.update(pd.util.hash_pandas_object(block, index=False).to_numpy().tobytes())
+    return digest.digest()
+
+
+def _array_token(values: pd.Series | pd.Index) -> tuple:
+    """Return a token identifying the array backing a column (or an index)"""
+
+    if isinstance(values, pd.RangeIndex):
+        return repr(values)
+    if isinstance(values.dtype, np.dtype):
+        array = values.to_numpy()
+        return str(values.dtype), array.__array_interface__["data"][0], array.shape, array.strides
+    return str(values.dtype), id(values.array), len(values)
+
+
+class Fingerprinter:
+    """
+    Compute the fingerprints of dataframes. In `incremental` mode, the fingerprints
+    of the columns of the dataframes are remembered, as long as the dataframes
+    exist. It is safe to use from multiple threads.
+
+    Args:
+        mode (str): One of `full`, `incremental`, `sample` or `metadata`. Defaults to
+            `full`.
+        sample_size (int): Number of rows hashed in `sample` mode, and number of
+            values checked to detect the changes of a column in `incremental` mode.
+            Defaults to 10000.
+        block_rows (int): Number of rows hashed at once. Defaults to 1000000.
+    """
+
+    def __init__(self, mode: str = MODE_FULL, sample_size: int = 10_000, block_rows: int = 1_000_000):
+        if mode not in MODES:
+            raise ValueError(f"Unknown fingerprint mode: {mode}. Expected one of: {', '.join(MODES)}")
+        self.mode = mode
+        self.sample_size = sample_size
+        self.block_rows = block_rows
+        # Names of the columns hashed by the last call of each thread
+        self._local = threading.local()
+        # Maps the id of a dataframe to its weak reference and the fingerprints of its columns
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    @property
+    def last_hashed_columns(self) -> list:
+        """The names of the columns hashed by the last call of the current thread"""
+        return getattr(self._local, "hashed_columns", [])
+
+    @last_hashed_columns.setter
+    def last_hashed_columns(self, columns: list) -> None:
+        self._local.hashed_columns = columns
+
+    def fingerprint(self, data_frame: pd.DataFrame, columns: Iterable | None = None) -> str:
+        """
+        Return the fingerprint of the dataframe.
+
+        Args:
+            data_frame (pd.DataFrame): The dataframe.
+            columns (Iterable, optional): If set, only these columns (and the index)
+                are fingerprinted. Defaults to None.
+
+        Returns:
+            str: The fingerprint.
+        """
+
+        fingerprints = self.column_fingerprints(data_frame, columns)
+        digest = _digest()
+        names = [key[1] for key in fingerprints if key is not None]
+        digest.update(repr((self.mode, len(data_frame), names)).encode("utf-8"))
+        for column in fingerprints.values():
+            digest.update(column)
+        return digest.hexdigest()
+
+    def column_fingerprints(self, data_frame: pd.DataFrame, columns: Iterable | None = None) -> dict:
+        """
+        Return the fingerprints of the index and the columns of the dataframe.
+
+        Args:
+            data_frame (pd.DataFrame): The dataframe.
+            columns (Iterable, optional): If set, only these columns (and the index)
+                are fingerprinted. Defaults to None.
+
+        Returns:
+            dict: Maps the position and the name of the columns (None for the index)
+                to their fingerprint.
+        """
+
+        if self.mode == MODE_SAMPLE:
+            positions = _sample_positions(len(data_frame), self.sample_size)
+            data_frame = data_frame.take(positions)
+
+        selected = None if columns is None else set(columns)
+        columns = {None: data_frame.index}
+        columns.update(
+            ((position, name), data_frame.iloc[:, position])
+            for position, name in enumerate(data_frame.columns)
+            if selected is None or name in selected
+        )
+
+        if self.mode == MODE_METADATA:
+            self.last_hashed_columns = []
+            return {key: repr(_array_token(values)).encode("utf-8") for key, values in columns.items()}
+        if self.mode != MODE_INCREMENTAL:
+            self.last_hashed_columns = [key[1] for key in columns if key is not None]
+            return {key: _hash_values(values, self.block_rows) for key, values in columns.items()}
+
+        remembered = self._remembered(data_frame)
+        with self._lock:
+            previous = dict(remembered)
+
+        # the columns are hashed without holding the lock, other threads update the
+        # fingerprints they computed meanwhile
+        fingerprints = {}
+        updated = {}
+        for key, values in columns.items():
+            version = (_array_token(values), self._probe(values))
+            if key in previous and previous[key][0] == version:
+                fingerprints[key] = previous[key][1]
+                continue
+            fingerprints[key] = _hash_values(values, self.block_rows)
+            updated[key] = (version, fingerprints[key])
+
+        with self._lock:
+            remembered.update(updated)
+            if selected is None:
+                for key in set(remembered) - set(columns):
+                    del remembered[key]
+        self.last_hashed_columns = [key[1] for key in updated if key is not None]
+        return fingerprints
+
+    def _probe(self, values: pd.Series | pd.Index) -> bytes:
+        """Hash a sample of the values, to detect most of the writes in place"""
+
+        positions = _sample_positions(len(values), self.sample_size)
+        return _hash_values(values.take(positions), self.block_rows)
+
+    def _remembered(self, data_frame: pd.DataFrame) -> dict:
+        """Return the fingerprints remembered for the columns of the dataframe"""
+
+        key = id(data_frame)
+        with self._lock:
+            reference, remembered = self._memo.get(key, (None, None))
+            if reference is None or reference() is not data_frame:
+                remembered = {}
+                self._memo[key] = (weakref.ref(data_frame, lambda _: self._forget_id(key)), remembered)
+            return remembered
+
+    def _forget_id(self, key: int) -> None:
+        with self._lock:
+            self._memo.pop(key, None)
+
+    def forget(self, data_frame: pd.DataFrame | None = None) -> None:
+        """
+        Forget the fingerprints remembered for the dataframe, e.g. after writing in
+        place into its columns, or for all the dataframes.
+
+        Args:
+            data_frame (pd.DataFrame, optional): The dataframe. Defaults to None.
+        """
+
+        with self._lock:
+            if data_frame is None:
+                self._memo.clear()
+            else:
+                self._memo.pop(id(data_frame), None)
+
+
+def fingerprint(data_frame: pd.DataFrame, mode: str = MODE_FULL, sample_size: int = 10_000) -> str:
+    """
+    Return the fingerprint of the dataframe, without remembering it.
+
+    Args:
+        data_frame (pd.DataFrame): The dataframe.
+        mode (str): One of `full`, `sample` or `metadata`. Defaults to `full`.
+        sample_size (int): Number of rows hashed in `sample` mode. Defaults to 10000.
+
+    Returns:
+        str: The fingerprint.
+    """
+
+    return Fingerprinter(mode=mode, sample_size=sample_size).fingerprint(data_frame)
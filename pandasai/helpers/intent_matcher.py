@@ -0,0 +1,138 @@
+"""
+Helper module to answer trivial questions without calling the LLM.
+
+Questions like "How many rows are there?", "Average of loan_amount" or "Unique
+values of education" map to a single pandas expression. They are matched against
+a few patterns and the columns of the dataframe, and the equivalent code is
+returned. The code returns a dataframe, like the coerced result of the equivalent
+expression, so that it's never corrected by the LLM. Questions that don't match a pattern exactly, or that name a column
+that doesn't exist (or one whose dtype doesn't fit the aggregation), are not
+matched and go to the LLM.
+
+Example:
+
+    ```
+    code = match_intent("What is the average loan amount?", df)
+    # "pd.DataFrame({'value': [df['loan_amount'].mean()]})"
+    ```
+"""
+from __future__ import annotations
+
+import re
+
+import pandas as pd
+
+from .result_coercion import VALUE_COLUMN
+
+# Words around the question that don't change its meaning
+_PREFIX = re.compile(
+    r"^(?:(?:what is|what's|what are|show|show me|give me|tell me|return|find|compute|calculate|get|list)\s+)?"
+    r"(?:the\s+)?"
+)
+_SUFFIX = re.compile(r"\s*(?:in the (?:dataframe|dataset|data|table))?\s*[?.!]*$")
+
+_TABLE = r"(?:the\s+)?(?:dataframe|dataset|data|table|df)"
+
+_COUNT_ROWS = re.compile(
+    r"^(?:"
+    rf"how many (?:rows|records|entries)(?: are there| does {_TABLE} have| (?:are )?in {_TABLE})?"
+    rf"|(?:total\s+)?(?:number|count) of (?:rows|records|entries)(?: (?:in|of) {_TABLE})?"
+    r"|(?:row|record) count"
+    r")$"
+)
+_COUNT_UNIQUE = re.compile(
+    r"^(?:how many (?:unique|distinct|different) (?P<column1>.+?)(?: are there)?"
+    r"|(?:number|count) of (?:unique|distinct|different) (?:values of |values in )?(?P<column2>.+))$"
+)
+_UNIQUE = re.compile(
+    r"^(?:(?:list of |all )?(?:the\s+)?(?:unique|distinct|different) (?:values (?:of|in|for) )?(?P<column>.+))$"
+)
+_AGGREGATE = re.compile(
+    r"^(?P<function>average|avg|mean|median|sum|total|max|maximum|highest|largest|min|minimum|lowest|smallest"
+    r"|standard deviation|std)(?: value)?(?: (?:of|for))?(?: the)? (?P<column>.+)$"
+)
+
+# Aggregations, and whether they need a numeric column
+_FUNCTIONS = {
+    "average": ("mean", True),
+    "avg": ("mean", True),
+    "mean": ("mean", True),
+    "median": ("median", True),
+    "sum": ("sum", True),
+    "total": ("sum", True),
+    "standard deviation": ("std", True),
+    "std": ("std", True),
+    "max": ("max", False),
+    "maximum": ("max", False),
+    "highest": ("max", False),
+    "largest": ("max", False),
+    "min": ("min", False),
+    "minimum": ("min", False),
+    "lowest": ("min", False),
+    "smallest": ("min", False),
+}
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[\s_\-]+", " ", name.casefold()).strip()
+
+
+def _find_column(name: str, data_frame: pd.DataFrame):
+    """Return the only column named like the name, ignoring case, spaces and underscores"""
+
+    name = _normalize(name.strip("'\"` "))
+    matches = [column for column in data_frame.columns if isinstance(column, str) and _normalize(column) == name]
+    return matches[0] if len(matches) == 1 else None
+
+
+def _value(expression: str) -> str:
+    """Return the code of a one cell dataframe holding the value of the expression"""
+    return f"pd.DataFrame({{{VALUE_COLUMN!r}: [{expression}]}})"
+
+
+def _normalize_question(question: str) -> str:
+    question = re.sub(r"\s+", " ", question.casefold()).strip()
+    question = _SUFFIX.sub("", question)
+    return _PREFIX.sub("", question, count=1)
+
+
+def match_intent(question: str, data_frame: pd.DataFrame) -> str | None:
+    """
+    Return the code answering the question, if it's a trivial count, distinct or
+    aggregate question about a column of the dataframe.
+
+    Args:
+        question (str): The question.
+        data_frame (pd.DataFrame): The dataframe the question is about.
+
+    Returns:
+        str: The code answering the question, or None if the question isn't matched.
+    """
+
+    question = _normalize_question(question)
+
+    if _COUNT_ROWS.match(question):
+        return _value("len(df)")
+
+    match = _COUNT_UNIQUE.match(question)
+    if match:
+        column = _find_column(match.group("column1") or match.group("column2"), data_frame)
+        return None if column is None else _value(f"df[{column!r}].nunique()")
+
+    match = _UNIQUE.match(question)
+    if match:
+        column = _find_column(match.group("column"), data_frame)
+        return None if column is None else f"df[[{column!r}]].drop_duplicates()"
+
+    match = _AGGREGATE.match(question)
+    if match:
+        column = _find_column(match.group("column"), data_frame)
+        if column is None:
+            return None
+        function, numeric = _FUNCTIONS[match.group("function")]
+        dtype = data_frame[column].dtype
+        if numeric and (not pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)):
+            return None
+        return _value(f"df[{column!r}].{function}()")
+
+    return None
@@ -0,0 +1,86 @@
+"""In-memory LRU cache module."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """In-memory cache evicting the least recently used entries when full.
+    It counts its hits and misses, and it is safe to use from multiple threads.
+
+    Args:
+        maxsize (int): maximum number of entries stored in the cache.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        if maxsize < 0:
+            raise ValueError("maxsize must be greater than or equal to zero")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value from the cache, marking it as the most recently used.
+
+        Args:
+            key (Hashable): key to get the value from the cache.
+            default (Any): value to return if the key is not in the cache.
+
+        Returns:
+            Any: value from the cache, or the default value.
+        """
+
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Set a key value pair in the cache, evicting the least recently
+        used entries if the cache is full.
+
+        Args:
+            key (Hashable): key to store the value.
+            value (Any): value to store in the cache.
+        """
+
+        if self.maxsize == 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Delete a key value pair from the cache.
+
+        Args:
+            key (Hashable): key to delete the value from the cache.
+        """
+
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Clear the cache and its statistics."""
+
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
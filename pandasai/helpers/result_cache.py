@@ -0,0 +1,228 @@
+"""
+Helper module to cache the results of the generated code.
+
+Users often ask questions that end up as the same generated code, run against a
+dataframe that hasn't changed. The results are cached by the content of the
+dataframe and the sanitized code, so such runs return the stored result without
+running the code again.
+
+The cache is bounded by the memory used by its results, evicting the least
+recently used results first. Results larger than a threshold can be spilled to
+Parquet files instead of being kept in memory.
+
+Example:
+
+    ```
+    cache = ResultCache(max_bytes=64 * 1024**2, spill_dir="cache/results")
+    key = cache.key(cache.fingerprint(df), sanitized_code.source)
+    result = cache.get(key)
+    if result is None:
+        result = run(sanitized_code, df)
+        cache.set(key, result)
+    ```
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable
+
+import pandas as pd
+
+from ._optional import import_dependency
+from .fingerprint import MODE_FULL, Fingerprinter
+
+
+@dataclass
+class _Entry:
+    """A cached result, kept in memory or spilled to a Parquet file"""
+
+    nbytes: int
+    value: pd.DataFrame | None = None
+    path: str | None = None
+
+
+class ResultCache:
+    """
+    Cache of the results of the generated code, evicting the least recently used
+    results when full. It counts its hits and misses, and it is safe to use from
+    multiple threads.
+
+    Args:
+        max_bytes (int): Maximum memory used by the results kept in memory.
+            Defaults to 256 MB.
+        max_entries (int): Maximum number of results, in memory or spilled.
+            Defaults to 128.
+        spill_dir (str, optional): If set, the results larger than `spill_threshold`
+            are written to Parquet files in this folder instead of being kept in
+            memory. Requires pyarrow. Defaults to None.
+        spill_threshold (int): Size of the results spilled to disk, in bytes.
+            Defaults to 16 MB.
+        fingerprint_mode (str): How the dataframes are fingerprinted, see
+            `Fingerprinter`. Defaults to `full`.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024**2,
+        max_entries: int = 128,
+        spill_dir: str | None = None,
+        spill_threshold: int = 16 * 1024**2,
+        fingerprint_mode: str = MODE_FULL,
+    ):
+        if max_bytes < 0 or max_entries < 0:
+            raise ValueError("max_bytes and max_entries must be greater than or equal to zero")
+        if spill_dir is not None:
+            import_dependency("pyarrow", extra="pyarrow is required to spill the cached results to disk.")
+            os.makedirs(spill_dir, exist_ok=True)
+
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.spill_threshold = spill_threshold
+        self.fingerprinter = Fingerprinter(mode=fingerprint_mode)
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fingerprint(self, data_frame: pd.DataFrame, columns: Iterable | None = None) -> str:
+        """
+        Return the fingerprint of the dataframe.
+
+        Args:
+            data_frame (pd.DataFrame): The dataframe.
+            columns (Iterable, optional): If set, only these columns are
+                fingerprinted, e.g. the columns used by the code. Defaults to None.
+
+        Returns:
+            str: The fingerprint.
+        """
+
+        return self.fingerprinter.fingerprint(data_frame, columns)
+
+    @staticmethod
+    def key(data_fingerprint: str, code: str) -> str:
+        """
+        Return the key of the result of the code run against a dataframe.
+
+        Args:
+            data_fingerprint (str): The fingerprint of the dataframe.
+            code (str): The sanitized code.
+
+        Returns:
+            str: The key.
+        """
+
+        return f"{data_fingerprint}:{hashlib.sha256(code.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        """
+        Get a result from the cache, marking it as the most recently used.
+
+        Args:
+            key (str): The key of the result.
+
+        Returns:
+            pd.DataFrame: A copy of the result, or None if it's not in the cache.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        if entry.path is not None:
+            try:
+                return pd.read_parquet(entry.path)
+            except OSError:
+                # the entry has been evicted by another thread since
+                return None
+        return entry.value.copy()
+
+    def set(self, key: str, value: pd.DataFrame) -> None:
+        """
+        Store a result in the cache, evicting the least recently used results
+        if the cache is full. A copy of the result is stored, so that changing
+        the result doesn't change the cache.
+
+        Args:
+            key (str): The key of the result.
+            value (pd.DataFrame): The result.
+        """
+
+        if self.max_entries == 0:
+            return
+        nbytes = int(value.memory_usage(index=True, deep=True).sum())
+        if self.spill_dir is not None and nbytes > self.spill_threshold:
+            entry = self._spill(value, nbytes)
+            if entry is None:
+                return
+        elif nbytes <= self.max_bytes:
+            entry = _Entry(nbytes, value=value.copy())
+        else:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            if entry.value is not None:
+                self.nbytes += nbytes
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _spill(self, value: pd.DataFrame, nbytes: int) -> _Entry | None:
+        """Write the result to a Parquet file, or return None if it can't be written"""
+
+        path = os.path.join(self.spill_dir, f"{uuid.uuid4().hex}.parquet")
+        try:
+            value.to_parquet(path)
+        except (ValueError, TypeError, OSError, ImportError):
+            # e.g. columns names that aren't strings, or mixed types in a column
+            return None
+        return _Entry(nbytes, path=path)
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry, and its file if it has been spilled. The lock must be held."""
+
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        if entry.value is not None:
+            self.nbytes -= entry.nbytes
+        if entry.path is not None and os.path.exists(entry.path):
+            os.remove(entry.path)
+
+    def delete(self, key: str) -> None:
+        """
+        Delete a result from the cache.
+
+        Args:
+            key (str): The key of the result.
+        """
+
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """Clear the cache, its spilled files and its statistics."""
+
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
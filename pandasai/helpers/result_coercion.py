@@ -0,0 +1,80 @@
+"""
+Helper module to coerce the value returned by the generated code to a dataframe.
+
+The generated code is expected to return a dataframe, but it often returns a
+series (e.g. the result of a groupby), a scalar (e.g. a count or an average), a
+dict or a list. Those values are converted locally, instead of asking the LLM to
+correct the code.
+
+Example:
+
+    ```
+    coerce_to_data_frame(df.groupby("country")["gdp"].sum())
+    coerce_to_data_frame(len(df))
+    ```
+"""
+from __future__ import annotations
+
+import datetime
+import numbers
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+# Name of the column of the dataframes built from unnamed values
+VALUE_COLUMN = "value"
+
+_SCALAR_TYPES = (numbers.Number, str, bytes, bool, np.generic, datetime.date, datetime.timedelta, pd.Timedelta)
+
+
+def _is_scalar(value: Any) -> bool:
+    return isinstance(value, _SCALAR_TYPES)
+
+
+def _coerce(value: Any) -> pd.DataFrame | None:
+    if isinstance(value, pd.DataFrame):
+        return value
+    if isinstance(value, pd.Series):
+        # the index is kept, e.g. the keys of a groupby
+        return value.to_frame(name=VALUE_COLUMN if value.name is None else value.name)
+    if isinstance(value, pd.Index):
+        return value.to_frame(index=False, name=VALUE_COLUMN if value.name is None else value.name)
+    if _is_scalar(value):
+        return pd.DataFrame({VALUE_COLUMN: [value]})
+    if isinstance(value, np.ndarray) and value.ndim == 1:
+        return pd.DataFrame({VALUE_COLUMN: value})
+    if isinstance(value, np.ndarray) and value.ndim == 2:
+        return pd.DataFrame(value)
+    if isinstance(value, dict) and value:
+        if all(_is_scalar(item) for item in value.values()):
+            # e.g. {"mean": 1.5, "max": 3}
+            return pd.Series(value).to_frame(name=VALUE_COLUMN)
+        return pd.DataFrame(value)
+    if isinstance(value, (list, tuple, set)) and value:
+        items = list(value)
+        if all(_is_scalar(item) for item in items):
+            return pd.DataFrame({VALUE_COLUMN: items})
+        if all(isinstance(item, (dict, list, tuple, pd.Series)) for item in items):
+            return pd.DataFrame(items)
+    return None
+
+
+def coerce_to_data_frame(value: Any) -> pd.DataFrame | None:
+    """
+    Convert the value returned by the generated code to a dataframe.
+
+    Series become one column dataframes keeping their index, scalars one cell
+    dataframes, and dicts, lists and arrays are converted to dataframes.
+
+    Args:
+        value (Any): The value returned by the code.
+
+    Returns:
+        pd.DataFrame: The dataframe, or None if the value can't be converted.
+    """
+
+    try:
+        return _coerce(value)
+    except (ValueError, TypeError):
+        return None
@@ -0,0 +1,85 @@
+"""
+Helper module holding the state of a single PandasAI run.
+
+Everything specific to a run (the dataframe, the question, the generated code, the
+answer and the statistics) lives in its RunContext instead of the PandasAI instance,
+so that a single instance can serve concurrent runs from multiple threads.
+
+Example:
+
+    ```
+    context = pandas_ai.run(df, "Which are the 5 happiest countries?", return_context=True)
+    print(context.code_generated)
+    print(context.answer)
+    ```
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import pandas as pd
+
+from .run_stats import RunStats
+
+
+@dataclass
+class RunContext:
+    """
+    State of a PandasAI run.
+
+    Args:
+        data_frame (pd.DataFrame): The dataframe the generated code runs against.
+        question (str, optional): The question asked by the user.
+        total_rows (int, optional): The number of rows the question is about, when
+            the dataframe only holds some of them (e.g. the first chunk of a file).
+        df_head (pd.DataFrame, optional): The head of the dataframe sent to the LLM.
+        rows_to_display (int): The number of rows of the head sent to the LLM.
+        code_generated (str, optional): The code generated by the LLM.
+        code_run (str, optional): The last sanitized code run.
+        answer (Any): The answer of the run.
+        output (str): What the last code run printed, truncated to the limits of the
+            execution.
+        output_truncated_bytes (int): The bytes of the output that were truncated.
+        error (Exception, optional): The error of the run, if it failed in a batch.
+        approximate (bool): Whether the answer has been estimated on a sample of the rows.
+        confidence_interval (tuple, optional): The lower and upper bounds of the
+            confidence interval of an approximate answer, when they could be estimated.
+        stats (RunStats): The statistics of the run.
+        started_at (float): When the run started, as returned by `time.perf_counter`.
+    """
+
+    data_frame: pd.DataFrame
+    question: str | None = None
+    total_rows: int | None = None
+    df_head: pd.DataFrame | None = None
+    rows_to_display: int = 0
+    code_generated: str | None = None
+    code_run: str | None = None
+    answer: Any = None
+    output: str = ""
+    output_truncated_bytes: int = 0
+    error: Exception | None = None
+    approximate: bool = False
+    confidence_interval: tuple | None = None
+    stats: RunStats = field(default_factory=RunStats)
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def instructions(self) -> dict:
+        """
+        Return the original instructions of the run, used to build the error
+        correction prompts.
+
+        Returns:
+            dict: The original instructions.
+        """
+
+        return {
+            "question": self.question,
+            "df_head": self.df_head,
+            "num_rows": self.total_rows or self.data_frame.shape[0],
+            "num_columns": self.data_frame.shape[1],
+            "rows_to_display": self.rows_to_display,
+        }
@@ -0,0 +1,130 @@
+"""
+Helper module to collect statistics about a PandasAI run.
+
+Each run records the time spent in each of its stages, the LLM calls it made and
+the retries of the error correction framework, so that where slow answers spend
+their time can be aggregated across runs (e.g. p50/p99 per stage).
+
+Example:
+
+    ```
+    pandas_ai.run(df, "Which are the 5 happiest countries?")
+    print(pandas_ai.last_run_stats.to_dict())
+    ```
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+# Stages of a run
+STAGE_HEAD = "head"
+STAGE_PROMPT = "prompt"
+STAGE_LLM = "llm"
+STAGE_SANITIZE = "sanitize"
+STAGE_DRY_RUN = "dry_run"
+STAGE_EXEC = "exec"
+STAGE_RESULT_CACHE = "result_cache"
+STAGE_REPAIR = "repair"
+STAGE_SQL_REGISTER = "sql_register"
+STAGE_SAMPLE = "sample"
+STAGE_BOOTSTRAP = "bootstrap"
+
+
+@dataclass
+class LLMCallStats:
+    """
+    Statistics of a call to the LLM.
+
+    Args:
+        purpose (str): Why the LLM has been called, e.g. "generate_code" or "correct_error".
+        duration (float): Latency of the call, in seconds.
+        prompt_size (int): Number of characters of the prompt.
+        response_size (int): Number of characters of the code (or the SQL query)
+            generated by the LLM.
+    """
+
+    purpose: str
+    duration: float
+    prompt_size: int
+    response_size: int
+
+
+@dataclass
+class RetryStats:
+    """
+    Statistics of a retry of the error correction framework.
+
+    Args:
+        reason (str): Why the code has been retried, e.g. "error" or "wrong_type".
+        error (str): The error (or the wrong type) returned by the code.
+        duration (float): Time spent to get the new code to run, in seconds.
+    """
+
+    reason: str
+    error: str
+    duration: float
+
+
+@dataclass
+class RunStats:
+    """
+    Statistics of a PandasAI run.
+
+    Args:
+        stages (dict): Total time spent in each stage of the run, in seconds.
+        llm_calls (list): The calls made to the LLM.
+        retries (list): The retries of the error correction framework.
+        repairs (list): The names of the local repairs applied to the code.
+        bytes_copied (int): Bytes of the dataframe copied to run the code.
+        duration (float): Total duration of the run, in seconds.
+    """
+
+    stages: dict = field(default_factory=dict)
+    llm_calls: list = field(default_factory=list)
+    retries: list = field(default_factory=list)
+    repairs: list = field(default_factory=list)
+    bytes_copied: int = 0
+    duration: float = 0.0
+
+    @property
+    def retry_count(self) -> int:
+        """Return the number of retries of the run"""
+        return len(self.retries)
+
+    def add(self, stage: str, duration: float) -> None:
+        """
+        Add time spent in a stage.
+
+        Args:
+            stage (str): The stage.
+            duration (float): Time spent in the stage, in seconds.
+        """
+
+        self.stages[stage] = self.stages.get(stage, 0.0) + duration
+
+    @contextmanager
+    def time(self, stage: str):
+        """
+        Context manager adding the time spent in its block to the stage.
+
+        Args:
+            stage (str): The stage.
+        """
+
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started_at)
+
+    def to_dict(self) -> dict:
+        """
+        Return the statistics as a dict, e.g. to be logged or aggregated.
+
+        Returns:
+            dict: The statistics.
+        """
+
+        return {**asdict(self), "retry_count": self.retry_count}
@@ -0,0 +1,67 @@
+"""
+Helper module describing the blocking steps of a PandasAI run.
+
+The logic of a run (building the prompts, the error correction framework, ...) is
+written once, as a generator yielding the steps that block: the calls to the LLM,
+the executions of the code and the SQL queries. The result of each step is sent back to the
+generator by a driver, which either runs the steps synchronously (`run`) or awaits
+them (`arun`).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+from ..prompts.base import Prompt
+from .code_sanitizer import SanitizedCode
+from .run_stats import STAGE_EXEC
+
+
+@dataclass
+class LLMCall:
+    """
+    Step calling the LLM. Its result is the code extracted from the response.
+
+    Args:
+        instruction (Prompt): The prompt.
+        value (str): The value appended to the prompt.
+        purpose (str): Why the LLM is called, e.g. "generate_code" or "correct_error".
+        language (str): The language of the code to extract, "python" or "sql".
+            Defaults to "python".
+    """
+
+    instruction: Prompt
+    value: str
+    purpose: str
+    language: str = "python"
+
+
+@dataclass
+class Execution:
+    """
+    Step running the sanitized code. Its result is the ExecutionResult.
+
+    Args:
+        code (SanitizedCode): The code to run.
+        data_frame (pd.DataFrame, optional): The dataframe to run the code against,
+            if not the dataframe of the run. Defaults to None.
+        stage (str): The stage the execution time is added to. Defaults to "exec".
+    """
+
+    code: SanitizedCode
+    data_frame: pd.DataFrame | None = None
+    stage: str = STAGE_EXEC
+
+
+@dataclass
+class SQLQuery:
+    """
+    Step running a SQL query against the dataframe of the run, registered in the
+    SQL database if it's not already. Its result is the dataframe returned by the query.
+
+    Args:
+        query (str): The SQL query.
+    """
+
+    query: str
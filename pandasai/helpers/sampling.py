@@ -0,0 +1,114 @@
+"""
+Helper module to sample dataframes.
+
+Most of the errors of the generated code (a wrong column name, a method that
+doesn't exist, a dtype mistake) show up on a hundred rows just as well as on the
+whole dataframe. A stratified sample keeps the dtypes of the dataframe, its first
+rows, a row for each category of its low cardinality columns and a row with a
+missing value for each column that has some, so that filters and groupbys on the
+sample behave like on the whole dataframe.
+
+Example:
+
+    ```
+    sample = stratified_sample(df, size=100)
+    result = executor.execute(code, sample)
+    if result.error is not None and is_sample_independent_error(result.error, df):
+        ...  # the code would fail on the whole dataframe too
+    ```
+"""
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Errors that don't depend on the rows the code runs on
+SAMPLE_INDEPENDENT_ERRORS = (NameError, AttributeError, TypeError, SyntaxError, ImportError)
+
+# Messages of the KeyErrors raised by pandas when selecting lists of labels
+_MISSING_COLUMNS_MESSAGE = re.compile(r"are in the \[columns\]$")
+_MISSING_LABELS_MESSAGE = re.compile(r"(not in index|are in the \[index\])$")
+
+# Number of rows the strata are looked for in, per row of the sample
+_CANDIDATES_PER_ROW = 100
+_FIRST_ROWS = 5
+
+
+def stratified_sample(data_frame: pd.DataFrame, size: int = 100, random_state: int | None = 0) -> pd.DataFrame:
+    """
+    Return a sample of the rows of the dataframe, in their original order.
+
+    The sample contains the first rows of the dataframe, a row with a missing value
+    for each column that has some, a row for each category of the low cardinality
+    columns, and random rows for the rest. The categories are looked for in a random
+    subset of the rows, so that sampling a large dataframe stays cheap.
+
+    Args:
+        data_frame (pd.DataFrame): The dataframe.
+        size (int): Number of rows of the sample. Defaults to 100.
+        random_state (int, optional): Seed of the random rows. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: The sample.
+    """
+
+    rows = len(data_frame)
+    if rows <= size:
+        return data_frame
+
+    rng = np.random.default_rng(random_state)
+    candidates = np.arange(rows)
+    if rows > size * _CANDIDATES_PER_ROW:
+        candidates = np.sort(rng.choice(rows, size * _CANDIDATES_PER_ROW, replace=False))
+    candidates_frame = data_frame.take(candidates)
+
+    positions = set(range(min(_FIRST_ROWS, size)))
+    for position in range(len(data_frame.columns)):
+        # missing values are rare and a common source of errors, they're looked for in all the rows
+        missing = data_frame.iloc[:, position].isna().to_numpy()
+        if missing.any():
+            positions.add(int(missing.argmax()))
+        column = candidates_frame.iloc[:, position]
+        if column.dtype.kind not in "OSUb" and not isinstance(column.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            continue
+        first_occurrences = np.flatnonzero(~column.duplicated().to_numpy())
+        # one row per category of the low cardinality columns only
+        if len(positions) + len(first_occurrences) <= size:
+            positions.update(int(candidate) for candidate in candidates[first_occurrences])
+
+    remaining = np.setdiff1d(candidates, np.fromiter(positions, dtype=np.int64, count=len(positions)))
+    if size > len(positions):
+        positions.update(int(row) for row in rng.choice(remaining, size - len(positions), replace=False))
+    return data_frame.take(sorted(positions))
+
+
+def is_sample_independent_error(error: Exception, data_frame: pd.DataFrame) -> bool:
+    """
+    Return True if the error raised by running the code on a sample would be raised
+    by running it on the whole dataframe too.
+
+    Args:
+        error (Exception): The error raised on the sample.
+        data_frame (pd.DataFrame): The whole dataframe.
+
+    Returns:
+        bool: Whether the error doesn't depend on the sample.
+    """
+
+    if isinstance(error, KeyError):
+        # a missing column is missing from any sample, while a row label may only
+        # be missing from the sample
+        if not error.args:
+            return False
+        key = error.args[0]
+        if isinstance(key, str) and _MISSING_COLUMNS_MESSAGE.search(key):
+            return True
+        if isinstance(key, str) and _MISSING_LABELS_MESSAGE.search(key):
+            return False
+        try:
+            return key not in data_frame.columns and key not in data_frame.index
+        except TypeError:
+            return False
+    return isinstance(error, SAMPLE_INDEPENDENT_ERRORS)
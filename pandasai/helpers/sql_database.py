@@ -0,0 +1,187 @@
+"""
+Helper module to answer questions with SQL queries on an in-memory sqlite database.
+
+The dataframes are registered once as tables of the database, with indexes on the
+columns that are likely to be filtered or grouped on, and are kept across
+questions: asking again about the same dataframe doesn't convert it again. The
+queries are written against a table named `df`, a view of the table of the
+dataframe of the question, and only reading the database is authorized.
+
+Example:
+
+    ```
+    database = SQLDatabase()
+    table = database.register(df)
+    answer = database.query("SELECT country, gdp FROM df ORDER BY gdp DESC LIMIT 5", table)
+    ```
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from .fingerprint import MODE_FULL, Fingerprinter
+
+# Name of the view the queries read the dataframe of the question from
+TABLE_NAME = "df"
+
+# Operations authorized to the queries, besides reading
+_AUTHORIZED_ACTIONS = frozenset(
+    {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+)
+
+# Columns with more distinct values than this share of the rows are not indexed
+_MAX_INDEXED_CARDINALITY = 0.5
+
+
+def sqlite_type(dtype) -> str:
+    """
+    Return the type of the sqlite column a column of the dtype is stored in.
+
+    Args:
+        dtype: The dtype of the column.
+
+    Returns:
+        str: The sqlite type.
+    """
+
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "TIMESTAMP"
+    return "TEXT"
+
+
+def schema(data_frame: pd.DataFrame) -> str:
+    """
+    Return the schema of the table of the dataframe, one column per line.
+
+    Args:
+        data_frame (pd.DataFrame): The dataframe.
+
+    Returns:
+        str: The schema, e.g. `"country" TEXT`.
+    """
+
+    return "\n".join(f'"{column}" {sqlite_type(dtype)}' for column, dtype in data_frame.dtypes.items())
+
+
+def _quote(name) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _indexed_columns(data_frame: pd.DataFrame, max_indexes: int) -> list:
+    """Return the columns likely to be filtered or grouped on: the low cardinality
+    text, categorical and boolean columns, and the datetime columns"""
+
+    columns = []
+    rows = max(len(data_frame), 1)
+    for column, dtype in data_frame.dtypes.items():
+        if len(columns) == max_indexes:
+            break
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            columns.append(column)
+        elif sqlite_type(dtype) == "TEXT" or pd.api.types.is_bool_dtype(dtype):
+            if data_frame[column].nunique(dropna=False) <= rows * _MAX_INDEXED_CARDINALITY:
+                columns.append(column)
+    return columns
+
+
+def _authorize(action: int, *_) -> int:
+    return sqlite3.SQLITE_OK if action in _AUTHORIZED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+class SQLDatabase:
+    """
+    In-memory sqlite database holding the dataframes the questions are about.
+
+    The database can be shared by several PandasAI instances and threads: the
+    registrations and the queries run one at a time.
+
+    Args:
+        max_tables (int): Maximum number of dataframes kept in the database. The
+            least recently queried ones are dropped first. Defaults to 8.
+        max_indexes (int): Maximum number of indexes created per dataframe.
+            Defaults to 8.
+        fingerprint_mode (str): How the dataframes are fingerprinted to find their
+            table, see `pandasai.helpers.fingerprint`. Defaults to "full", so that
+            the table is loaded again after any change of the dataframe.
+            "incremental" only hashes the columns replaced since the last query, but
+            doesn't detect the writes in place outside of the sampled rows of a column.
+    """
+
+    def __init__(self, max_tables: int = 8, max_indexes: int = 8, fingerprint_mode: str = MODE_FULL):
+        self.max_tables = max_tables
+        self.max_indexes = max_indexes
+        self._fingerprinter = Fingerprinter(fingerprint_mode)
+        self._connection = sqlite3.connect(":memory:", check_same_thread=False)
+        self._tables = OrderedDict()
+        self._lock = threading.RLock()
+        self.registrations = 0
+
+    def register(self, data_frame: pd.DataFrame) -> str:
+        """
+        Register the dataframe as a table of the database, unless it already is.
+
+        Args:
+            data_frame (pd.DataFrame): The dataframe.
+
+        Returns:
+            str: The name of the table of the dataframe.
+        """
+
+        with self._lock:
+            key = self._fingerprinter.fingerprint(data_frame)
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+            table = f"df_{key[:16]}"
+            data_frame.to_sql(table, self._connection, index=False, if_exists="replace")
+            for position, column in enumerate(_indexed_columns(data_frame, self.max_indexes)):
+                index = _quote(f"{table}_{position}")
+                self._connection.execute(f"CREATE INDEX {index} ON {_quote(table)} ({_quote(column)})")
+            self._connection.commit()
+            self.registrations += 1
+
+            self._tables[key] = table
+            while len(self._tables) > self.max_tables:
+                _, dropped = self._tables.popitem(last=False)
+                self._connection.execute(f"DROP TABLE IF EXISTS {_quote(dropped)}")
+            return table
+
+    def query(self, query: str, table: str) -> pd.DataFrame:
+        """
+        Run the query reading the table through the `df` view.
+
+        Args:
+            query (str): The SQL query.
+            table (str): The name of the table of the dataframe, as returned by `register`.
+
+        Returns:
+            pd.DataFrame: The result of the query.
+        """
+
+        with self._lock:
+            self._connection.execute(f"DROP VIEW IF EXISTS {TABLE_NAME}")
+            self._connection.execute(f"CREATE TEMP VIEW {TABLE_NAME} AS SELECT * FROM {_quote(table)}")
+            self._connection.set_authorizer(_authorize)
+            try:
+                return pd.read_sql_query(query, self._connection)
+            finally:
+                self._connection.set_authorizer(None)
+
+    def clear(self) -> None:
+        """Drop all the tables of the database"""
+
+        with self._lock:
+            for table in self._tables.values():
+                self._connection.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+            self._tables.clear()
+            self._fingerprinter.forget()
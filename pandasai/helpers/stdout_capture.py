@@ -0,0 +1,168 @@
+"""
+Helper module to capture what the generated code prints, per thread.
+
+`contextlib.redirect_stdout` replaces `sys.stdout` for the whole process, so two
+codes running concurrently in different threads would print into each other's
+buffer (and restore the wrong stream when done). While a capture is active,
+`sys.stdout` is replaced by a stream routing each write to the buffer of the
+thread writing it, or to the original stream for the other threads.
+
+Generated code can print a lot (e.g. a large dataframe in a loop), so the buffer
+can be bounded: it keeps the head and the tail of the output, and counts the
+bytes dropped in between.
+
+Example:
+
+    ```
+    with capture_stdout(max_size=64 * 1024) as output:
+        exec(code, environment)
+    print(output.getvalue(), output.truncated_bytes)
+    ```
+"""
+from __future__ import annotations
+
+import io
+import sys
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+_local = threading.local()
+_lock = threading.Lock()
+_active_captures = 0
+
+
+class _ThreadRoutedStream:
+    """Stream writing to the buffer of the current thread, if it has one"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def _target(self):
+        buffer = getattr(_local, "buffer", None)
+        return self.stream if buffer is None else buffer
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+
+class BoundedBuffer(io.TextIOBase):
+    """
+    Text buffer keeping the head and the tail of what is written to it.
+
+    Args:
+        max_size (int, optional): Maximum number of characters kept, half of them
+            from the head and half from the tail. Defaults to None (unbounded).
+    """
+
+    def __init__(self, max_size: int | None = None):
+        super().__init__()
+        self.max_size = max_size
+        self.truncated_bytes = 0
+        self._head = io.StringIO()
+        self._head_size = 0
+        self._tail = deque()
+        self._tail_size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if self.max_size is None:
+            return self._head.write(text)
+
+        written = len(text)
+        head_space = self.max_size - self.max_size // 2 - self._head_size
+        if head_space > 0:
+            self._head.write(text[:head_space])
+            self._head_size += min(head_space, written)
+            text = text[head_space:]
+        if not text:
+            return written
+
+        tail_max_size = self.max_size // 2
+        if len(text) >= tail_max_size:
+            # the text replaces the whole tail
+            self.truncated_bytes += sum(len(chunk.encode("utf-8")) for chunk in self._tail)
+            self.truncated_bytes += len(text[: len(text) - tail_max_size].encode("utf-8"))
+            self._tail.clear()
+            text = text[len(text) - tail_max_size :]
+            self._tail_size = 0
+        self._tail.append(text)
+        self._tail_size += len(text)
+        while self._tail_size > tail_max_size:
+            excess = self._tail_size - tail_max_size
+            chunk = self._tail.popleft()
+            if len(chunk) > excess:
+                self._tail.appendleft(chunk[excess:])
+                chunk = chunk[:excess]
+            self._tail_size -= len(chunk)
+            self.truncated_bytes += len(chunk.encode("utf-8"))
+        return written
+
+    def getvalue(self) -> str:
+        """
+        Return the captured output, marking where it has been truncated.
+
+        Returns:
+            str: The output.
+        """
+
+        head, tail = self._head.getvalue(), "".join(self._tail)
+        if self.truncated_bytes:
+            return f"{head}\n... [{self.truncated_bytes} bytes truncated] ...\n{tail}"
+        return head + tail
+
+
+class _NullBuffer(io.TextIOBase):
+    """Buffer discarding what is written to it"""
+
+    truncated_bytes = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def getvalue(self) -> str:
+        return ""
+
+
+@contextmanager
+def capture_stdout(max_size: int | None = None):
+    """
+    Context manager capturing what the current thread prints in its block.
+
+    Args:
+        max_size (int, optional): Maximum number of characters of the output kept,
+            from its head and its tail. 0 discards the output without capturing it.
+            Defaults to None (unbounded).
+
+    Yields:
+        BoundedBuffer: The buffer the output is written to.
+    """
+
+    global _active_captures  # pylint: disable=global-statement
+
+    with _lock:
+        if _active_captures == 0 and not isinstance(sys.stdout, _ThreadRoutedStream):
+            sys.stdout = _ThreadRoutedStream(sys.stdout)
+        _active_captures += 1
+
+    previous_buffer = getattr(_local, "buffer", None)
+    _local.buffer = buffer = _NullBuffer() if max_size == 0 else BoundedBuffer(max_size)
+    try:
+        yield buffer
+    finally:
+        _local.buffer = previous_buffer
+        with _lock:
+            _active_captures -= 1
+            if _active_captures == 0 and isinstance(sys.stdout, _ThreadRoutedStream):
+                sys.stdout = sys.stdout.stream
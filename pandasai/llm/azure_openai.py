@@ -119,6 +119,27 @@ class AzureOpenAI(BaseOpenAI):
 
         return response
 
+    async def acall(self, instruction: str, value: str, suffix: str = "") -> str:
+        """
+        Call the Azure OpenAI LLM asynchronously.
+
+        Args:
+            instruction (str): Instruction to pass
+            value (str): Value to pass
+            suffix(str): Suffix to pass
+
+        Returns:
+            str: Response
+        """
+        self.last_prompt = str(instruction) + str(value)
+
+        if self.is_chat_model:
+            response = await self.achat_completion(str(instruction) + str(value) + suffix)
+        else:
+            response = await self.acompletion(str(instruction) + str(value) + suffix)
+
+        return response
+
     @property
     def type(self) -> str:
         return "azure-openai"
@@ -15,7 +15,9 @@ Example:
 """
 
 import ast
+import asyncio
 import re
+import sqlite3
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional
 
@@ -92,6 +94,48 @@ class LLM:
         except SyntaxError:
             return False
 
+    def _is_sql_query(self, string: str) -> bool:
+        """
+        Return True if it is a complete SQL query reading data.
+        Args:
+            string (str):
+
+        Returns (bool): True if SQL query otherwise False
+
+        """
+        return bool(re.match(r"^(select|with)\b", string, re.IGNORECASE)) and sqlite3.complete_statement(f"{string};")
+
+    def _extract_sql(self, response: str, separator: str = "```") -> str:
+        """
+        Extract the SQL query from the response.
+
+        Args:
+            response (str): Response
+            separator (str, optional): Separator. Defaults to "```".
+
+        Raises:
+            NoCodeFoundError: No SQL query found in the response
+
+        Returns:
+            str: Extracted SQL query from the response
+        """
+        query = response
+        match = re.search(
+            rf"{START_CODE_TAG}(.*)({END_CODE_TAG}|{END_CODE_TAG.replace('<', '</')})",
+            query,
+            re.DOTALL,
+        )
+        if match:
+            query = match.group(1).strip()
+        if len(query.split(separator)) > 1:
+            query = query.split(separator)[1]
+        query = re.sub(r"^(sqlite|sql)\b", "", query.strip(), flags=re.IGNORECASE)
+        query = query.strip().rstrip(";").strip()
+        if not self._is_sql_query(query):
+            raise NoCodeFoundError("No SQL query found in the response")
+
+        return query
+
     def _extract_code(self, response: str, separator: str = "```") -> str:
         """
         Extract the code from the response.
@@ -137,6 +181,20 @@ class LLM:
         """
         raise MethodNotImplementedError("Call method has not been implemented")
 
+    async def acall(self, instruction: Prompt, value: str, suffix: str = "") -> str:
+        """
+        Execute the LLM with given prompt, without blocking the event loop.
+
+        LLMs without a native async API run `call` in a thread of the default
+        executor of the loop.
+
+        Args:
+            instruction (Prompt): Prompt
+            value (str): Value
+            suffix (str, optional): Suffix. Defaults to "".
+        """
+        return await asyncio.to_thread(self.call, instruction, value, suffix)
+
     def generate_code(self, instruction: Prompt, prompt: str) -> str:
         """
         Generate the code based on the instruction and the given prompt.
@@ -146,6 +204,45 @@ class LLM:
         """
         return self._extract_code(self.call(instruction, prompt, suffix="\n\nCode:\n"))
 
+    async def agenerate_code(self, instruction: Prompt, prompt: str) -> str:
+        """
+        Generate the code based on the instruction and the given prompt, without
+        blocking the event loop.
+
+        LLMs overriding `generate_code` run it in a thread of the default executor
+        of the loop.
+
+        Returns:
+            str: Code
+        """
+        if type(self).generate_code is not LLM.generate_code:
+            return await asyncio.to_thread(self.generate_code, instruction, prompt)
+        return self._extract_code(await self.acall(instruction, prompt, suffix="\n\nCode:\n"))
+
+    def generate_sql(self, instruction: Prompt, prompt: str) -> str:
+        """
+        Generate the SQL query based on the instruction and the given prompt.
+
+        Returns:
+            str: SQL query
+        """
+        return self._extract_sql(self.call(instruction, prompt, suffix="\n\nCode:\n"))
+
+    async def agenerate_sql(self, instruction: Prompt, prompt: str) -> str:
+        """
+        Generate the SQL query based on the instruction and the given prompt, without
+        blocking the event loop.
+
+        LLMs overriding `generate_sql` run it in a thread of the default executor
+        of the loop.
+
+        Returns:
+            str: SQL query
+        """
+        if type(self).generate_sql is not LLM.generate_sql:
+            return await asyncio.to_thread(self.generate_sql, instruction, prompt)
+        return self._extract_sql(await self.acall(instruction, prompt, suffix="\n\nCode:\n"))
+
 
 class BaseOpenAI(LLM, ABC):
     """Base class to implement a new OpenAI LLM
@@ -223,6 +320,25 @@ class BaseOpenAI(LLM, ABC):
 
         return response["choices"][0]["text"]
 
+    async def acompletion(self, prompt: str) -> str:
+        """
+        Query the completion API asynchronously
+
+        Args:
+            prompt (str): Prompt
+
+        Returns:
+            str: LLM response
+        """
+        params = {**self._default_params, "prompt": prompt}
+
+        if self.stop is not None:
+            params["stop"] = [self.stop]
+
+        response = await openai.Completion.acreate(**params)
+
+        return response["choices"][0]["text"]
+
     def chat_completion(self, value: str) -> str:
         """
         Query the chat completion API
@@ -250,6 +366,33 @@ class BaseOpenAI(LLM, ABC):
 
         return response["choices"][0]["message"]["content"]
 
+    async def achat_completion(self, value: str) -> str:
+        """
+        Query the chat completion API asynchronously
+
+        Args:
+            value (str): Prompt
+
+        Returns:
+            str: LLM response
+        """
+        params = {
+            **self._default_params,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": value,
+                }
+            ],
+        }
+
+        if self.stop is not None:
+            params["stop"] = [self.stop]
+
+        response = await openai.ChatCompletion.acreate(**params)
+
+        return response["choices"][0]["message"]["content"]
+
 
 class HuggingFaceLLM(LLM):
     """Base class to implement a new Hugging Face LLM.
@@ -94,6 +94,32 @@ class OpenAI(BaseOpenAI):
 
         return response
 
+    async def acall(self, instruction: Prompt, value: str, suffix: str = "") -> str:
+        """
+        Call the OpenAI LLM asynchronously.
+
+        Args:
+            instruction (Prompt): Instruction to pass
+            value (str): Value to pass
+            suffix (str): Suffix to pass
+
+        Raises:
+            UnsupportedOpenAIModelError: Unsupported model
+
+        Returns:
+            str: Response
+        """
+        self.last_prompt = str(instruction) + str(value)
+
+        if self.model in self._supported_completion_models:
+            response = await self.acompletion(str(instruction) + str(value) + suffix)
+        elif self.model in self._supported_chat_models:
+            response = await self.achat_completion(str(instruction) + str(value) + suffix)
+        else:
+            raise UnsupportedOpenAIModelError("Unsupported model")
+
+        return response
+
     @property
     def type(self) -> str:
         return "openai"
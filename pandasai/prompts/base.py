@@ -10,6 +10,7 @@ class Prompt:
 
     text = None
     _args = {}
+    _rendered = None
 
     def __init__(self, **kwargs):
         """
@@ -24,4 +25,7 @@ class Prompt:
         if self.text is None:
             raise MethodNotImplementedError
 
-        return self.text.format(**self._args)
+        # the prompt is rendered once, as it's rendered again by the LLM
+        if self._rendered is None:
+            self._rendered = self.text.format(**self._args)
+        return self._rendered
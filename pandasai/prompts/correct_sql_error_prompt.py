@@ -0,0 +1,52 @@
+""" Prompt to correct a SQL query on Error
+```
+Today is {today_date}.
+You are provided with a SQLite table (df) with {num_rows} rows and {num_columns} columns.
+These are the columns of the table and their types:
+{schema}
+
+The user asked the following question:
+{question}
+
+You generated this SQL query:
+{code}
+
+It fails with the following error:
+{error_returned}
+
+Correct the query and return a new single SQLite SELECT query that fixes the above mentioned
+error. Do not generate the same query again. Make sure to prefix the requested query with
+{START_CODE_TAG} exactly and suffix the query with {END_CODE_TAG} exactly.
+```
+"""  # noqa: E501
+from datetime import date
+
+from pandasai.constants import END_CODE_TAG, START_CODE_TAG
+
+from .base import Prompt
+
+
+class CorrectSQLErrorPrompt(Prompt):
+    """Prompt to correct a SQL query on Error"""
+
+    text: str = """
+Today is {today_date}.
+You are provided with a SQLite table (df) with {num_rows} rows and {num_columns} columns.
+These are the columns of the table and their types:
+{schema}
+
+The user asked the following question:
+{question}
+
+You generated this SQL query:
+{code}
+
+It fails with the following error:
+{error_returned}
+
+Correct the query and return a new single SQLite SELECT query that fixes the above mentioned error. Do not generate the same query again.
+Make sure to prefix the requested query with {START_CODE_TAG} exactly and suffix the query with {END_CODE_TAG} exactly.
+"""  # noqa: E501
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs, START_CODE_TAG=START_CODE_TAG, END_CODE_TAG=END_CODE_TAG, today_date=date.today())
@@ -0,0 +1,44 @@
+""" Prompt to generate a SQL query
+```
+Today is {today_date}.
+You are provided with a SQLite table (df) with {num_rows} rows and {num_columns} columns.
+These are the columns of the table and their types:
+{schema}
+
+This is the result of `SELECT * FROM df LIMIT {rows_to_display}`, as csv:
+{df_csv_head}.
+
+When asked about the data, your response should include a single SQLite SELECT query on the
+table `df`. Return the query and make sure to prefix it with {START_CODE_TAG} exactly and
+suffix it with {END_CODE_TAG} exactly to get the answer to the following question:
+```
+"""  # noqa: E501
+
+from datetime import date
+
+from pandasai.constants import END_CODE_TAG, START_CODE_TAG
+
+from .base import Prompt
+
+
+class GenerateSQLQueryPrompt(Prompt):
+    """Prompt to generate a SQL query"""
+
+    text: str = """
+Today is {today_date}.
+You are provided with a SQLite table (df) with {num_rows} rows and {num_columns} columns.
+These are the columns of the table and their types:
+{schema}
+
+This is the result of `SELECT * FROM df LIMIT {rows_to_display}`, as csv:
+{df_csv_head}.
+
+When asked about the data, your response should include a single SQLite SELECT query on the table `df`.
+Do not modify the table, do not query other tables and do not return several queries.
+Timestamps are stored as text formatted as `YYYY-MM-DD HH:MM:SS`, use the SQLite date and time functions to work with them.
+Always return the result the user asks for, with explicit column names.
+Return the query and make sure to prefix it with {START_CODE_TAG} exactly and suffix it with {END_CODE_TAG} exactly to get the answer to the following question:
+"""  # noqa: E501
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs, START_CODE_TAG=START_CODE_TAG, END_CODE_TAG=END_CODE_TAG, today_date=date.today())
@@ -0,0 +1,208 @@
+"""
+Saved questions of PandasAI, refreshed incrementally when rows are appended.
+
+A saved question keeps the code generated for it, so asking it again doesn't call
+the LLM. When the code is decomposable into sums, counts, mins, maxs and means (see
+`pandasai.helpers.chunked`), the partial results of its aggregations are kept too:
+if the dataframe only grew since the last refresh (its first rows have the same
+fingerprint as the previous dataframe), only the new rows are computed and their
+partial results are merged with the kept ones. Any other change of the dataframe,
+and code that isn't decomposable, are computed again on all the rows.
+
+Example:
+
+    ```
+    question = pandas_ai.save_question("How many events per type?")
+    answer = question.run(events)
+    ...
+    answer = question.run(events)  # only the rows appended since are computed
+    ```
+"""
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+from .events import CodeSanitized, FinalResult
+from .exceptions import NonDecomposableCodeError
+from .helpers.chunked import ChunkedPlan, PartialAggregates, plan_chunked
+from .helpers.fingerprint import MODE_SAMPLE, Fingerprinter
+from .helpers.result_coercion import coerce_to_data_frame
+
+if TYPE_CHECKING:
+    from . import PandasAI
+
+
+class SavedQuestion:
+    """
+    Question asked again on new versions of a dataframe, e.g. an event table that
+    only grows. It is safe to use from multiple threads: the refreshes run one at a time.
+
+    Args:
+        pandas_ai (PandasAI): The PandasAI instance generating and running the code.
+        question (str): The question.
+        anonymize_df (bool): Whether the head of the dataframe sent to the LLM is
+            anonymized. Defaults to True.
+        fingerprint_mode (str): How the first rows of the dataframe are
+            fingerprinted to detect that rows were only appended, see
+            `pandasai.helpers.fingerprint`. Defaults to "sample", which only hashes a
+            sample of the rows: changes of the other rows are not detected, use
+            "full" to detect them at the cost of hashing all the rows.
+
+    Attributes:
+        code (str): The sanitized code answering the question, once generated.
+        last_rows_computed (int): The number of rows the last refresh computed.
+        last_refresh_incremental (bool): Whether the last refresh only computed the
+            appended rows.
+    """
+
+    def __init__(
+        self, pandas_ai: PandasAI, question: str, anonymize_df: bool = True, fingerprint_mode: str = MODE_SAMPLE
+    ):
+        self.pandas_ai = pandas_ai
+        self.question = question
+        self.anonymize_df = anonymize_df
+        self.code = None
+        self.answer = None
+        self.last_rows_computed = 0
+        self.last_refresh_incremental = False
+        self._fingerprinter = Fingerprinter(fingerprint_mode)
+        self._plan = None
+        self._partials = None
+        self._rows = 0
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+    @property
+    def incremental(self) -> bool:
+        """Whether the code of the question can be refreshed incrementally"""
+        return self._plan is not None
+
+    def run(self, data_frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Answer the question on the dataframe, computing only the rows appended since
+        the last refresh when possible.
+
+        Args:
+            data_frame (pd.DataFrame): The dataframe, e.g. a new version of the
+                dataframe of the last refresh.
+
+        Returns:
+            pd.DataFrame: The answer.
+        """
+
+        with self._lock:
+            if self.code is None:
+                return self._ask(data_frame)
+
+            appended = (
+                self._plan is not None
+                and len(data_frame) >= self._rows
+                and self._fingerprinter.fingerprint(data_frame.iloc[: self._rows]) == self._fingerprint
+            )
+            if not appended:
+                return self._recompute(data_frame)
+            if len(data_frame) == self._rows:
+                self.last_rows_computed, self.last_refresh_incremental = 0, True
+                return self.answer
+
+            self.pandas_ai.log(f"Computing the {len(data_frame) - self._rows} rows appended since the last refresh")
+            partials = PartialAggregates(self._plan)
+            partials.merge(self._partials)
+            self._add_rows(partials, data_frame.iloc[self._rows :])
+            answer = self._commit(partials, data_frame)
+            self.last_refresh_incremental = True
+            return answer
+
+    def _ask(self, data_frame: pd.DataFrame) -> pd.DataFrame:
+        """Generate the code answering the question. If it's decomposable, it runs
+        once, to compute the partial results of its aggregations, otherwise the
+        answer of the run is kept."""
+
+        self.last_refresh_incremental = False
+        self.last_rows_computed = len(data_frame)
+        events = self.pandas_ai.run_iter(data_frame, self.question, anonymize_df=self.anonymize_df)
+        try:
+            for event in events:
+                if isinstance(event, CodeSanitized):
+                    self.code, self._plan = event.code, self._plan_code(event.code)
+                    if self._plan is not None:
+                        # the run is cancelled before the code runs
+                        break
+                elif isinstance(event, FinalResult):
+                    self.code, self._plan = event.context.code_run, None
+                    self.answer = event.answer
+                    return self.answer
+        finally:
+            events.close()
+
+        try:
+            partials = PartialAggregates(self._plan)
+            self._add_rows(partials, data_frame)
+            return self._commit(partials, data_frame)
+        except Exception as e:  # pylint: disable=W0718  # noqa: BLE001
+            # the code is corrected by a complete run
+            self.pandas_ai.log(f"The code failed ({e!r}), running it with the error correction framework")
+
+        context = self.pandas_ai.run(data_frame, self.question, anonymize_df=self.anonymize_df, return_context=True)
+        self.code, self._plan = context.code_run, self._plan_code(context.code_run)
+        if self._plan is None:
+            self.answer = context.answer
+            return self.answer
+        partials = PartialAggregates(self._plan)
+        self._add_rows(partials, data_frame)
+        self._commit(partials, data_frame)
+        self.answer = context.answer
+        return self.answer
+
+    def _recompute(self, data_frame: pd.DataFrame) -> pd.DataFrame:
+        """Run the code again on all the rows"""
+
+        self.last_refresh_incremental = False
+        if self._plan is None:
+            self.last_rows_computed = len(data_frame)
+            # the context is the one of a run, so that the correction prompts show the head
+            pandas_ai = self.pandas_ai
+            context = pandas_ai._start_run(data_frame, self.question)
+            context.df_head, _ = pandas_ai._head(data_frame, self.anonymize_df)
+            try:
+                self.answer = pandas_ai.run_code(self.code, context=context)
+            finally:
+                pandas_ai._end_run(context)
+            # the code corrected on this dataframe isn't corrected again at the next refresh
+            self.code = context.code_run
+            return self.answer
+
+        self.pandas_ai.log("The dataframe changed since the last refresh, computing all the rows again")
+        partials = PartialAggregates(self._plan)
+        self._add_rows(partials, data_frame)
+        return self._commit(partials, data_frame)
+
+    def _plan_code(self, code: str) -> ChunkedPlan | None:
+        try:
+            return plan_chunked(self.pandas_ai._sanitize(code).tree)
+        except NonDecomposableCodeError as e:
+            self.pandas_ai.log(f"{e}. The question will be computed again on all the rows at each refresh.")
+            return None
+
+    def _add_rows(self, partials: PartialAggregates, rows: pd.DataFrame) -> None:
+        """Compute the partial results of the aggregations of the rows and add them"""
+
+        result = self.pandas_ai._executor.execute(self._plan.chunk_code, rows)
+        if result.error is not None:
+            raise result.error
+        partials.add(result.value, len(rows))
+        self.last_rows_computed = len(rows)
+
+    def _commit(self, partials: PartialAggregates, data_frame: pd.DataFrame) -> pd.DataFrame:
+        """Combine the partial results into the answer, then remember them along with
+        the dataframe they were computed on, so that a failed refresh changes nothing"""
+
+        answer = self._plan.finalize(partials)
+        if self.pandas_ai._coerce_result and not isinstance(answer, pd.DataFrame):
+            answer = coerce_to_data_frame(answer)
+        fingerprint = self._fingerprinter.fingerprint(data_frame)
+        self._partials, self._rows, self._fingerprint, self.answer = partials, len(data_frame), fingerprint, answer
+        return answer
@@ -0,0 +1,63 @@
+"""Unit tests for the execution limits"""
+import dataclasses
+import time
+
+import pandas as pd
+import pytest
+
+from pandasai.exceptions import ExecutionLimitExceededError
+from pandasai.executors.limits import ExecutionLimits, Watchdog, check_result_size, result_size
+from pandasai.executors.local import LocalExecutor
+from pandasai.helpers.code_sanitizer import CodeSanitizer
+
+
+class TestExecutionLimits:
+    """Unit tests for the execution limits"""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame({"a": range(100)})
+
+    def _sanitize(self, code):
+        return CodeSanitizer(capture_result=True).sanitize(code)
+
+    def test_watchdog_cancels_long_execution(self):
+        started_at = time.monotonic()
+        with pytest.raises(ExecutionLimitExceededError) as error, Watchdog(ExecutionLimits(max_wall_time=0.1)):
+            while True:
+                pass
+
+        assert error.value.limit == "max_wall_time"
+        assert time.monotonic() - started_at < 1
+
+    def test_watchdog_lets_short_execution_finish(self):
+        with Watchdog(ExecutionLimits(max_wall_time=5)):
+            value = sum(range(100))
+
+        assert value == 4950
+
+    def test_result_size(self, data_frame):
+        assert result_size(data_frame) == data_frame.memory_usage(index=True, deep=True).sum()
+        assert result_size(data_frame["a"]) == data_frame["a"].memory_usage(index=True, deep=True)
+
+        with pytest.raises(ExecutionLimitExceededError):
+            check_result_size(data_frame, ExecutionLimits(max_result_size=10))
+        check_result_size(data_frame, ExecutionLimits())
+
+    def test_default_limits_are_immutable(self):
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            LocalExecutor().limits.max_wall_time = 1
+
+    def test_local_executor_cancels_long_execution(self, data_frame):
+        executor = LocalExecutor(limits=ExecutionLimits(max_wall_time=0.1))
+        result = executor.execute(self._sanitize("while True:\n    pass"), data_frame)
+
+        assert isinstance(result.error, ExecutionLimitExceededError)
+        assert executor.execute(self._sanitize("df['a'].sum()"), data_frame).value == 4950
+
+    def test_local_executor_limits_result_size(self, data_frame):
+        executor = LocalExecutor(limits=ExecutionLimits(max_result_size=10))
+        result = executor.execute(self._sanitize("df"), data_frame)
+
+        assert result.value is None
+        assert result.error.limit == "max_result_size"
@@ -0,0 +1,76 @@
+"""Unit tests for the local executor class"""
+import pandas as pd
+import pytest
+
+from pandasai.executors.base import uses_plots
+from pandasai.executors.limits import ExecutionLimits
+from pandasai.executors.local import LocalExecutor
+from pandasai.helpers.code_sanitizer import CodeSanitizer
+
+
+class TestLocalExecutor:
+    """Unit tests for the local executor class"""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame({"a": [1, 2, 3], "b": [4.0, 5.0, 6.0]})
+
+    def _sanitize(self, code):
+        return CodeSanitizer(capture_result=True).sanitize(code)
+
+    def test_execute(self, data_frame):
+        result = LocalExecutor().execute(self._sanitize("df['a'].sum()"), data_frame)
+
+        assert result.value == 6
+        assert result.error is None
+        assert result.bytes_copied == 0
+
+    def test_execute_does_not_modify_dataframe(self, data_frame):
+        code = self._sanitize("df.loc[0, 'b'] = 0.0\ndf")
+        result = LocalExecutor().execute(code, data_frame)
+
+        assert result.value.loc[0, "b"] == 0.0
+        assert data_frame.loc[0, "b"] == 4.0
+        assert result.bytes_copied == data_frame["b"].nbytes
+
+    def test_execute_with_deep_copy(self, data_frame):
+        code = self._sanitize("df.loc[0, 'b'] = 0.0\ndf")
+        result = LocalExecutor(zero_copy=False).execute(code, data_frame)
+
+        assert data_frame.loc[0, "b"] == 4.0
+        assert result.bytes_copied == data_frame.memory_usage().sum()
+
+    def test_execute_returns_errors(self, data_frame):
+        result = LocalExecutor().execute(self._sanitize("df['missing']"), data_frame)
+
+        assert result.value is None
+        assert isinstance(result.error, KeyError)
+
+    def test_execute_captures_output(self, data_frame):
+        code = self._sanitize("for value in df['a']:\n    print(value)")
+
+        result = LocalExecutor().execute(code, data_frame)
+        assert (result.output, result.output_truncated_bytes) == ("1\n2\n3\n", 0)
+
+        result = LocalExecutor(limits=ExecutionLimits(max_output_size=4)).execute(code, data_frame)
+        assert (result.output, result.output_truncated_bytes) == ("1\n\n... [2 bytes truncated] ...\n3\n", 2)
+
+        result = LocalExecutor(limits=ExecutionLimits(max_output_size=0)).execute(code, data_frame)
+        assert (result.output, result.output_truncated_bytes) == ("", 0)
+
+    def test_execute_with_restricted_builtins(self, data_frame):
+        result = LocalExecutor().execute(self._sanitize("__import__('os')"), data_frame)
+
+        assert isinstance(result.error, NameError)
+
+    @pytest.mark.parametrize(
+        "code,expected",
+        [
+            ("df['a'].sum()", False),
+            ("plt.bar(df['a'], df['b'])", True),
+            ("df.plot()", True),
+            ("def chart():\n    df['a'].hist()", True),
+        ],
+    )
+    def test_uses_plots(self, code, expected):
+        assert uses_plots(self._sanitize(code).code) == expected
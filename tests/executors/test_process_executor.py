@@ -0,0 +1,112 @@
+"""Unit tests for the process executor class"""
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandasai.exceptions import ExecutionLimitExceededError
+from pandasai.executors.limits import ExecutionLimits
+from pandasai.executors.process import ProcessExecutor
+from pandasai.helpers.code_sanitizer import CodeSanitizer
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ProcessExecutor(
+        max_workers=1, max_shared_frames=1, frame_shm_threshold=1024, result_shm_threshold=1024
+    ) as executor:
+        yield executor
+
+
+class TestProcessExecutor:
+    """Unit tests for the process executor class"""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame({"a": np.arange(1000), "b": ["x", "y"] * 500})
+
+    def _sanitize(self, code):
+        return CodeSanitizer(capture_result=True).sanitize(code)
+
+    def test_execute(self, executor, data_frame):
+        result = executor.execute(self._sanitize("df.groupby('b')['a'].sum()"), data_frame)
+
+        assert result.error is None
+        assert result.value.to_dict() == {"x": 249500, "y": 250000}
+
+    def test_execute_returns_large_results(self, executor, data_frame):
+        result = executor.execute(self._sanitize("df[df['a'] % 2 == 0]"), data_frame)
+
+        pd.testing.assert_frame_equal(result.value, data_frame[data_frame["a"] % 2 == 0])
+
+    def test_execute_does_not_modify_dataframe(self, executor, data_frame):
+        result = executor.execute(self._sanitize("df.loc[0, 'a'] = -1\ndf['a'].min()"), data_frame)
+
+        assert result.value == -1
+        assert data_frame.loc[0, "a"] == 0
+
+    def test_execute_returns_errors(self, executor, data_frame):
+        result = executor.execute(self._sanitize("df['missing']"), data_frame)
+
+        assert isinstance(result.error, KeyError)
+
+    def test_execute_with_multiple_dataframes(self, executor, data_frame):
+        other_data_frame = data_frame.head(10)
+        code = self._sanitize("len(df)")
+
+        assert executor.execute(code, data_frame).value == 1000
+        assert executor.execute(code, other_data_frame).value == 10
+        assert executor.execute(code, data_frame).value == 1000
+
+    def test_execute_after_modification_in_place(self, executor, data_frame):
+        code = self._sanitize("df['a'].sum()")
+
+        assert executor.execute(code, data_frame).value == 499500
+        data_frame.loc[0, "a"] = 500
+        assert executor.execute(code, data_frame).value == 500000
+
+    def test_execute_after_modification_outside_sample(self, executor):
+        data_frame = pd.DataFrame({"a": np.arange(100_000, dtype=float)})
+        code = self._sanitize("df['a'].sum()")
+
+        assert executor.execute(code, data_frame).value == 4999950000.0
+        # the row isn't in the sample of the incremental fingerprints
+        data_frame.loc[1, "a"] = 1e12
+        assert executor.execute(code, data_frame).value == 4999950000.0 - 1 + 1e12
+
+    def test_execute_shares_released_frame_again(self, data_frame):
+        with ProcessExecutor(max_workers=1, frame_shm_threshold=1024) as executor:
+            payload = executor._share_frame(data_frame)
+            SharedMemory(name=payload.shm_name).unlink()
+
+            result = executor.execute(self._sanitize("len(df)"), data_frame)
+
+            assert result.error is None
+            assert result.value == 1000
+
+    def test_execute_replaces_dead_worker(self, data_frame):
+        with ProcessExecutor(max_workers=1) as executor:
+            executor._workers[0].process.kill()
+            executor._workers[0].process.join()
+
+            result = executor.execute(self._sanitize("len(df)"), data_frame)
+
+            assert isinstance(result.error, RuntimeError)
+            assert executor.execute(self._sanitize("len(df)"), data_frame).value == 1000
+
+    def test_execute_after_close(self, data_frame):
+        executor = ProcessExecutor(max_workers=1)
+        executor.close()
+
+        with pytest.raises(RuntimeError):
+            executor.execute(self._sanitize("len(df)"), data_frame)
+
+    def test_execute_kills_long_execution(self, data_frame):
+        limits = ExecutionLimits(max_wall_time=0.1)
+        with ProcessExecutor(max_workers=1, limits=limits) as executor:
+            # a single long C call can only be cancelled by killing the worker
+            result = executor.execute(self._sanitize("sum(range(10 ** 11))"), data_frame)
+
+            assert isinstance(result.error, ExecutionLimitExceededError)
+            assert executor.execute(self._sanitize("len(df)"), data_frame).value == 1000
@@ -0,0 +1,142 @@
+"""Unit tests for the approximate module."""
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.executors.local import LocalExecutor
+from pandasai.helpers.approximate import (
+    Approximation,
+    estimate_aggregates,
+    sample_rows,
+    split_blocks,
+)
+from pandasai.helpers.chunked import plan_chunked
+from pandasai.helpers.code_sanitizer import CodeSanitizer
+from pandasai.helpers.run_stats import STAGE_BOOTSTRAP, STAGE_SAMPLE
+from pandasai.llm.fake import FakeLLM
+
+
+class TestApproximate:
+    """Unit tests for the approximate module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        rng = np.random.default_rng(0)
+        return pd.DataFrame(
+            {
+                "k": rng.choice(list("abc"), 20_000, p=[0.6, 0.3, 0.1]),
+                "v": rng.integers(0, 100, 20_000),
+                "w": rng.normal(10, 2, 20_000),
+            }
+        )
+
+    def _run(self, code, data_frame):
+        return LocalExecutor().execute(CodeSanitizer(capture_result=True).sanitize(code), data_frame).value
+
+    def _estimate(self, code, sample, total_rows, approximation):
+        plan = plan_chunked(CodeSanitizer(capture_result=True).sanitize(code).tree)
+        blocks = split_blocks(sample, approximation.blocks)
+        values = [LocalExecutor().execute(plan.chunk_code, block).value for block in blocks]
+        return estimate_aggregates(plan, values, [len(block) for block in blocks], total_rows, approximation)
+
+    def test_sample_rows(self, data_frame):
+        sample = sample_rows(data_frame, 1000)
+
+        assert len(sample) == 1000
+        assert sample.index.is_unique
+        assert sample_rows(data_frame, len(data_frame)) is data_frame
+
+    def test_sample_rows_stratified(self, data_frame):
+        sample = sample_rows(data_frame, 2000, stratify_by="k")
+
+        expected = data_frame["k"].value_counts(normalize=True)
+        pd.testing.assert_series_equal(sample["k"].value_counts(normalize=True), expected, atol=1e-3)
+
+    def test_split_blocks(self, data_frame):
+        blocks = split_blocks(data_frame.head(105), 10)
+
+        assert len(blocks) == 10
+        pd.testing.assert_frame_equal(pd.concat(blocks), data_frame.head(105))
+
+    @pytest.mark.parametrize(
+        "code",
+        [
+            "df['v'].sum()",
+            "len(df[df['v'] > 10])",
+            "df.groupby('k')['w'].mean()",
+            "df.groupby('k', as_index=False)['v'].sum()",
+            "df[['v', 'w']].max()",
+        ],
+    )
+    def test_estimate_on_all_rows_is_exact(self, code, data_frame):
+        estimate = self._estimate(code, data_frame, len(data_frame), Approximation())
+
+        expected = self._run(code, data_frame)
+        if isinstance(expected, pd.DataFrame):
+            pd.testing.assert_frame_equal(estimate.value, expected, check_dtype=False)
+        elif isinstance(expected, pd.Series):
+            pd.testing.assert_series_equal(estimate.value, expected, check_dtype=False)
+        else:
+            assert estimate.value == pytest.approx(expected)
+
+    @pytest.mark.parametrize(
+        "code", ["df.groupby('k')['v'].sum()", "df.groupby('k').size()", "df['w'].mean()", "len(df)"]
+    )
+    def test_estimate_scales_to_all_rows(self, code, data_frame):
+        approximation = Approximation(rows=5000, stratify_by="k")
+        sample = sample_rows(data_frame, approximation.rows, approximation.stratify_by)
+
+        estimate = self._estimate(code, sample, len(data_frame), approximation)
+
+        value, lower, upper = (np.asarray(bound) for bound in (estimate.value, estimate.lower, estimate.upper))
+        expected = np.asarray(self._run(code, data_frame))
+        assert np.all(lower <= value) and np.all(value <= upper)
+        assert np.all(np.abs(value - expected) <= upper - lower)
+        assert np.allclose(value, expected, rtol=0.05)
+
+    def test_run_approximate(self, data_frame):
+        code = "df.groupby('k')['v'].sum()"
+        pandas_ai = PandasAI(FakeLLM(code), approximation=Approximation(rows=5000, stratify_by="k"))
+
+        answer = pandas_ai.run(data_frame, "Total of v by k", anonymize_df=False, approximate=True)
+
+        expected = self._run(code, data_frame)
+        assert answer.attrs["approximate"] is True
+        assert pandas_ai.last_run_approximate is True
+        lower, upper = pandas_ai.last_confidence_interval
+        assert ((answer["v"] - expected).abs() <= upper["v"] - lower["v"]).all()
+        assert np.allclose(answer["v"], expected, rtol=0.05)
+        assert {STAGE_SAMPLE, STAGE_BOOTSTRAP} <= set(pandas_ai.last_run_stats.stages)
+
+    def test_arun_approximate(self, data_frame):
+        pandas_ai = PandasAI(FakeLLM("len(df)"), approximation=Approximation(rows=5000))
+
+        answer = asyncio.run(pandas_ai.arun(data_frame, "How many rows?", anonymize_df=False, approximate=True))
+
+        assert answer["value"][0] == pytest.approx(len(data_frame))
+        assert answer.attrs["approximate"] is True
+
+    def test_run_approximate_not_decomposable(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df['k'].value_counts()"), approximation=Approximation(rows=5000))
+        execute = mocker.spy(pandas_ai._executor, "execute")
+
+        answer = pandas_ai.run(data_frame, "Rows per k", anonymize_df=False, approximate=True)
+
+        # the counts on a sample can't be returned unscaled, the code runs on all the rows
+        pd.testing.assert_frame_equal(answer, data_frame["k"].value_counts().to_frame())
+        assert "approximate" not in answer.attrs
+        assert pandas_ai.last_run_approximate is False
+        assert pandas_ai.last_confidence_interval is None
+        assert [len(call.args[1]) for call in execute.call_args_list] == [len(data_frame)]
+
+    def test_run_approximate_small_data_frame(self, data_frame):
+        pandas_ai = PandasAI(FakeLLM("df['v'].sum()"))
+
+        answer = pandas_ai.run(data_frame, "Total of v", anonymize_df=False, approximate=True)
+
+        assert answer["value"][0] == data_frame["v"].sum()
+        assert "approximate" not in answer.attrs
+        assert pandas_ai.last_run_approximate is False
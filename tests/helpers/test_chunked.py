@@ -0,0 +1,103 @@
+"""Unit tests for the chunked module."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandasai.exceptions import NonDecomposableCodeError
+from pandasai.executors.local import LocalExecutor
+from pandasai.helpers.chunked import PartialAggregates, count_rows, iter_chunks, plan_chunked
+from pandasai.helpers.code_sanitizer import CodeSanitizer
+
+
+class TestChunked:
+    """Unit tests for the chunked module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        rng = np.random.default_rng(0)
+        return pd.DataFrame(
+            {"k": rng.choice(list("abc"), 1000), "v": rng.integers(0, 100, 1000), "w": rng.random(1000)}
+        )
+
+    def _run_chunked(self, code, data_frame, chunksize=137):
+        plan = plan_chunked(CodeSanitizer(capture_result=True).sanitize(code).tree)
+        partials = PartialAggregates(plan)
+        executor = LocalExecutor()
+        for start in range(0, len(data_frame), chunksize):
+            chunk = data_frame.iloc[start : start + chunksize]
+            result = executor.execute(plan.chunk_code, chunk)
+            assert result.error is None
+            partials.add(result.value, len(chunk))
+        assert partials.rows == len(data_frame)
+        return plan.finalize(partials)
+
+    def _run(self, code, data_frame):
+        return LocalExecutor().execute(CodeSanitizer(capture_result=True).sanitize(code), data_frame).value
+
+    @pytest.mark.parametrize(
+        "code",
+        [
+            "df['v'].sum()",
+            "len(df[df['v'] > 10])",
+            "df.shape[0]",
+            "df[['v', 'w']].min()",
+            "df.mean(numeric_only=True)",
+            "pd.DataFrame({'total': [df['v'].sum()], 'average': [df['w'].mean()], 'rows': [len(df)]})",
+            "high = df[df['v'] > 50]\nhigh.groupby('k')['w'].mean().reset_index()",
+            "df['x'] = df['v'] * 2\ndf.groupby('k').agg('max')",
+            "df.groupby('k', as_index=False)['v'].sum()",
+            "df.groupby('k').size().sort_values(ascending=False).head(2)",
+            "counts = df.groupby(['k', df['v'] > 50])['w'].count()\ncounts.to_frame()",
+            "df[df['k'].str.upper().isin(['A', 'B'])].drop('k', axis=1).sum()",
+            "df['w'] = df['w'].round(1).fillna(0)\ndf[df['v'].between(10, 20)]['w'].max()",
+        ],
+    )
+    def test_chunked_results_match(self, code, data_frame):
+        expected = self._run(code, data_frame)
+        result = self._run_chunked(code, data_frame)
+
+        if isinstance(expected, pd.DataFrame):
+            pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+        elif isinstance(expected, pd.Series):
+            pd.testing.assert_series_equal(result, expected, check_dtype=False)
+        else:
+            assert np.isclose(result, expected)
+
+    @pytest.mark.parametrize(
+        "code",
+        [
+            "df['v'].median()",
+            "df.sort_values('v').head(3)['v'].sum()",
+            "df[df['v'] > df['v'].mean()]",
+            "df.head()",
+            "df[df['w'] > df['w'].skew()]['w'].sum()",
+            "len(df[df['w'] > df['w'].kurt()])",
+            "df[df['v'] > np.percentile(df['v'], 90)]['v'].sum()",
+            "df['w'].fillna(method='ffill').sum()",
+            "df['v'].map(lambda x: x / df['v'].max()).sum()",
+        ],
+    )
+    def test_non_decomposable_code(self, code):
+        with pytest.raises(NonDecomposableCodeError):
+            plan_chunked(CodeSanitizer().sanitize(code).tree)
+
+    def test_iter_chunks_from_csv(self, data_frame, tmp_path):
+        path = tmp_path / "data.csv"
+        data_frame.to_csv(path, index=False)
+
+        chunks = list(iter_chunks(path, chunksize=300))
+
+        assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+        pd.testing.assert_frame_equal(pd.concat(chunks), data_frame)
+
+    def test_count_rows(self, data_frame, tmp_path):
+        path = tmp_path / "data.csv"
+        data_frame.to_csv(path, index=False)
+
+        assert count_rows(path, chunksize=300) == len(data_frame)
+        assert count_rows([data_frame, data_frame.head(10)]) == len(data_frame) + 10
+        assert count_rows(iter([data_frame])) is None
+
+    def test_iter_chunks_unsupported_file(self):
+        with pytest.raises(ValueError):
+            list(iter_chunks("data.xlsx"))
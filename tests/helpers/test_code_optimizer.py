@@ -0,0 +1,177 @@
+"""Unit tests for the code_optimizer module."""
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.executors.local import LocalExecutor
+from pandasai.helpers.code_optimizer import CodeOptimizer
+from pandasai.helpers.code_sanitizer import CodeSanitizer
+from pandasai.llm.fake import FakeLLM
+
+
+class TestCodeOptimizer:
+    """Unit tests for the code_optimizer module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame(
+            {
+                "country": ["Spain", "France", "Italy", "Germany", "United Kingdom"],
+                "gdp": [1.4, 2.7, 2.0, 3.8, 2.9],
+                "happiness": [6.4, 6.6, 6.0, 7.0, 7.2],
+            }
+        )
+
+    def _run(self, code, data_frame):
+        result = LocalExecutor().execute(code, data_frame.copy())
+        assert result.error is None
+        return result.value
+
+    @pytest.mark.parametrize(
+        "code,rule,optimized_source",
+        [
+            (
+                "df.apply(lambda row: row['gdp'] * row['happiness'], axis=1)",
+                "apply_rows",
+                "(df['gdp'] * df['happiness']).rename(None)",
+            ),
+            (
+                "df.apply(lambda row: 'a' in row['country'] and row.gdp > 1.5, axis=1)",
+                "apply_rows",
+                "(df['country'].str.contains('a', regex=False) & (df['gdp'] > 1.5)).rename(None)",
+            ),
+            ("df['country'].map(lambda c: c.lower())", "apply_elements", "df['country'].str.lower()"),
+            ("df['country'].apply(lambda c: c in ['Spain', 'Italy'])", "apply_elements", None),
+            ("df['gdp'].apply(lambda x: x * 2 if x > 2 else -x)", "apply_elements", None),
+            (
+                """
+for index, row in df.iterrows():
+    df.at[index, 'ratio'] = row['gdp'] / row['happiness']
+df
+""",
+                "rows_loop",
+                "df['ratio'] = df['gdp'] / df['happiness']\ndf",
+            ),
+            (
+                """
+for index, row in df.iterrows():
+    if row['gdp'] > 2:
+        df.loc[index, 'level'] = 'high'
+    else:
+        df.loc[index, 'level'] = 'low'
+df
+""",
+                "rows_loop",
+                None,
+            ),
+            (
+                """
+total = 0
+for index, row in df.iterrows():
+    if row['happiness'] > 6.5:
+        total += row['gdp']
+total
+""",
+                "rows_loop",
+                None,
+            ),
+            (
+                """
+countries = []
+for index, row in df.iterrows():
+    if row.gdp > 2:
+        countries.append(row['country'])
+countries
+""",
+                "rows_loop",
+                None,
+            ),
+            (
+                """
+count = 0
+for value in df['gdp']:
+    count = count + 1
+count
+""",
+                "elements_loop",
+                None,
+            ),
+        ],
+    )
+    def test_optimize(self, code, rule, optimized_source, data_frame):
+        sanitized = CodeSanitizer(capture_result=True).sanitize(code)
+
+        optimized = CodeOptimizer().optimize(sanitized)
+
+        assert optimized.optimizations == [rule]
+        assert optimized.original is sanitized
+        if optimized_source is not None:
+            assert optimized.source == optimized_source
+        expected, actual = self._run(sanitized, data_frame), self._run(optimized, data_frame)
+        if isinstance(expected, pd.Series):
+            pd.testing.assert_series_equal(actual, expected)
+        elif isinstance(expected, pd.DataFrame):
+            pd.testing.assert_frame_equal(actual, expected)
+        else:
+            assert actual == expected
+
+    @pytest.mark.parametrize(
+        "code",
+        [
+            "df.apply(lambda row: row['gdp'] * row.name, axis=1)",
+            "df['country'].apply(lambda c: c.split()[0])",
+            # the loop reads a column it writes
+            """
+for index, row in df.iterrows():
+    df.at[index, 'gdp'] = row['gdp'] * 2
+    df.at[index, 'double'] = row['gdp']
+""",
+            # the accumulator is read while accumulating
+            """
+total = 0
+for index, row in df.iterrows():
+    total += total + row['gdp']
+""",
+            # the loop variable is used after the loop
+            """
+for index, row in df.iterrows():
+    df.at[index, 'ratio'] = row['gdp'] / row['happiness']
+row
+""",
+            # nlargest doesn't support strings, while sort_values does
+            "df.sort_values('gdp', ascending=False).head(3)",
+        ],
+    )
+    def test_optimize_leaves_unsupported_code(self, code):
+        sanitized = CodeSanitizer(capture_result=True).sanitize(code)
+
+        assert CodeOptimizer().optimize(sanitized) is sanitized
+
+    @pytest.mark.parametrize("masked", [False, True])
+    def test_optimize_accumulation_keeps_nan(self, masked, data_frame):
+        data_frame.loc[1, "gdp"] = float("nan")
+        condition = "if row['happiness'] > 6.5:\n        " if masked else ""
+        code = f"total = 0\nfor index, row in df.iterrows():\n    {condition}total += row['gdp']\ntotal"
+        sanitized = CodeSanitizer(capture_result=True).sanitize(code)
+
+        optimized = CodeOptimizer().optimize(sanitized)
+
+        assert optimized.optimizations == ["rows_loop"]
+        assert pd.isna(self._run(sanitized, data_frame))
+        assert pd.isna(self._run(optimized, data_frame))
+
+    def test_run_falls_back_to_original_code(self, data_frame, mocker):
+        def optimize(_, code):
+            broken = CodeSanitizer(capture_result=True).sanitize("df.missing_method()")
+            broken.original, broken.optimizations = code, ["apply_rows"]
+            return broken
+
+        mocker.patch.object(CodeOptimizer, "optimize", optimize)
+        code = "df.sort_values('country', ascending=False).head(2)"
+        pandas_ai = PandasAI(FakeLLM(code), optimize_code=True)
+
+        answer = pandas_ai.run(data_frame, "Last 2 countries in alphabetical order", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, data_frame.sort_values("country", ascending=False).head(2))
+        assert pandas_ai.last_run_code == code
+        assert [retry.reason for retry in pandas_ai.last_run_stats.retries] == []
@@ -0,0 +1,143 @@
+"""Unit tests for the code_repair module."""
+import ast
+
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.executors.local import LocalExecutor
+from pandasai.helpers.code_repair import CodeRepair, CodeRepairer, match_column
+from pandasai.helpers.code_sanitizer import CodeSanitizer
+from pandasai.llm.fake import FakeLLM
+
+
+class TestCodeRepair:
+    """Unit tests for the code_repair module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame(
+            {
+                "Country": ["Spain", "France", "Spain"],
+                "loan_amount": [100, 250, 300],
+                "date": ["2020-01-01", "2021-02-03", "2022-03-04"],
+                "price": ["1.5", "2", "3"],
+            }
+        )
+
+    def _run(self, code: str, data_frame: pd.DataFrame):
+        """Run the code, repairing it until it succeeds, and return its source and value"""
+
+        executor = LocalExecutor()
+        sanitized = CodeSanitizer(capture_result=True).sanitize(code)
+        result = executor.execute(sanitized, data_frame)
+        while result.error is not None:
+            sanitized = CodeRepairer().repair(sanitized, result.error, data_frame)
+            assert sanitized is not None, repr(result.error)
+            result = executor.execute(sanitized, data_frame)
+        return sanitized.source, result.value
+
+    @pytest.mark.parametrize(
+        "name,column",
+        [
+            ("country", "Country"),
+            ("Country ", "Country"),
+            ("Loan Amount", "loan_amount"),
+            ("loan_amont", "loan_amount"),
+            ("population", None),
+        ],
+    )
+    def test_match_column(self, name, column, data_frame):
+        assert match_column(name, data_frame.columns) == column
+
+    def test_match_column_different_digits(self):
+        assert match_column("revenue_2021", ["revenue_2022", "revenue_2023"]) is None
+        assert match_column("revenue_2021", ["revenue_2022", "revenu_2021"]) == "revenu_2021"
+
+    def test_match_column_ambiguous(self):
+        assert match_column("name", ["Name", "NAME"]) is None
+
+    @pytest.mark.parametrize(
+        "code,repaired",
+        [
+            ("df['country']", "df['Country']"),
+            ("df[['country', 'Loan Amount']]", "df[['Country', 'loan_amount']]"),
+            ("df.country", "df['Country']"),
+            ("df[df.country == 'Spain']", "df[df['Country'] == 'Spain']"),
+            ("df.groupby('country').agg({'loan_amount': 'sum'})", "df.groupby('Country').agg({'loan_amount': 'sum'})"),
+            ("df.groupby('Country').mean()", "df.groupby('Country').mean(numeric_only=True)"),
+            ("df['date'].dt.year", "pd.to_datetime(df['date']).dt.year"),
+            (
+                "df[df['date'] > pd.Timestamp('2021-01-01')]",
+                "df[pd.to_datetime(df['date']) > pd.Timestamp('2021-01-01')]",
+            ),
+            ("df['price'].mean()", "pd.to_numeric(df['price']).mean()"),
+        ],
+    )
+    def test_repair(self, code, repaired, data_frame):
+        source, _ = self._run(code, data_frame)
+
+        assert source == repaired
+
+    def test_repair_several_errors(self, data_frame):
+        source, value = self._run("df[df['Price'] > 1.8]['country']", data_frame)
+
+        assert source == "df[pd.to_numeric(df['price']) > 1.8]['Country']"
+        assert value.tolist() == ["France", "Spain"]
+
+    @pytest.mark.parametrize(
+        "code",
+        ["df['population']", "df.groupby('Country')['price'].sum().foo()", "df['loan_amount'].mean(axis=2)"],
+    )
+    def test_unrepairable(self, code, data_frame):
+        sanitized = CodeSanitizer(capture_result=True).sanitize(code)
+        result = LocalExecutor().execute(sanitized, data_frame)
+
+        assert CodeRepairer().repair(sanitized, result.error, data_frame) is None
+
+    def test_custom_repair(self, data_frame):
+        class ZeroDivisionRepair(CodeRepair):
+            name = "zero_division"
+            errors = (ZeroDivisionError,)
+
+            def apply(self, tree, error, data_frame):
+                return ast.parse("float('nan')")
+
+        sanitized = CodeSanitizer(capture_result=True).sanitize("1 / 0")
+        repairer = CodeRepairer([ZeroDivisionRepair()])
+
+        repaired = repairer.repair(sanitized, ZeroDivisionError(), data_frame)
+
+        assert repaired.source == "float('nan')"
+        assert repairer.repairs == ["zero_division"]
+
+    def test_run_repairs_without_calling_the_llm(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.groupby('country')[['Loan Amount']].sum()"))
+        call = mocker.spy(pandas_ai._llm, "call")
+
+        answer = pandas_ai.run(data_frame, "Loans by country", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, data_frame.groupby("Country")[["loan_amount"]].sum())
+        assert call.call_count == 1
+        assert pandas_ai.last_run_code == "df.groupby('Country')[['loan_amount']].sum()"
+        assert pandas_ai.last_run_stats.repairs == ["column_name", "column_name"]
+        assert pandas_ai.last_run_stats.retries == []
+
+    def test_run_corrects_unrepairable_errors(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df"))
+        mocker.patch.object(pandas_ai._llm, "call", side_effect=["df[['population']]", "df[['Country']]"])
+
+        answer = pandas_ai.run(data_frame, "Countries", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, data_frame[["Country"]])
+        assert pandas_ai.last_run_stats.repairs == []
+        assert pandas_ai.last_run_stats.retry_count == 1
+
+    def test_run_without_repair(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df"), repair_code=False)
+        mocker.patch.object(pandas_ai._llm, "call", side_effect=["df[['country']]", "df[['Country']]"])
+
+        answer = pandas_ai.run(data_frame, "Countries", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, data_frame[["Country"]])
+        assert pandas_ai.last_run_stats.retry_count == 1
@@ -0,0 +1,104 @@
+"""Unit tests for the code_sanitizer module."""
+import ast
+import os.path
+from types import CodeType
+
+from pandasai.helpers.code_sanitizer import RESULT_VARIABLE, CodeSanitizer
+from pandasai.helpers.save_chart import compare_ast
+
+
+class TestCodeSanitizer:
+    """Unit tests for the code_sanitizer module."""
+
+    def test_sanitize_returns_compiled_code(self):
+        sanitized = CodeSanitizer().sanitize("result = 1 + 1")
+
+        assert isinstance(sanitized.code, CodeType)
+        env = {}
+        exec(sanitized.code, env)  # noqa: S102
+        assert env["result"] == 2
+
+    def test_remove_unsafe_imports(self):
+        code = """
+import os
+import numpy
+from json import loads
+df.head()
+"""
+        sanitized = CodeSanitizer().sanitize(code)
+
+        assert sanitized.source == "import numpy\ndf.head()"
+
+    def test_remove_nested_unsafe_imports(self):
+        code = """
+def load():
+    import os
+"""
+        sanitized = CodeSanitizer().sanitize(code)
+
+        assert sanitized.source == "def load():\n    pass"
+
+    def test_remove_df_overwrites(self):
+        code = """
+df = pd.DataFrame()
+df.head()
+"""
+        assert CodeSanitizer().sanitize(code).source == "df = pd.DataFrame()\ndf.head()"
+        assert CodeSanitizer(remove_df_overwrites=True).sanitize(code).source == "df.head()"
+
+    def test_remove_plots(self):
+        code = """
+df.plot()
+plt.show()
+"""
+        assert CodeSanitizer().sanitize(code).source == "df.plot()"
+        assert CodeSanitizer(remove_plots=False).sanitize(code).source == "df.plot()\nplt.show()"
+
+    def test_save_charts(self, tmp_path):
+        code = """
+df.plot('a')
+plt.show()
+df.plot('b')
+plt.show()
+"""
+        sanitized = CodeSanitizer(save_charts_to=str(tmp_path)).sanitize(code)
+        save_nodes = [sanitized.tree.body[1], sanitized.tree.body[3]]
+
+        for node, suffix in zip(save_nodes, ["a", "b"]):
+            assert compare_ast(node, ast.parse("plt.savefig()").body[0], ignore_args=True)
+            filename = node.value.args[0].value
+            assert os.path.dirname(filename) == str(tmp_path)
+            assert os.path.splitext(filename)[0][-1] == suffix
+
+    def test_capture_result(self):
+        sanitized = CodeSanitizer(capture_result=True).sanitize("x = 2\nx * 3")
+
+        loc = {}
+        exec(sanitized.code, {}, loc)  # noqa: S102
+        assert loc[RESULT_VARIABLE] == 6
+        assert sanitized.source == "x = 2\nx * 3"
+
+    def test_capture_printed_result(self):
+        sanitized = CodeSanitizer(capture_result=True).sanitize("x = 2\nprint(x, x + 1, sep=', ')")
+
+        printed = []
+        loc = {}
+        exec(sanitized.code, {"print": lambda *args, **kwargs: printed.append((args, kwargs))}, loc)  # noqa: S102
+        assert loc[RESULT_VARIABLE] == (2, 3)
+        assert printed == [((2, 3), {"sep": ", "})]
+
+    def test_capture_printed_single_result(self):
+        sanitized = CodeSanitizer(capture_result=True).sanitize("x = [1, 2]\nprint(x)")
+
+        printed = []
+        loc = {}
+        exec(sanitized.code, {"print": printed.append}, loc)  # noqa: S102
+        assert loc[RESULT_VARIABLE] == [1, 2]
+        assert printed == [[1, 2]]
+
+    def test_capture_result_without_last_expression(self):
+        sanitized = CodeSanitizer(capture_result=True).sanitize("x = 2")
+
+        loc = {}
+        exec(sanitized.code, {}, loc)  # noqa: S102
+        assert RESULT_VARIABLE not in loc
@@ -0,0 +1,111 @@
+"""Unit tests for the column_projection module."""
+import ast
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.executors.local import LocalExecutor
+from pandasai.helpers.code_sanitizer import CodeSanitizer
+from pandasai.helpers.column_projection import project_columns, referenced_columns
+from pandasai.helpers.fingerprint import Fingerprinter
+from pandasai.llm.fake import FakeLLM
+
+COLUMNS = ["country", "gdp", "happiness", "region", "size"]
+
+
+class TestColumnProjection:
+    """Unit tests for the column_projection module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame(
+            {
+                "country": ["Spain", "France", "Italy", "Germany"],
+                "gdp": [1.4, 2.7, 2.0, 3.8],
+                "happiness": [6.4, 6.6, 6.0, 7.0],
+                "region": ["south", "west", "south", "west"],
+                "size": [506, 551, 301, 357],
+            }
+        )
+
+    @pytest.mark.parametrize(
+        "code,columns",
+        [
+            ("df['gdp'].mean()", {"gdp"}),
+            ("df.gdp.max()", {"gdp"}),
+            ("df[['country', 'gdp']]", {"country", "gdp"}),
+            ("df.groupby('region')['gdp'].sum()", {"region", "gdp"}),
+            ("df.groupby(['region', 'country']).size()", {"region", "country"}),
+            ("df.groupby('region').agg({'gdp': 'sum'})", {"region", "gdp"}),
+            ("df.sort_values('gdp', ascending=False)[['country']].head(3)", {"country", "gdp"}),
+            ("df[df['gdp'] > 2][['country']]", {"country", "gdp"}),
+            ("df.loc[df.gdp > 2, 'country']", {"country", "gdp"}),
+            ("df.dropna(subset=['gdp'])[['country']]", {"country", "gdp"}),
+            ("df['ratio'] = df['gdp'] / df['happiness']\ndf[['country', 'ratio']]", {"country", "gdp", "happiness"}),
+            ("len(df)", set()),
+        ],
+    )
+    def test_referenced_columns(self, code, columns, data_frame):
+        sanitized = CodeSanitizer(capture_result=True).sanitize(code)
+
+        assert referenced_columns(sanitized.tree, COLUMNS) == columns
+
+        executor = LocalExecutor()
+        expected = executor.execute(sanitized, data_frame).value
+        actual = executor.execute(sanitized, project_columns(data_frame, columns)).value
+        if isinstance(expected, (pd.Series, pd.DataFrame)):
+            assert actual.equals(expected)
+        else:
+            assert actual == expected
+
+    @pytest.mark.parametrize(
+        "code",
+        [
+            "df.describe()",
+            "df.head()",
+            "df.sort_values('gdp').head()",
+            "df.dropna()[['gdp']]",
+            "df.groupby('region').sum()",
+            "df.columns",
+            "df.size",
+            "df.empty",
+            "df.iloc[:, 0]",
+            "df.query('gdp > 2')",
+            "data = df\ndata['gdp']",
+            "df = df[df['gdp'] > 2]\ndf['gdp']",
+        ],
+    )
+    def test_unknown_columns(self, code):
+        assert referenced_columns(ast.parse(code), COLUMNS) is None
+
+    def test_project_columns_shares_memory(self, data_frame):
+        projected = project_columns(data_frame, {"happiness", "country"})
+
+        assert list(projected.columns) == ["country", "happiness"]
+        assert np.shares_memory(projected["happiness"].to_numpy(), data_frame["happiness"].to_numpy())
+
+    def test_fingerprint_of_columns(self, data_frame):
+        fingerprinter = Fingerprinter()
+        changed = data_frame.assign(size=0)
+
+        assert fingerprinter.fingerprint(data_frame, ["gdp"]) == fingerprinter.fingerprint(changed, ["gdp"])
+        assert fingerprinter.fingerprint(data_frame) != fingerprinter.fingerprint(changed)
+
+    def test_run_code_on_projected_columns(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.groupby('region')[['gdp']].sum()"), column_projection=True)
+        execute = mocker.spy(pandas_ai._executor, "execute")
+
+        answer = pandas_ai.run(data_frame, "GDP by region", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, data_frame.groupby("region")[["gdp"]].sum())
+        assert list(execute.call_args.args[1].columns) == ["gdp", "region"]
+
+    def test_run_code_on_full_frame_when_unknown(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.describe()"), column_projection=True)
+        execute = mocker.spy(pandas_ai._executor, "execute")
+
+        pandas_ai.run(data_frame, "Describe the data", anonymize_df=False)
+
+        assert execute.call_args.args[1] is data_frame
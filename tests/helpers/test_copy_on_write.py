@@ -0,0 +1,54 @@
+"""Unit tests for the copy_on_write module."""
+import pandas as pd
+import pytest
+
+from pandasai.helpers import copy_on_write as copy_on_write_module
+from pandasai.helpers.copy_on_write import bytes_copied, copy_on_write, detach_result, zero_copy_view
+
+
+class TestCopyOnWrite:
+    """Unit tests for the copy_on_write module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame({"a": range(100), "b": [1.0] * 100})
+
+    def test_view_does_not_copy(self, data_frame):
+        with copy_on_write():
+            view = zero_copy_view(data_frame)
+            assert bytes_copied(data_frame, view) == 0
+
+    def test_view_does_not_modify_original(self, data_frame):
+        with copy_on_write():
+            view = zero_copy_view(data_frame)
+            view.loc[0, "b"] = 5.0
+            view["c"] = view["a"] * 2
+
+        assert data_frame.loc[0, "b"] == 1.0
+        assert "c" not in data_frame.columns
+
+    def test_bytes_copied_counts_written_columns(self, data_frame):
+        with copy_on_write():
+            view = zero_copy_view(data_frame)
+            view.loc[0, "b"] = 5.0
+            view["c"] = view["a"] * 2
+
+            assert bytes_copied(data_frame, view) == data_frame["b"].nbytes
+
+    def test_detach_result_copies_views(self, data_frame, monkeypatch):
+        monkeypatch.setattr(copy_on_write_module, "COPY_ON_WRITE_ALWAYS_ENABLED", False)
+        view = data_frame[["a"]]
+        total = data_frame["a"].sum()
+
+        detached = detach_result(view, data_frame)
+        detached.loc[0, "a"] = -1
+
+        assert detached is not view
+        assert data_frame.loc[0, "a"] == 0
+        assert detach_result(total, data_frame) is total
+
+    def test_detach_result_keeps_new_data(self, data_frame, monkeypatch):
+        monkeypatch.setattr(copy_on_write_module, "COPY_ON_WRITE_ALWAYS_ENABLED", False)
+        result = data_frame["a"] * 2
+
+        assert detach_result(result, data_frame) is result
@@ -0,0 +1,101 @@
+"""Unit tests for the fingerprint module."""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandasai.helpers.fingerprint import Fingerprinter, fingerprint
+
+
+class TestFingerprint:
+    """Unit tests for the fingerprint module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame(
+            {
+                "country": ["Spain", "France", "Italy", "Germany"],
+                "gdp": [1.4, 2.7, 2.0, 3.8],
+                "population": pd.array([47, 68, None, 84], dtype="Int64"),
+                "date": pd.to_datetime(["2020-01-01", "2021-01-01", "2022-01-01", "2023-01-01"]),
+            }
+        )
+
+    @pytest.mark.parametrize("mode", ["full", "incremental", "sample"])
+    def test_fingerprint_content(self, mode, data_frame):
+        changed = data_frame.copy()
+        changed.loc[1, "country"] = "Portugal"
+
+        assert fingerprint(data_frame, mode) == fingerprint(data_frame.copy(), mode)
+        assert fingerprint(data_frame, mode) != fingerprint(changed, mode)
+        assert fingerprint(data_frame, mode) != fingerprint(data_frame.rename(columns={"gdp": "GDP"}), mode)
+        assert fingerprint(data_frame, mode) != fingerprint(data_frame.astype({"gdp": "float32"}), mode)
+        assert fingerprint(data_frame, mode) != fingerprint(data_frame.set_index("country"), mode)
+
+    def test_fingerprint_modes_differ(self, data_frame):
+        assert len({fingerprint(data_frame, mode) for mode in ["full", "sample", "metadata"]}) == 3
+
+    def test_metadata_fingerprint(self, data_frame):
+        assert fingerprint(data_frame, "metadata") == fingerprint(data_frame, "metadata")
+        assert fingerprint(data_frame, "metadata") != fingerprint(data_frame.copy(), "metadata")
+
+    def test_sample_fingerprint(self):
+        data_frame = pd.DataFrame({"value": np.arange(1000)})
+        changed = data_frame.copy()
+        changed.loc[1, "value"] = -1
+
+        assert fingerprint(data_frame, "sample", sample_size=10) == fingerprint(changed, "sample", sample_size=10)
+        assert fingerprint(data_frame, "sample", sample_size=1000) != fingerprint(changed, "sample", sample_size=1000)
+
+    def test_hashes_in_blocks(self, data_frame):
+        fingerprinter = Fingerprinter(block_rows=3)
+
+        assert fingerprinter.fingerprint(data_frame) == fingerprint(data_frame)
+
+    def test_incremental_fingerprint(self, data_frame):
+        fingerprinter = Fingerprinter(mode="incremental")
+        first = fingerprinter.fingerprint(data_frame)
+        assert fingerprinter.last_hashed_columns == ["country", "gdp", "population", "date"]
+
+        assert fingerprinter.fingerprint(data_frame) == first
+        assert fingerprinter.last_hashed_columns == []
+
+        data_frame["gdp"] = data_frame["gdp"] * 2
+        second = fingerprinter.fingerprint(data_frame)
+        assert second != first
+        assert fingerprinter.last_hashed_columns == ["gdp"]
+        assert second == fingerprint(data_frame, "incremental")
+
+        data_frame.loc[0, "population"] = 48
+        assert fingerprinter.fingerprint(data_frame) != second
+        assert fingerprinter.last_hashed_columns == ["population"]
+
+    def test_incremental_fingerprint_threads(self):
+        fingerprinter = Fingerprinter(mode="incremental")
+        data_frames = [pd.DataFrame({"a": np.arange(100_000) + i, "b": np.arange(100_000) * i}) for i in range(8)]
+
+        def run(position):
+            data_frame = data_frames[position % len(data_frames)]
+            return fingerprinter.fingerprint(data_frame), fingerprinter.last_hashed_columns
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(run, range(64)))
+
+        for position, (key, hashed) in enumerate(results):
+            assert key == fingerprint(data_frames[position % len(data_frames)], "incremental")
+            assert set(hashed) <= {"a", "b"}
+        assert len({key for key, _ in results}) == len(data_frames)
+
+    def test_forget(self, data_frame):
+        fingerprinter = Fingerprinter(mode="incremental")
+        fingerprinter.fingerprint(data_frame)
+
+        fingerprinter.forget(data_frame)
+        fingerprinter.fingerprint(data_frame)
+
+        assert fingerprinter.last_hashed_columns == ["country", "gdp", "population", "date"]
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            Fingerprinter(mode="unknown")
@@ -0,0 +1,95 @@
+"""Unit tests for the intent_matcher module."""
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.events import CodeGenerated
+from pandasai.helpers.intent_matcher import match_intent
+from pandasai.llm.fake import FakeLLM
+
+
+class TestIntentMatcher:
+    """Unit tests for the intent_matcher module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame(
+            {
+                "loan_amount": [1000, 800, 1000, 300],
+                "education": ["College", "High School", "College", "Master"],
+                "Principal": [1000, 800, 1000, 300],
+                "Loan Status": ["PAIDOFF", "COLLECTION", "PAIDOFF", "PAIDOFF"],
+                "approved": [True, False, True, True],
+            }
+        )
+
+    @pytest.mark.parametrize(
+        "question,code",
+        [
+            ("How many rows are there?", "pd.DataFrame({'value': [len(df)]})"),
+            ("how many rows does the dataframe have", "pd.DataFrame({'value': [len(df)]})"),
+            ("Number of records", "pd.DataFrame({'value': [len(df)]})"),
+            ("What is the average of loan_amount?", "pd.DataFrame({'value': [df['loan_amount'].mean()]})"),
+            ("Average loan amount", "pd.DataFrame({'value': [df['loan_amount'].mean()]})"),
+            ("Total principal", "pd.DataFrame({'value': [df['Principal'].sum()]})"),
+            ("What is the maximum Principal?", "pd.DataFrame({'value': [df['Principal'].max()]})"),
+            ("Lowest loan_amount", "pd.DataFrame({'value': [df['loan_amount'].min()]})"),
+            ("Unique values of education", "df[['education']].drop_duplicates()"),
+            ("Show the distinct Education", "df[['education']].drop_duplicates()"),
+            ("How many unique education are there?", "pd.DataFrame({'value': [df['education'].nunique()]})"),
+            ("Number of distinct values of loan status", "pd.DataFrame({'value': [df['Loan Status'].nunique()]})"),
+        ],
+    )
+    def test_match_intent(self, question, code, data_frame):
+        assert match_intent(question, data_frame) == code
+
+    @pytest.mark.parametrize(
+        "question",
+        [
+            "Which are the 5 happiest countries?",
+            "Average loan amount by education",
+            "How many loans are paid off?",
+            "Average of the population",
+            "Sum of education",
+            "Mean of approved",
+        ],
+    )
+    def test_no_match(self, question, data_frame):
+        assert match_intent(question, data_frame) is None
+
+    def test_run_without_calling_the_llm(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df"), match_intents=True)
+        call = mocker.spy(pandas_ai._llm, "call")
+
+        answer = pandas_ai.run(data_frame, "What is the average loan amount?", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, pd.DataFrame({"value": [775.0]}))
+        assert call.call_count == 0
+        assert pandas_ai.last_code_generated == "pd.DataFrame({'value': [df['loan_amount'].mean()]})"
+        assert pandas_ai.last_run_stats.llm_calls == []
+
+    def test_run_without_coercion(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df"), match_intents=True, coerce_result=False)
+        call = mocker.spy(pandas_ai._llm, "call")
+
+        answer = pandas_ai.run(data_frame, "How many unique education are there?", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, pd.DataFrame({"value": [3]}))
+        assert call.call_count == 0
+
+    def test_run_unmatched_question(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.groupby('education')[['loan_amount']].mean()"), match_intents=True)
+        call = mocker.spy(pandas_ai._llm, "call")
+
+        events = list(pandas_ai.run_iter(data_frame, "Average loan amount by education", anonymize_df=False))
+
+        assert call.call_count == 1
+        assert [event.purpose for event in events if isinstance(event, CodeGenerated)] == ["generate_code"]
+
+    def test_run_matched_question(self, data_frame):
+        pandas_ai = PandasAI(FakeLLM("df"), match_intents=True)
+
+        events = list(pandas_ai.run_iter(data_frame, "How many rows are there?", anonymize_df=False))
+
+        assert [event.purpose for event in events if isinstance(event, CodeGenerated)] == ["match_intent"]
+        assert events[-1].answer["value"].tolist() == [4]
@@ -0,0 +1,53 @@
+"""Unit tests for the lru_cache module."""
+import pytest
+
+from pandasai.helpers.lru_cache import LRUCache
+
+
+class TestLRUCache:
+    """Unit tests for the lru_cache module."""
+
+    def test_get_and_set(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("key", "value")
+
+        assert cache.get("key") == "value"
+        assert cache.get("missing") is None
+        assert cache.get("missing", "default") == "default"
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert len(cache) == 2
+
+    def test_disabled_cache(self):
+        cache = LRUCache(maxsize=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_delete_and_clear(self):
+        cache = LRUCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("a")
+
+        assert "a" not in cache
+        cache.get("b")
+        cache.clear()
+
+        assert len(cache) == 0
+        assert (cache.hits, cache.misses) == (0, 0)
+
+    def test_invalid_maxsize(self):
+        with pytest.raises(ValueError):
+            LRUCache(maxsize=-1)
@@ -0,0 +1,76 @@
+"""Unit tests for the result_cache module."""
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.helpers.result_cache import ResultCache
+from pandasai.llm.fake import FakeLLM
+
+
+class TestResultCache:
+    """Unit tests for the result_cache module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame({"country": ["Spain", "France", "Italy"], "gdp": [1.4, 2.7, 2.0]})
+
+    def test_get_and_set(self, data_frame):
+        cache = ResultCache()
+        key = cache.key(cache.fingerprint(data_frame), "df.head()")
+        cache.set(key, data_frame)
+        data_frame.loc[0, "gdp"] = 0
+
+        result = cache.get(key)
+
+        assert result.loc[0, "gdp"] == 1.4
+        assert cache.get(cache.key(cache.fingerprint(data_frame), "df.tail()")) is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_evicts_least_recently_used(self, data_frame):
+        nbytes = int(data_frame.memory_usage(index=True, deep=True).sum())
+        cache = ResultCache(max_bytes=2 * nbytes)
+        cache.set("a", data_frame)
+        cache.set("b", data_frame)
+        cache.get("a")
+        cache.set("c", data_frame)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.nbytes == 2 * nbytes
+
+    def test_skips_results_larger_than_the_cache(self, data_frame):
+        cache = ResultCache(max_bytes=10)
+        cache.set("a", data_frame)
+
+        assert len(cache) == 0
+
+    def test_spill_to_parquet(self, data_frame, tmp_path):
+        pytest.importorskip("pyarrow")
+        cache = ResultCache(spill_dir=str(tmp_path), spill_threshold=0, max_entries=1)
+        cache.set("a", data_frame)
+
+        assert cache.nbytes == 0
+        assert len(list(tmp_path.iterdir())) == 1
+        pd.testing.assert_frame_equal(cache.get("a"), data_frame)
+
+        cache.set("b", data_frame)
+        assert "a" not in cache
+        assert len(list(tmp_path.iterdir())) == 1
+
+    def test_run_code_uses_the_cache(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.nlargest(2, 'gdp')"), result_cache=ResultCache())
+        pandas_ai.run(data_frame, "2 richest countries", anonymize_df=False)
+        execute = mocker.spy(pandas_ai._executor, "execute")
+
+        answer = pandas_ai.run(data_frame.copy(), "2 richest countries", anonymize_df=False)
+
+        execute.assert_not_called()
+        pd.testing.assert_frame_equal(answer, data_frame.nlargest(2, "gdp"))
+        assert pandas_ai.result_cache.hits == 1
+
+        data_frame.loc[0, "gdp"] = 10
+        answer = pandas_ai.run(data_frame, "2 richest countries", anonymize_df=False)
+
+        execute.assert_called_once()
+        assert answer.iloc[0]["country"] == "Spain"
@@ -0,0 +1,78 @@
+"""Unit tests for the result_coercion module."""
+import ast
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.helpers.result_coercion import coerce_to_data_frame
+from pandasai.llm.fake import FakeLLM
+
+
+class TestResultCoercion:
+    """Unit tests for the result_coercion module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame(
+            {
+                "country": ["Spain", "France", "Italy", "Germany"],
+                "region": ["south", "west", "south", "west"],
+                "gdp": [1.4, 2.7, 2.0, 3.8],
+            }
+        )
+
+    def test_coerce_groupby_series(self, data_frame):
+        series = data_frame.groupby("region")["gdp"].sum()
+
+        pd.testing.assert_frame_equal(coerce_to_data_frame(series), series.to_frame())
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            (4, pd.DataFrame({"value": [4]})),
+            (np.float64(2.5), pd.DataFrame({"value": [2.5]})),
+            ("Spain", pd.DataFrame({"value": ["Spain"]})),
+            ({"mean": 2.5, "max": 3.8}, pd.DataFrame({"value": [2.5, 3.8]}, index=["mean", "max"])),
+            ({"country": ["Spain"], "gdp": [1.4]}, pd.DataFrame({"country": ["Spain"], "gdp": [1.4]})),
+            (["Spain", "Italy"], pd.DataFrame({"value": ["Spain", "Italy"]})),
+            ([{"country": "Spain"}, {"country": "Italy"}], pd.DataFrame({"country": ["Spain", "Italy"]})),
+            (np.array([1, 2]), pd.DataFrame({"value": [1, 2]})),
+            (pd.Index(["Spain"], name="country"), pd.DataFrame({"country": ["Spain"]})),
+        ],
+    )
+    def test_coerce(self, value, expected):
+        pd.testing.assert_frame_equal(coerce_to_data_frame(value), expected)
+
+    @pytest.mark.parametrize("value", [None, [], {}, object(), [1, "a", object()]])
+    def test_coerce_impossible(self, value):
+        assert coerce_to_data_frame(value) is None
+
+    def test_run_coerces_without_calling_the_llm(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.groupby('region')['gdp'].sum()"))
+        call = mocker.spy(pandas_ai._llm, "call")
+
+        answer = pandas_ai.run(data_frame, "GDP by region", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, data_frame.groupby("region")[["gdp"]].sum())
+        assert call.call_count == 1
+        assert pandas_ai.last_run_stats.retries == []
+
+    def test_run_corrects_values_that_cant_be_coerced(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df"))
+        mocker.patch.object(pandas_ai._llm, "call", side_effect=["None", "df[['country']]"])
+        execute = mocker.spy(pandas_ai._executor, "execute")
+
+        answer = pandas_ai.run(data_frame, "Countries", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, data_frame[["country"]])
+        assert [ast.unparse(call.args[0].tree) for call in execute.call_args_list] == ["None", "df[['country']]"]
+
+    def test_run_without_coercion(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df"), coerce_result=False)
+        mocker.patch.object(pandas_ai._llm, "call", side_effect=["len(df)", "df[['country']]"])
+
+        answer = pandas_ai.run(data_frame, "Countries", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, data_frame[["country"]])
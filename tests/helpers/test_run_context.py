@@ -0,0 +1,69 @@
+"""Unit tests for the run_context module."""
+import threading
+
+import pandas as pd
+
+from pandasai import PandasAI
+from pandasai.helpers.run_context import RunContext
+from pandasai.llm.fake import FakeLLM
+
+
+class _QuestionLLM(FakeLLM):
+    """Fake LLM filtering the rows greater than the number asked in the question"""
+
+    def call(self, instruction, value: str, suffix: str = "") -> str:
+        return f"print('filtering {value}')\ndf[df['x'] > {value}]"
+
+
+class TestRunContext:
+    """Unit tests for the run_context module."""
+
+    def test_instructions(self):
+        df = pd.DataFrame({"x": [1, 2, 3]})
+        context = RunContext(data_frame=df, question="How many rows?", rows_to_display=5)
+
+        assert context.instructions == {
+            "question": "How many rows?",
+            "df_head": None,
+            "num_rows": 3,
+            "num_columns": 1,
+            "rows_to_display": 5,
+        }
+
+    def test_instructions_total_rows(self):
+        context = RunContext(data_frame=pd.DataFrame({"x": [1, 2, 3]}), total_rows=1000)
+
+        assert context.instructions["num_rows"] == 1000
+
+    def test_run_returns_context(self):
+        df = pd.DataFrame({"x": [1, 2, 3]})
+        pandas_ai = PandasAI(_QuestionLLM())
+
+        context = pandas_ai.run(df, "1", anonymize_df=False, return_context=True)
+
+        assert context.answer["x"].tolist() == [2, 3]
+        assert context.code_generated == pandas_ai.last_code_generated
+        assert context.output == pandas_ai.last_run_output == "filtering 1\n"
+        assert context.output_truncated_bytes == 0
+        assert pandas_ai.code_output is context.answer
+        assert pandas_ai.last_run_stats is context.stats
+
+    def test_concurrent_runs(self):
+        df = pd.DataFrame({"x": range(100)})
+        pandas_ai = PandasAI(_QuestionLLM())
+        contexts = {}
+
+        def run(threshold: int):
+            for _ in range(20):
+                contexts[threshold] = pandas_ai.run(df, str(threshold), anonymize_df=False, return_context=True)
+
+        threads = [threading.Thread(target=run, args=(threshold,)) for threshold in range(0, 100, 10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for threshold, context in contexts.items():
+            assert context.question == str(threshold)
+            assert len(context.answer) == 99 - threshold
+            assert context.stats.retry_count == 0
@@ -0,0 +1,40 @@
+"""Unit tests for the run_stats module."""
+from pandasai.helpers.run_stats import LLMCallStats, RetryStats, RunStats
+
+
+class TestRunStats:
+    """Unit tests for the run_stats module."""
+
+    def test_time_accumulates_stage_durations(self):
+        stats = RunStats()
+        with stats.time("exec"):
+            pass
+        stats.add("exec", 1.0)
+
+        assert 1.0 <= stats.stages["exec"] < 2.0
+
+    def test_time_records_duration_on_error(self):
+        stats = RunStats()
+        try:
+            with stats.time("exec"):
+                raise ValueError
+        except ValueError:
+            pass
+
+        assert "exec" in stats.stages
+
+    def test_to_dict(self):
+        stats = RunStats()
+        stats.llm_calls.append(LLMCallStats("generate_code", 1.5, 100, 20))
+        stats.retries.append(RetryStats("error", "KeyError('a')", 1.6))
+
+        assert stats.retry_count == 1
+        assert stats.to_dict() == {
+            "stages": {},
+            "llm_calls": [{"purpose": "generate_code", "duration": 1.5, "prompt_size": 100, "response_size": 20}],
+            "retries": [{"reason": "error", "error": "KeyError('a')", "duration": 1.6}],
+            "repairs": [],
+            "bytes_copied": 0,
+            "duration": 0.0,
+            "retry_count": 1,
+        }
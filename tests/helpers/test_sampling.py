@@ -0,0 +1,75 @@
+"""Unit tests for the sampling module."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.helpers.run_stats import STAGE_DRY_RUN
+from pandasai.helpers.sampling import is_sample_independent_error, stratified_sample
+from pandasai.llm.fake import FakeLLM
+
+
+class TestSampling:
+    """Unit tests for the sampling module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        rng = np.random.default_rng(0)
+        rows = 100_000
+        data_frame = pd.DataFrame(
+            {
+                "country": rng.choice(["Spain", "France", "Italy"], rows),
+                "rare": ["common"] * (rows - 1) + ["rare"],
+                "value": rng.random(rows),
+            }
+        )
+        data_frame.loc[50_000, "value"] = np.nan
+        return data_frame
+
+    def test_stratified_sample(self, data_frame):
+        sample = stratified_sample(data_frame, size=50)
+
+        assert len(sample) == 50
+        assert sample.index.is_monotonic_increasing
+        assert (sample.dtypes == data_frame.dtypes).all()
+        assert list(sample.index[:5]) == [0, 1, 2, 3, 4]
+        assert set(sample["country"]) == {"Spain", "France", "Italy"}
+        assert sample["value"].isna().any()
+        pd.testing.assert_frame_equal(sample, stratified_sample(data_frame, size=50))
+
+    def test_stratified_sample_of_small_dataframe(self, data_frame):
+        small = data_frame.head(10)
+
+        assert stratified_sample(small, size=50) is small
+
+    def test_is_sample_independent_error(self, data_frame):
+        assert is_sample_independent_error(KeyError("countries"), data_frame)
+        assert is_sample_independent_error(KeyError("None of [Index(['a'])] are in the [columns]"), data_frame)
+        assert not is_sample_independent_error(KeyError("[99999] not in index"), data_frame)
+        assert is_sample_independent_error(AttributeError("'DataFrame' object has no attribute 'foo'"), data_frame)
+        assert not is_sample_independent_error(KeyError(99_999), data_frame)
+        assert not is_sample_independent_error(IndexError("single positional indexer is out-of-bounds"), data_frame)
+
+    def test_dry_run_corrects_errors_on_the_sample(self, data_frame, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.groupby('countries')[['value']].sum()"), dry_run=True, dry_run_rows=20)
+        execute = mocker.spy(pandas_ai._executor, "execute")
+        mocker.patch.object(
+            pandas_ai._llm,
+            "call",
+            side_effect=["df.groupby('countries')[['value']].sum()", "df.groupby('country')[['value']].sum()"],
+        )
+
+        answer = pandas_ai.run(data_frame, "Total value by country", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, data_frame.groupby("country")[["value"]].sum())
+        executed_on = [len(call.args[1]) for call in execute.call_args_list]
+        assert executed_on == [20, 20, len(data_frame)]
+        assert STAGE_DRY_RUN in pandas_ai.last_run_stats.stages
+
+    def test_dry_run_ignores_sample_dependent_errors(self, data_frame):
+        pandas_ai = PandasAI(FakeLLM("df.loc[[99_999]]"), dry_run=True, dry_run_rows=20)
+
+        answer = pandas_ai.run(data_frame, "Last row", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, data_frame.loc[[99_999]])
+        assert pandas_ai.last_run_stats.retries == []
@@ -0,0 +1,131 @@
+"""Unit tests for the sql_database module."""
+import asyncio
+
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.events import CodeGenerated
+from pandasai.helpers.run_stats import STAGE_SQL_REGISTER
+from pandasai.helpers.sql_database import SQLDatabase, schema
+from pandasai.llm.fake import FakeLLM
+
+QUERY = "SELECT region, SUM(gdp) AS gdp FROM df GROUP BY region ORDER BY region"
+
+
+class TestSQLDatabase:
+    """Unit tests for the sql_database module."""
+
+    @pytest.fixture
+    def data_frame(self):
+        return pd.DataFrame(
+            {
+                "country": ["Spain", "France", "Italy", "Germany"],
+                "region": ["south", "west", "south", "west"],
+                "gdp": [1.5, 2.5, 2.0, 4.0],
+                "joined": pd.to_datetime(["1986-01-01", "1958-01-01", "1958-01-01", "1958-01-01"]),
+            }
+        )
+
+    @pytest.fixture
+    def expected(self):
+        return pd.DataFrame({"region": ["south", "west"], "gdp": [3.5, 6.5]})
+
+    def test_query(self, data_frame, expected):
+        database = SQLDatabase()
+        table = database.register(data_frame)
+
+        pd.testing.assert_frame_equal(database.query(QUERY, table), expected)
+        assert database.query("SELECT COUNT(*) AS n FROM df WHERE joined < '1960-01-01'", table)["n"][0] == 3
+
+    def test_query_recursive(self, data_frame):
+        database = SQLDatabase()
+        table = database.register(data_frame)
+
+        query = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 3) SELECT SUM(i) AS s FROM n"
+        assert database.query(query, table)["s"][0] == 6
+
+    def test_register_after_modification_in_place(self):
+        data_frame = pd.DataFrame({"gdp": [1.0] * 100_000})
+        database = SQLDatabase()
+        assert database.query("SELECT SUM(gdp) AS s FROM df", database.register(data_frame))["s"][0] == 100_000
+
+        # the row isn't in the sample of the incremental fingerprints
+        data_frame.loc[1, "gdp"] = 2.0
+        assert database.query("SELECT SUM(gdp) AS s FROM df", database.register(data_frame))["s"][0] == 100_001
+
+    def test_register_once(self, data_frame):
+        database = SQLDatabase()
+
+        table = database.register(data_frame)
+
+        assert database.register(data_frame) == table
+        assert database.register(data_frame.copy()) == table
+        assert database.register(data_frame.assign(gdp=0.0)) != table
+        assert database.registrations == 2
+
+    def test_indexes(self, data_frame):
+        database = SQLDatabase()
+        table = database.register(data_frame)
+
+        indexes = database._connection.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table,)
+        ).fetchall()
+
+        assert len(indexes) == 2
+        assert '("region")' in indexes[0][0]
+        assert '("joined")' in indexes[1][0]
+
+    def test_max_tables(self, data_frame):
+        database = SQLDatabase(max_tables=1)
+        first_table = database.register(data_frame)
+
+        second_table = database.register(data_frame.head(2))
+
+        with pytest.raises(pd.errors.DatabaseError):
+            database.query("SELECT * FROM df", first_table)
+        assert len(database.query("SELECT * FROM df", second_table)) == 2
+
+    @pytest.mark.parametrize(
+        "query", ["DROP TABLE {table}", "DELETE FROM {table}", "ATTACH DATABASE 'other.db' AS other"]
+    )
+    def test_read_only(self, query, data_frame):
+        database = SQLDatabase()
+        table = database.register(data_frame)
+
+        with pytest.raises(pd.errors.DatabaseError, match="not authorized"):
+            database.query(query.format(table=table), table)
+        assert len(database.query("SELECT * FROM df", table)) == 4
+
+    def test_schema(self, data_frame):
+        assert schema(data_frame) == '"country" TEXT\n"region" TEXT\n"gdp" REAL\n"joined" TIMESTAMP'
+
+    def test_run_sql_mode(self, data_frame, expected):
+        pandas_ai = PandasAI(FakeLLM(f"<startCode>\n{QUERY}\n<endCode>"), sql_mode=True)
+
+        answer = pandas_ai.run(data_frame, "GDP by region", anonymize_df=False)
+        pandas_ai.run(data_frame, "GDP by region, again", anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, expected)
+        assert pandas_ai.last_code_generated == QUERY
+        assert pandas_ai.sql_database.registrations == 1
+        assert STAGE_SQL_REGISTER in pandas_ai.last_run_stats.stages
+        assert '"gdp" REAL' in pandas_ai._llm.last_prompt
+
+    def test_arun_sql_mode(self, data_frame, expected):
+        pandas_ai = PandasAI(FakeLLM(QUERY), sql_mode=True)
+
+        answer = asyncio.run(pandas_ai.arun(data_frame, "GDP by region", anonymize_df=False))
+
+        pd.testing.assert_frame_equal(answer, expected)
+
+    def test_run_sql_mode_corrects_errors(self, data_frame, expected, mocker):
+        pandas_ai = PandasAI(FakeLLM(QUERY), sql_mode=True)
+        mocker.patch.object(pandas_ai._llm, "call", side_effect=[QUERY.replace("region", "area"), QUERY])
+
+        events = list(pandas_ai.run_iter(data_frame, "GDP by region", anonymize_df=False))
+
+        pd.testing.assert_frame_equal(events[-1].answer, expected)
+        purposes = [event.purpose for event in events if isinstance(event, CodeGenerated)]
+        assert purposes == ["generate_sql", "correct_sql_error"]
+        assert pandas_ai.last_run_stats.retry_count == 1
@@ -0,0 +1,70 @@
+"""Unit tests for the stdout_capture module."""
+import sys
+import threading
+
+from pandasai.helpers.stdout_capture import capture_stdout
+
+
+class TestStdoutCapture:
+    """Unit tests for the stdout_capture module."""
+
+    def test_capture(self):
+        stdout = sys.stdout
+        with capture_stdout() as output:
+            print("Hello world")
+
+        assert output.getvalue() == "Hello world\n"
+        assert sys.stdout is stdout
+
+    def test_bounded_capture(self):
+        with capture_stdout(max_size=10) as output:
+            for value in range(100):
+                print(value % 10, end="")
+
+        assert output.getvalue() == "01234\n... [90 bytes truncated] ...\n56789"
+        assert output.truncated_bytes == 90
+
+    def test_bounded_capture_of_large_writes(self):
+        with capture_stdout(max_size=10) as output:
+            print("é" * 100, end="")
+
+        assert output.getvalue() == "ééééé\n... [180 bytes truncated] ...\nééééé"
+
+    def test_disabled_capture(self):
+        stdout = sys.stdout
+        with capture_stdout(max_size=0) as output:
+            print("Hello world")
+
+        assert output.getvalue() == ""
+        assert sys.stdout is stdout
+
+    def test_nested_capture(self):
+        with capture_stdout() as outer:
+            print("a")
+            with capture_stdout() as inner:
+                print("b")
+            print("c")
+
+        assert outer.getvalue() == "a\nc\n"
+        assert inner.getvalue() == "b\n"
+
+    def test_captures_are_isolated_between_threads(self):
+        outputs = {}
+        barrier = threading.Barrier(4)
+
+        def run(name: str):
+            with capture_stdout() as output:
+                barrier.wait()
+                for _ in range(100):
+                    print(name)
+                barrier.wait()
+            outputs[name] = output.getvalue()
+
+        threads = [threading.Thread(target=run, args=(name,)) for name in "abcd"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for name, output in outputs.items():
+            assert output == f"{name}\n" * 100
@@ -2,7 +2,7 @@
 
 import pytest
 
-from pandasai.exceptions import APIKeyNotFoundError
+from pandasai.exceptions import APIKeyNotFoundError, NoCodeFoundError
 from pandasai.llm.base import LLM
 
 
@@ -83,3 +83,21 @@ print('Hello World')
 """
 
         assert LLM()._extract_code(code) == "print('Hello World')"
+
+    def test_extract_sql(self):
+        response = """Sure, here is your query:
+```sql
+SELECT country FROM df ORDER BY gdp DESC LIMIT 5;
+```
+"""
+        assert LLM()._extract_sql(response) == "SELECT country FROM df ORDER BY gdp DESC LIMIT 5"
+
+        response = """<startCode>
+WITH totals AS (SELECT country, SUM(gdp) AS gdp FROM df GROUP BY country) SELECT * FROM totals
+<endCode>"""
+        assert LLM()._extract_sql(response).startswith("WITH totals AS")
+
+    @pytest.mark.parametrize("response", ["DROP TABLE df", "SELECT 'a", "print('Hello World')"])
+    def test_extract_sql_no_query(self, response):
+        with pytest.raises(NoCodeFoundError):
+            LLM()._extract_sql(response)
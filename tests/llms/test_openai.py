@@ -1,5 +1,7 @@
 """Unit tests for the openai LLM class"""
 
+import asyncio
+
 import pytest
 
 from pandasai.exceptions import APIKeyNotFoundError, UnsupportedOpenAIModelError
@@ -101,3 +103,15 @@ class TestOpenAILLM:
 
         result = openai.call(instruction=prompt, value="value")
         assert result == "response"
+
+    def test_acall_supported_chat_model(self, mocker, prompt):
+        openai = OpenAI(api_token="test", model="gpt-4")
+        acreate_mock = mocker.patch(
+            "openai.ChatCompletion.acreate",
+            new_callable=mocker.AsyncMock,
+            return_value={"choices": [{"message": {"content": "response"}}]},
+        )
+
+        result = asyncio.run(openai.acall(instruction=prompt, value="value"))
+        assert result == "response"
+        acreate_mock.assert_awaited_once()
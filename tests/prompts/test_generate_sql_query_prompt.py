@@ -0,0 +1,40 @@
+"""Unit tests for the generate SQL query prompt class"""
+
+from datetime import date
+
+from pandasai.prompts.generate_sql_query import GenerateSQLQueryPrompt
+
+
+class TestGenerateSQLQueryPrompt:
+    """Unit tests for the generate SQL query prompt class"""
+
+    def test_str_with_args(self):
+        """Test that the __str__ method is implemented"""
+        assert (
+            str(
+                GenerateSQLQueryPrompt(
+                    df_csv_head="country,gdp\nSpain,1.4",
+                    schema='"country" TEXT\n"gdp" REAL',
+                    num_rows=10,
+                    num_columns=2,
+                    rows_to_display=1,
+                )
+            )
+            == f"""
+Today is {date.today()}.
+You are provided with a SQLite table (df) with 10 rows and 2 columns.
+These are the columns of the table and their types:
+"country" TEXT
+"gdp" REAL
+
+This is the result of `SELECT * FROM df LIMIT 1`, as csv:
+country,gdp
+Spain,1.4.
+
+When asked about the data, your response should include a single SQLite SELECT query on the table `df`.
+Do not modify the table, do not query other tables and do not return several queries.
+Timestamps are stored as text formatted as `YYYY-MM-DD HH:MM:SS`, use the SQLite date and time functions to work with them.
+Always return the result the user asks for, with explicit column names.
+Return the query and make sure to prefix it with <startCode> exactly and suffix it with <endCode> exactly to get the answer to the following question:
+"""  # noqa: E501
+        )
@@ -0,0 +1,95 @@
+"""Unit tests for the async API of the PandasAI class"""
+import asyncio
+import time
+
+import pandas as pd
+
+from pandasai import PandasAI
+from pandasai.llm.fake import FakeLLM
+
+
+class _SequenceLLM(FakeLLM):
+    """Fake LLM returning the outputs in sequence, waiting before each response"""
+
+    def __init__(self, outputs: list, delay: float = 0.0):
+        self._outputs = outputs
+        self._delay = delay
+        self.calls = 0
+
+    async def acall(self, instruction, value: str, suffix: str = "") -> str:
+        self.last_prompt = str(instruction) + str(value) + suffix
+        await asyncio.sleep(self._delay)
+        output = self._outputs[min(self.calls, len(self._outputs) - 1)]
+        self.calls += 1
+        return output
+
+
+class _GeneratingLLM(FakeLLM):
+    """Fake LLM generating the code without calling `call`"""
+
+    def call(self, instruction, value: str, suffix: str = "") -> str:
+        raise AssertionError("generate_code is overridden")
+
+    def generate_code(self, instruction, prompt: str) -> str:
+        return "df.head(1)"
+
+
+class TestArun:
+    """Unit tests for the async API of the PandasAI class"""
+
+    df = pd.DataFrame({"x": [1, 2, 3]})
+
+    def test_arun(self):
+        pandas_ai = PandasAI(_SequenceLLM(["df[df['x'] > 1]"]))
+
+        answer = asyncio.run(pandas_ai.arun(self.df, "Rows above 1", anonymize_df=False))
+
+        assert answer["x"].tolist() == [2, 3]
+        assert pandas_ai.last_code_generated == "df[df['x'] > 1]"
+
+    def test_acall_uses_call_in_thread(self):
+        pandas_ai = PandasAI(FakeLLM("df.head(1)"))
+
+        answer = asyncio.run(pandas_ai.__acall__(self.df, "First row", anonymize_df=False))
+
+        assert answer["x"].tolist() == [1]
+
+    def test_arun_corrects_errors(self):
+        llm = _SequenceLLM(["df['y']", "df[['x']]"])
+        pandas_ai = PandasAI(llm)
+
+        context = asyncio.run(pandas_ai.arun(self.df, "Column x", anonymize_df=False, return_context=True))
+
+        assert context.answer.columns.tolist() == ["x"]
+        assert llm.calls == 2
+        assert context.stats.retries[0].reason == "error"
+        assert "Correct the python code" in llm.last_prompt
+
+    def test_arun_code(self):
+        pandas_ai = PandasAI(_SequenceLLM(["df"]))
+        asyncio.run(pandas_ai.arun(self.df, "All rows", anonymize_df=False))
+
+        answer = asyncio.run(pandas_ai.arun_code("df.tail(1)"))
+
+        assert answer["x"].tolist() == [3]
+
+    def test_concurrent_aruns(self):
+        pandas_ai = PandasAI(_SequenceLLM(["df.head(2)"], delay=0.2))
+
+        async def run_all():
+            return await asyncio.gather(
+                *(pandas_ai.arun(self.df, f"Question {i}", anonymize_df=False) for i in range(50))
+            )
+
+        started_at = time.perf_counter()
+        answers = asyncio.run(run_all())
+
+        assert time.perf_counter() - started_at < 5
+        assert all(answer["x"].tolist() == [1, 2] for answer in answers)
+
+    def test_arun_uses_generate_code(self):
+        pandas_ai = PandasAI(_GeneratingLLM())
+
+        answer = asyncio.run(pandas_ai.arun(self.df, "First row", anonymize_df=False))
+
+        assert answer["x"].tolist() == [1]
@@ -649,6 +649,18 @@ print('Hello', name)"""
         pandasai.clean_data([pd.DataFrame(), pd.DataFrame()])
         pandasai.run.assert_called_once()
 
+    def test_run_uses_generate_code_of_llm(self, sample_df):
+        class GeneratingLLM(FakeLLM):
+            def generate_code(self, instruction: Prompt, prompt: str) -> str:
+                return "df.head(1)"
+
+        pandasai = PandasAI(GeneratingLLM("df"))
+
+        answer = pandasai.run(sample_df, "First country", anonymize_df=False)
+
+        assert answer["country"].tolist() == ["United States"]
+        assert pandasai.last_run_stats.llm_calls[0].response_size == len("df.head(1)")
+
     def test_replace_generate_code_prompt(self, llm):
         replacement_prompt = "{num_rows} | {num_columns} | {df_head} | ".format
 
@@ -0,0 +1,61 @@
+"""Unit tests for the chunked execution of the PandasAI class"""
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.exceptions import NonDecomposableCodeError
+from pandasai.llm.fake import FakeLLM
+
+
+class TestRunChunked:
+    """Unit tests for the chunked execution of the PandasAI class"""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        path = tmp_path / "sales.csv"
+        pd.DataFrame({"country": ["fr", "it", "fr", "de"] * 250, "sales": range(1000)}).to_csv(path, index=False)
+        return path
+
+    def test_run_chunked(self, path, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.groupby('country')[['sales']].sum()"))
+        call = mocker.spy(pandas_ai._llm, "call")
+
+        context = pandas_ai.run_chunked(
+            path, "Sales by country", chunksize=100, anonymize_df=False, return_context=True
+        )
+
+        expected = pd.read_csv(path).groupby("country")[["sales"]].sum()
+        pd.testing.assert_frame_equal(context.answer, expected)
+        assert len(context.data_frame) == 100
+        # the prompt is about all the rows, not the first chunk
+        assert "with 1000 rows" in str(call.call_args.args[0])
+
+    def test_run_chunked_coerces_result(self, path):
+        pandas_ai = PandasAI(FakeLLM("df['sales'].mean()"))
+
+        answer = pandas_ai.run_chunked(path, "Average sales", chunksize=100, anonymize_df=False)
+
+        pd.testing.assert_frame_equal(answer, pd.DataFrame({"value": [499.5]}))
+
+    def test_run_chunked_correction_prompt_rows(self, path, mocker):
+        pandas_ai = PandasAI(FakeLLM(""))
+        call = mocker.patch.object(pandas_ai._llm, "call", side_effect=["df['revenue'].sum()", "df['sales'].sum()"])
+
+        pandas_ai.run_chunked(path, "Total sales", chunksize=100, anonymize_df=False)
+
+        assert "with 1000 rows" in str(call.call_args_list[1].args[0])
+
+    def test_run_chunked_refuses_non_decomposable_code(self, path):
+        pandas_ai = PandasAI(FakeLLM("df[['sales']].median().to_frame()"))
+
+        with pytest.raises(NonDecomposableCodeError):
+            pandas_ai.run_chunked(path, "Median of the sales", chunksize=100, anonymize_df=False)
+
+    def test_run_chunked_with_full_load(self, path):
+        pandas_ai = PandasAI(FakeLLM("df[['sales']].median().to_frame()"))
+
+        answer = pandas_ai.run_chunked(
+            path, "Median of the sales", chunksize=100, anonymize_df=False, allow_full_load=True
+        )
+
+        assert answer.iloc[0, 0] == 499.5
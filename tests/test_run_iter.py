@@ -0,0 +1,127 @@
+"""Unit tests for the streaming API of the PandasAI class"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.events import (
+    CodeGenerated,
+    CodeSanitized,
+    ExecutionStarted,
+    FinalResult,
+    PreliminaryResult,
+    PromptBuilt,
+    RetryTriggered,
+)
+from pandasai.llm.fake import FakeLLM
+from pandasai.prompts.generate_python_code import GeneratePythonCodePrompt
+
+
+class _SequenceLLM(FakeLLM):
+    """Fake LLM returning the outputs in sequence"""
+
+    def __init__(self, outputs: list):
+        self._outputs = iter(outputs)
+
+    def call(self, instruction, value: str, suffix: str = "") -> str:
+        return next(self._outputs)
+
+
+class TestRunIter:
+    """Unit tests for the streaming API of the PandasAI class"""
+
+    df = pd.DataFrame({"x": [1, 2, 3]})
+
+    @pytest.fixture
+    def large_df(self):
+        rng = np.random.default_rng(0)
+        return pd.DataFrame({"k": rng.choice(list("abc"), 10_000), "v": rng.integers(0, 100, 10_000)})
+
+    def test_run_iter(self):
+        pandas_ai = PandasAI(_SequenceLLM(["df.head(1)"]))
+
+        events = list(pandas_ai.run_iter(self.df, "First row", anonymize_df=False))
+
+        assert [type(event) for event in events] == [
+            PromptBuilt,
+            CodeGenerated,
+            CodeSanitized,
+            ExecutionStarted,
+            FinalResult,
+        ]
+        assert isinstance(events[0].prompt, GeneratePythonCodePrompt)
+        assert events[1].code == "df.head(1)"
+        assert events[3].attempt == 1
+        assert events[-1].answer["x"].tolist() == [1]
+        assert events[-1].context is pandas_ai._last_context
+
+    def test_run_iter_with_retry(self):
+        pandas_ai = PandasAI(_SequenceLLM(["df['y']", "df[['x']]"]))
+
+        events = list(pandas_ai.run_iter(self.df, "Column x", anonymize_df=False))
+        retries = [event for event in events if isinstance(event, RetryTriggered)]
+        generated = [event for event in events if isinstance(event, CodeGenerated)]
+
+        assert len(retries) == 1
+        assert retries[0].reason == "error"
+        assert isinstance(retries[0].error, KeyError)
+        assert [event.purpose for event in generated] == ["generate_code", "correct_error"]
+        assert [event.attempt for event in events if isinstance(event, ExecutionStarted)] == [1, 2]
+        assert isinstance(events[-1], FinalResult)
+
+    def test_run_iter_raises_errors(self):
+        pandas_ai = PandasAI(_SequenceLLM(["df['y']"]))
+        events = pandas_ai.run_iter(self.df, "Column y", anonymize_df=False, use_error_correction_framework=False)
+
+        assert isinstance(next(events), PromptBuilt)
+        with pytest.raises(KeyError):
+            list(events)
+
+    def test_run_iter_progressive(self, large_df):
+        pandas_ai = PandasAI(_SequenceLLM(["df.groupby('k')['v'].sum()"]))
+
+        events = list(pandas_ai.run_iter(large_df, "Total of v by k", anonymize_df=False, progressive=True))
+        preliminary = [event for event in events if isinstance(event, PreliminaryResult)]
+
+        assert [event.rows for event in preliminary] == [100, 1000]
+        assert all(event.answer.attrs["approximate"] for event in preliminary)
+        assert preliminary[-1].confidence_interval is not None
+        assert isinstance(events[-1], FinalResult)
+        pd.testing.assert_frame_equal(events[-1].answer, large_df.groupby("k")["v"].sum().to_frame())
+        assert pandas_ai.last_run_approximate is False
+
+    def test_run_iter_progressive_cancelled(self, large_df, mocker):
+        pandas_ai = PandasAI(_SequenceLLM(["df.groupby('k')['v'].sum()"]))
+        execute = mocker.spy(pandas_ai._executor, "execute")
+
+        for event in pandas_ai.run_iter(large_df, "Total of v by k", anonymize_df=False, progressive=True):
+            if isinstance(event, PreliminaryResult):
+                break
+
+        assert max(len(call.args[1]) for call in execute.call_args_list) <= 100
+
+    def test_run_iter_progressive_not_decomposable(self, large_df):
+        pandas_ai = PandasAI(_SequenceLLM(["df['k'].value_counts()"]))
+
+        events = list(pandas_ai.run_iter(large_df, "Rows per k", anonymize_df=False, progressive=True))
+
+        assert not any(isinstance(event, PreliminaryResult) for event in events)
+        pd.testing.assert_frame_equal(events[-1].answer, large_df["k"].value_counts().to_frame())
+
+    def test_run_code_iter(self, large_df):
+        pandas_ai = PandasAI(_SequenceLLM(["df.head(1)"]))
+        pandas_ai.run(large_df, "First row", anonymize_df=False)
+
+        events = list(pandas_ai.run_code_iter("df['v'].mean()", fractions=(0.5,)))
+
+        assert [type(event) for event in events if not isinstance(event, (CodeSanitized, ExecutionStarted))] == [
+            PreliminaryResult,
+            FinalResult,
+        ]
+        assert events[-1].answer["value"][0] == large_df["v"].mean()
+
+    def test_run_iter_approximate_and_progressive(self):
+        pandas_ai = PandasAI(_SequenceLLM(["df.head(1)"]))
+
+        with pytest.raises(ValueError):
+            list(pandas_ai.run_iter(self.df, "First row", approximate=True, progressive=True))
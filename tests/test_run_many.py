@@ -0,0 +1,80 @@
+"""Unit tests for the batch API of the PandasAI class"""
+import asyncio
+import threading
+import time
+
+import pandas as pd
+
+from pandasai import PandasAI
+from pandasai.llm.fake import FakeLLM
+
+
+class _QuestionLLM(FakeLLM):
+    """Fake LLM returning the question as code, counting its concurrent calls"""
+
+    def __init__(self, delay: float = 0.0):
+        self._delay = delay
+        self._lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def call(self, instruction, value: str, suffix: str = "") -> str:
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self._delay)
+        with self._lock:
+            self.running -= 1
+        return value
+
+
+class TestRunMany:
+    """Unit tests for the batch API of the PandasAI class"""
+
+    df = pd.DataFrame({"x": [1, 2, 3]})
+
+    def test_run_many_returns_results_in_order(self):
+        pandas_ai = PandasAI(_QuestionLLM(delay=0.01))
+        prompts = [f"df[df['x'] > {i % 3}]" for i in range(10)]
+
+        contexts = pandas_ai.run_many(self.df, prompts, anonymize_df=False)
+
+        assert [context.question for context in contexts] == prompts
+        assert [len(context.answer) for context in contexts] == [3 - i % 3 for i in range(10)]
+        assert all(context.error is None for context in contexts)
+
+    def test_run_many_bounds_concurrency(self):
+        llm = _QuestionLLM(delay=0.05)
+        pandas_ai = PandasAI(llm)
+
+        pandas_ai.run_many(self.df, ["df"] * 12, anonymize_df=False, max_concurrency=3)
+
+        assert 1 < llm.max_running <= 3
+
+    def test_run_many_returns_errors(self):
+        pandas_ai = PandasAI(_QuestionLLM())
+
+        contexts = pandas_ai.run_many(
+            self.df, ["df['y']", "df"], anonymize_df=False, use_error_correction_framework=False
+        )
+
+        assert isinstance(contexts[0].error, KeyError)
+        assert contexts[0].answer is None
+        assert contexts[1].error is None
+        assert contexts[1].answer is not None
+
+    def test_run_many_computes_head_once(self, mocker):
+        anonymize = mocker.patch("pandasai.anonymize_dataframe_head", side_effect=lambda df: df)
+        pandas_ai = PandasAI(_QuestionLLM())
+
+        pandas_ai.run_many(self.df, ["df", "df.head(1)"])
+
+        anonymize.assert_called_once()
+
+    def test_arun_many(self):
+        pandas_ai = PandasAI(_QuestionLLM())
+
+        contexts = asyncio.run(pandas_ai.arun_many(self.df, ["df.head(1)", "df['y']"], anonymize_df=False))
+
+        assert contexts[0].answer["x"].tolist() == [1]
+        assert contexts[1].error is not None
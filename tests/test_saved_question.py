@@ -0,0 +1,113 @@
+"""Unit tests for the saved questions of the PandasAI class"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from pandasai import PandasAI
+from pandasai.llm.fake import FakeLLM
+
+
+class TestSavedQuestion:
+    """Unit tests for the saved questions of the PandasAI class"""
+
+    @pytest.fixture
+    def events(self):
+        rng = np.random.default_rng(0)
+        return pd.DataFrame({"type": rng.choice(list("abc"), 3000), "duration": rng.integers(0, 100, 3000)})
+
+    def _expected(self, events):
+        return events.groupby("type")["duration"].mean().to_frame()
+
+    def test_refresh_appended_rows(self, events, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.groupby('type')['duration'].mean()"))
+        question = pandas_ai.save_question("Average duration per type", anonymize_df=False)
+        call = mocker.spy(pandas_ai._llm, "call")
+        execute = mocker.spy(pandas_ai._executor, "execute")
+
+        pd.testing.assert_frame_equal(question.run(events.head(2000)), self._expected(events.head(2000)))
+        answer = question.run(events)
+
+        pd.testing.assert_frame_equal(answer, self._expected(events))
+        assert question.incremental
+        assert question.last_refresh_incremental
+        assert question.last_rows_computed == 1000
+        assert len(execute.call_args_list[-1].args[1]) == 1000
+        assert call.call_count == 1
+
+    def test_ask_runs_the_code_once(self, events, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.groupby('type')['duration'].mean()"))
+        question = pandas_ai.save_question("Average duration per type", anonymize_df=False)
+        execute = mocker.spy(pandas_ai._executor, "execute")
+
+        answer = question.run(events)
+
+        pd.testing.assert_frame_equal(answer, self._expected(events))
+        assert execute.call_count == 1
+        assert pandas_ai.last_code_generated == "df.groupby('type')['duration'].mean()"
+
+    def test_failed_refresh_keeps_partials(self, events):
+        pandas_ai = PandasAI(FakeLLM("df['duration'].sum()"))
+        question = pandas_ai.save_question("Total duration", anonymize_df=False)
+        question.run(events.head(2000))
+
+        with pytest.raises(KeyError):
+            question.run(events.rename(columns={"duration": "length"}))
+        answer = question.run(events)
+
+        assert answer["value"][0] == events["duration"].sum()
+        assert question.last_refresh_incremental
+        assert question.last_rows_computed == 1000
+
+    def test_refresh_unchanged(self, events):
+        pandas_ai = PandasAI(FakeLLM("df.groupby('type')['duration'].mean()"))
+        question = pandas_ai.save_question("Average duration per type", anonymize_df=False)
+
+        first = question.run(events)
+
+        assert question.run(events.copy()) is first
+        assert question.last_rows_computed == 0
+
+    def test_refresh_changed_rows(self, events):
+        pandas_ai = PandasAI(FakeLLM("df.groupby('type')['duration'].mean()"))
+        question = pandas_ai.save_question("Average duration per type", anonymize_df=False, fingerprint_mode="full")
+        question.run(events.head(2000))
+
+        changed = events.assign(duration=events["duration"] + 1)
+        answer = question.run(changed)
+
+        pd.testing.assert_frame_equal(answer, self._expected(changed))
+        assert not question.last_refresh_incremental
+        assert question.last_rows_computed == len(changed)
+
+    def test_refresh_not_decomposable(self, events, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.sort_values('duration').tail(3)"))
+        question = pandas_ai.save_question("Longest events", anonymize_df=False)
+        call = mocker.spy(pandas_ai._llm, "call")
+
+        question.run(events.head(2000))
+        answer = question.run(events)
+
+        pd.testing.assert_frame_equal(answer, events.sort_values("duration").tail(3))
+        assert not question.incremental
+        assert not question.last_refresh_incremental
+        assert call.call_count == 1
+
+    def test_refresh_not_decomposable_keeps_corrected_code(self, events, mocker):
+        pandas_ai = PandasAI(FakeLLM("df.sort_values('duration').tail(3)"))
+        question = pandas_ai.save_question("Longest events", anonymize_df=False)
+        question.run(events.head(2000))
+        call = mocker.patch.object(pandas_ai._llm, "call", return_value="df.sort_values('length').tail(3)")
+
+        renamed = events.rename(columns={"duration": "length"})
+        answer = question.run(renamed)
+        question.run(renamed.copy())
+
+        pd.testing.assert_frame_equal(answer, renamed.sort_values("length").tail(3))
+        assert question.code == "df.sort_values('length').tail(3)"
+        # the correction prompt shows the head of the dataframe
+        assert str(renamed.head()) in str(call.call_args.args[0])
+        assert call.call_count == 1
+
+    def test_save_question_sql_mode(self):
+        with pytest.raises(ValueError):
+            PandasAI(FakeLLM("SELECT 1"), sql_mode=True).save_question("Anything")